@@ -80,6 +80,9 @@ class BuildVolume(SceneNode):
 
         self._disallowed_areas = []  # type: List[Polygon]
         self._disallowed_areas_no_brim = []  # type: List[Polygon]
+        # The bounding rectangles of all disallowed areas together, to quickly find the areas near a node.
+        self._disallowed_area_bounds = None  # type: Optional[numpy.ndarray]
+        self._disallowed_area_bounds_areas = None  # type: Optional[List[Polygon]]
         self._disallowed_area_mesh = None  # type: Optional[MeshData]
         self._disallowed_area_size = 0.
 
@@ -124,6 +127,11 @@ class BuildVolume(SceneNode):
         # Number of toplevel printable meshes. If there is more than one, the build volume needs to take account of the gantry height in One at a Time printing.
         self._root_printable_object_count = 0
 
+        # Nodes that changed since the last boundary check, so only those need to be checked again. If the build volume
+        # itself changed, all nodes need to be checked.
+        self._boundary_check_nodes = set()  # type: Set[SceneNode]
+        self._boundary_check_all_nodes = True
+
         self._scene_change_timer = QTimer()
         self._scene_change_timer.setInterval(200)
         self._scene_change_timer.setSingleShot(True)
@@ -144,12 +152,13 @@ class BuildVolume(SceneNode):
         self._onStackChanged()
 
         # Enable and disable extruder
-        self._machine_manager.extruderChanged.connect(self.updateNodeBoundaryCheck)
+        self._machine_manager.extruderChanged.connect(self._onExtruderChanged)
 
         # List of settings which were updated
         self._changed_settings_since_last_rebuild = []  # type: List[str]
 
     def _onSceneChanged(self, source):
+        self._markForBoundaryCheck(source)
         if self._global_container_stack:
             # Ignore anything that is not something we can slice in the first place!
             if source.callDecoration("isSliceable"):
@@ -252,6 +261,7 @@ class BuildVolume(SceneNode):
 
     def setDisallowedAreas(self, areas: List[Polygon]):
         self._disallowed_areas = areas
+        self._boundary_check_all_nodes = True
 
     def render(self, renderer):
         if not self.getMeshData() or not self.isVisible():
@@ -281,14 +291,37 @@ class BuildVolume(SceneNode):
 
         return True
 
+    def _onExtruderChanged(self) -> None:
+        self._boundary_check_all_nodes = True
+        self.updateNodeBoundaryCheck()
+
+    def _markForBoundaryCheck(self, node: SceneNode) -> None:
+        """Remember that a node changed, so that it gets checked in the next :py:meth:`updateNodeBoundaryCheck`.
+
+        :param node: The node that changed. Its children may have moved along with it, so these are checked as well.
+            If the node is in a group, the whole group is checked, since the group decides for all of its children.
+        """
+
+        if self._boundary_check_all_nodes:
+            return
+
+        root = self._application.getController().getScene().getRoot()
+        while node is not root and node.getParent() is not None and node.getParent().callDecoration("isGroup"):
+            node = node.getParent()
+        if node is root:  # Nodes were added or removed.
+            self._boundary_check_all_nodes = True
+            return
+        if node.getParent() is None:  # Not in the scene (any more).
+            return
+        self._boundary_check_nodes.add(node)
+
     def updateNodeBoundaryCheck(self):
-        """For every sliceable node, update node._outside_buildarea"""
+        """For every sliceable node that changed since the last check, update node._outside_buildarea"""
 
         if not self._global_container_stack:
             return
 
         root = self._application.getController().getScene().getRoot()
-        nodes = cast(List[SceneNode], list(cast(Iterable, BreadthFirstIterator(root))))
         group_nodes = []  # type: List[SceneNode]
 
         build_volume_bounding_box = self.getBoundingBox()
@@ -302,6 +335,21 @@ class BuildVolume(SceneNode):
             # In that situation there is a model, but no machine (and therefore no build volume.
             return
 
+        if self._boundary_check_all_nodes:
+            nodes = cast(List[SceneNode], list(cast(Iterable, BreadthFirstIterator(root))))
+        else:
+            nodes = []
+            visited = set()  # type: Set[SceneNode]
+            for changed_node in self._boundary_check_nodes:
+                if changed_node.getParent() is None:  # Removed from the scene in the meantime.
+                    continue
+                for node in cast(Iterable, BreadthFirstIterator(changed_node)):
+                    if node not in visited:
+                        visited.add(node)
+                        nodes.append(node)
+        self._boundary_check_nodes = set()
+        self._boundary_check_all_nodes = False
+
         for node in nodes:
             # Need to check group nodes later
             if node.callDecoration("isGroup"):
@@ -315,7 +363,7 @@ class BuildVolume(SceneNode):
                     node.setOutsideBuildArea(True)
                     continue
 
-                if node.collidesWithAreas(self.getDisallowedAreas()):
+                if node.collidesWithAreas(self._getDisallowedAreasNear(node)):
                     node.setOutsideBuildArea(True)
                     continue
                 # If the entire node is below the build plate, still mark it as outside.
@@ -367,7 +415,7 @@ class BuildVolume(SceneNode):
                 node.setOutsideBuildArea(True)
                 return
 
-            if node.collidesWithAreas(self.getDisallowedAreas()):
+            if node.collidesWithAreas(self._getDisallowedAreasNear(node)):
                 node.setOutsideBuildArea(True)
                 return
 
@@ -384,6 +432,35 @@ class BuildVolume(SceneNode):
 
             node.setOutsideBuildArea(False)
 
+    def _getDisallowedAreasNear(self, node: SceneNode) -> List[Polygon]:
+        """Get the disallowed areas that may collide with a node, because their bounding rectangles overlap.
+
+        :param node: The node to get the disallowed areas for.
+        :return: The disallowed areas near the printing area of the node.
+        """
+
+        printing_area = node.callDecoration("getPrintingArea")
+        if not isinstance(printing_area, Polygon) or not printing_area.isValid():
+            return self._disallowed_areas  # Let the node decide what to do with this.
+
+        if self._disallowed_area_bounds_areas is not self._disallowed_areas or self._disallowed_area_bounds is None or len(self._disallowed_area_bounds) != len(self._disallowed_areas):
+            # The disallowed areas changed. Put the bounding rectangles of all areas in a single array, so that the
+            # areas near a node can be found in one go.
+            self._disallowed_area_bounds = numpy.full((len(self._disallowed_areas), 4), numpy.nan)
+            for index, area in enumerate(self._disallowed_areas):
+                if area.isValid():  # Invalid areas can't collide with anything, so leave their bounds at NaN.
+                    points = area.getPoints()
+                    self._disallowed_area_bounds[index, 0:2] = points.min(axis = 0)
+                    self._disallowed_area_bounds[index, 2:4] = points.max(axis = 0)
+            self._disallowed_area_bounds_areas = self._disallowed_areas
+
+        points = printing_area.getPoints()
+        minimum = points.min(axis = 0)
+        maximum = points.max(axis = 0)
+        bounds = self._disallowed_area_bounds
+        near = (bounds[:, 0] <= maximum[0]) & (bounds[:, 2] >= minimum[0]) & (bounds[:, 1] <= maximum[1]) & (bounds[:, 3] >= minimum[1])
+        return [self._disallowed_areas[index] for index in numpy.flatnonzero(near)]
+
     def _buildGridMesh(self, min_w: float, max_w: float, min_h: float, max_h: float, min_d: float, max_d:float, z_fight_distance: float) -> MeshData:
         mb = MeshBuilder()
         if self._shape != "elliptic":
@@ -606,6 +683,7 @@ class BuildVolume(SceneNode):
 
         self._application.getController().getScene()._maximum_bounds = scale_to_max_bounds  # type: ignore
 
+        self._boundary_check_all_nodes = True
         self.updateNodeBoundaryCheck()
 
     def getBoundingBox(self) -> Optional[AxisAlignedBox]:
@@ -856,6 +934,7 @@ class BuildVolume(SceneNode):
 
         self._has_errors = len(self._error_areas) > 0
 
+        self._boundary_check_all_nodes = True
         self._disallowed_areas = []
         for extruder_id in result_areas:
             self._disallowed_areas.extend(result_areas[extruder_id])
@@ -1,5 +1,6 @@
 # Copyright (c) 2023 UltiMaker
 # Cura is released under the terms of the LGPLv3 or higher.
+import concurrent.futures
 import enum
 import os
 import re
@@ -143,6 +144,9 @@ class CuraApplication(QtApplication):
     # changes of the settings.
     SettingVersion = 27
 
+    # The maximum number of threads to compute the convex hulls of loaded objects with.
+    MaxConvexHullThreads = 4
+
     Created = False
 
     class ResourceTypes(enum.IntEnum):
@@ -237,6 +241,7 @@ class CuraApplication(QtApplication):
 
         self._physics = None
         self._volume = None
+        self._convex_hull_executor = None  # type: Optional[concurrent.futures.ThreadPoolExecutor]
         self._output_devices = {}
         self._print_information = None
         self._previous_active_tool = None
@@ -2073,6 +2078,7 @@ class CuraApplication(QtApplication):
         select_models_on_load = self.getPreferences().getValue("cura/select_models_on_load")
 
         nodes_to_arrange = []  # type: List[CuraSceneNode]
+        loaded_nodes = []  # type: List[CuraSceneNode]
         
         fixed_nodes = []
         for node_ in DepthFirstIterator(self.getController().getScene().getRoot()):
@@ -2117,6 +2123,7 @@ class CuraApplication(QtApplication):
             for child in node.getAllChildren():
                 if not child.getDecorator(ConvexHullDecorator):
                     child.addDecorator(ConvexHullDecorator())
+            loaded_nodes.append(node)
 
             if file_extension != "3mf":
                 if node.callDecoration("isSliceable"):
@@ -2150,6 +2157,13 @@ class CuraApplication(QtApplication):
 
             if select_models_on_load:
                 Selection.add(node)
+
+        # Compute the convex hulls of all loaded objects in one go, rather than one at a time whenever they're needed.
+        # The arranger needs them right away, so this waits for a few worker threads that are kept for the next load.
+        if self._convex_hull_executor is None:
+            self._convex_hull_executor = concurrent.futures.ThreadPoolExecutor(max_workers = min(self.MaxConvexHullThreads, os.cpu_count() or 1))
+        ConvexHullDecorator.computeConvexHulls(loaded_nodes, self._convex_hull_executor)
+
         try:
             arranger = Nest2DArrange(nodes_to_arrange, self.getBuildVolume(), fixed_nodes)
             arranger.arrange()
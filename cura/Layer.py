@@ -1,7 +1,7 @@
 # Copyright (c) 2019 Ultimaker B.V.
 # Cura is released under the terms of the LGPLv3 or higher.
 
-from typing import List
+from typing import List, Optional
 import numpy
 
 from UM.Mesh.MeshBuilder import MeshBuilder
@@ -10,12 +10,16 @@ from cura.LayerPolygon import LayerPolygon
 
 
 class Layer:
+    # The properties of the lines that getLineTypeLimits gives the minimum and maximum of, in this order.
+    LINE_TYPE_LIMIT_PROPERTIES = ("feedrate", "line_width", "thickness", "flow_rate")
+
     def __init__(self, layer_id: int) -> None:
         self._id = layer_id
         self._height = 0.0
         self._thickness = 0.0
         self._polygons = []  # type: List[LayerPolygon]
-        self._element_count = 0
+        self._line_type_limits = None  # type: Optional[numpy.ndarray]
+        self._line_type_limits_polygon_count = 0  # The number of polygons that the limits were calculated for.
 
     @property
     def height(self):
@@ -29,10 +33,6 @@ class Layer:
     def polygons(self) -> List[LayerPolygon]:
         return self._polygons
 
-    @property
-    def elementCount(self):
-        return self._element_count
-
     def setHeight(self, height: float) -> None:
         self._height = height
 
@@ -53,17 +53,48 @@ class Layer:
 
         return result
 
-    def build(self, vertex_offset, index_offset, vertices, colors, line_dimensions, feedrates, extruders, line_types, indices):
-        result_vertex_offset = vertex_offset
-        result_index_offset = index_offset
-        self._element_count = 0
-        for polygon in self._polygons:
-            polygon.build(result_vertex_offset, result_index_offset, vertices, colors, line_dimensions, feedrates, extruders, line_types, indices)
-            result_vertex_offset += polygon.lineMeshVertexCount()
-            result_index_offset += polygon.lineMeshElementCount()
-            self._element_count += polygon.elementCount
-
-        return result_vertex_offset, result_index_offset
+    def getLineTypeLimits(self) -> numpy.ndarray:
+        """Get the minimum and maximum of the properties of the lines of each line type in this layer.
+
+        This is calculated once, and again only if polygons were added since. The layer view combines these to get the
+        limits of its colour schemes for the line types that are visible, without going over all lines again.
+
+        :return: An array with a row for each line type, with for each of the LINE_TYPE_LIMIT_PROPERTIES a column with
+            the minimum and a column with the maximum. The minimum thickness leaves out lines with zero thickness. Line
+            types that don't occur in this layer have a minimum of infinity and a maximum of minus infinity.
+        """
+
+        if self._line_type_limits is None or self._line_type_limits_polygon_count != len(self._polygons):
+            self._line_type_limits_polygon_count = len(self._polygons)
+            self._line_type_limits = self._calculateLineTypeLimits()
+        return self._line_type_limits
+
+    def _calculateLineTypeLimits(self) -> numpy.ndarray:
+        limits = numpy.empty((LayerPolygon.getNumberOfTypes(), 2 * len(self.LINE_TYPE_LIMIT_PROPERTIES)), dtype = numpy.float64)
+        limits[:, 0::2] = numpy.inf
+        limits[:, 1::2] = -numpy.inf
+        if not self._polygons:
+            return limits
+
+        polygon_types = [polygon.types.reshape(-1) for polygon in self._polygons]
+        types = numpy.concatenate(polygon_types).astype(numpy.intp)
+
+        def lineValues(polygon_values: List[numpy.ndarray]) -> numpy.ndarray:
+            return numpy.concatenate([values.reshape(-1)[:len(line_types)] for values, line_types in zip(polygon_values, polygon_types)])
+
+        feedrates = lineValues([polygon.lineFeedrates for polygon in self._polygons])
+        line_widths = lineValues([polygon.lineWidths for polygon in self._polygons])
+        thicknesses = lineValues([polygon.lineThicknesses for polygon in self._polygons])
+        flow_rates = feedrates * line_widths * thicknesses
+
+        for column, (minimum_values, maximum_values) in enumerate([
+                (feedrates, feedrates),
+                (line_widths, line_widths),
+                (numpy.where(thicknesses != 0, thicknesses, numpy.inf), thicknesses),
+                (flow_rates, flow_rates)]):
+            numpy.minimum.at(limits[:, 2 * column], types, minimum_values)
+            numpy.maximum.at(limits[:, 2 * column + 1], types, maximum_values)
+        return limits
 
     def createMesh(self) -> MeshData:
         return self.createMeshOrJumps(True)
@@ -1,7 +1,13 @@
 # Copyright (c) 2015 Ultimaker B.V.
 # Cura is released under the terms of the LGPLv3 or higher.
+from typing import List, Tuple
+
+import numpy
+
 from UM.Mesh.MeshData import MeshData
 
+from cura.LayerPolygon import LayerPolygon
+
 
 class LayerData(MeshData):
     """Class to holds the layer mesh and information about the layers.
@@ -15,6 +21,7 @@ class LayerData(MeshData):
                          file_name=file_name, center_position=center_position, attributes=attributes)
         self._layers = layers
         self._element_counts = element_counts
+        self._levels_of_detail = []  # type: List[Tuple[float, LayerData]]
 
     def getLayer(self, layer):
         if layer in self._layers:
@@ -26,3 +33,108 @@ class LayerData(MeshData):
 
     def getElementCounts(self):
         return self._element_counts
+
+    def getLevelsOfDetail(self) -> List[Tuple[float, "LayerData"]]:
+        """Get the simplified versions of this layer data to show it from far away, if they were built.
+
+        :return: The tolerance of each level of detail with its layer data, from the finest to the coarsest.
+        """
+
+        return self._levels_of_detail
+
+    def setLevelsOfDetail(self, levels_of_detail: List[Tuple[float, "LayerData"]]) -> None:
+        self._levels_of_detail = levels_of_detail
+
+    def createLevelOfDetail(self, tolerance: float, max_passes: int = 8) -> "LayerData":
+        """Create a simplified version of this layer data, to show it where a line shorter than the tolerance is less
+        than a pixel.
+
+        Lines that continue each other with the same properties are merged if the vertex between them is within the
+        tolerance of the merged line, and travel moves shorter than the tolerance are left out. Vertices that are not
+        used any more are left out too, so the result has a smaller vertex buffer of its own.
+
+        :param tolerance: How far a vertex may be from the line that replaces it, in millimetres.
+        :param max_passes: How often to go over the lines. Each pass merges up to half of the lines that can be merged,
+            so the longest run of lines that can become one line is 2 to the power of this.
+        :return: Layer data with the same layers, and the elements of each layer after each other in the same order.
+        """
+
+        vertices = self.getVertices()
+        lines = self.getIndices().reshape((-1, 2))
+        layer_line_counts = numpy.fromiter(self._element_counts.values(), dtype = numpy.int64, count = len(self._element_counts)) // 2
+        line_layers = numpy.repeat(numpy.arange(len(layer_line_counts)), layer_line_counts)
+        line_types = self._attributes["line_types"]["value"]
+
+        # Lines can be merged if they share a vertex and the end vertices (which determine how they are shown) match.
+        continues = (lines[:-1, 1] == lines[1:, 0]) & (line_layers[:-1] == line_layers[1:])
+        for name in ("line_types", "extruders", "feedrates", "line_dimensions"):
+            values = self._attributes[name]["value"]
+            same_values = values[lines[:-1, 1]] == values[lines[1:, 1]]
+            continues &= same_values if same_values.ndim == 1 else same_values.all(axis = 1)
+
+        # Put the vertices of each chain of lines after each other: the start of the first line, then the end of each.
+        chain_starts = numpy.concatenate(([True], ~continues))
+        chain_ends = numpy.concatenate((~continues, [True]))
+        line_end_positions = numpy.arange(len(lines)) + numpy.cumsum(chain_starts)
+        points = numpy.empty(len(lines) + numpy.count_nonzero(chain_starts), dtype = lines.dtype)
+        points[line_end_positions] = lines[:, 1]
+        points[line_end_positions[chain_starts] - 1] = lines[chain_starts, 0]
+        point_chains = numpy.zeros(len(points), dtype = numpy.int64)
+        point_chains[line_end_positions[chain_starts] - 1] = 1
+        point_chains = numpy.cumsum(point_chains) - 1
+        point_layers = numpy.empty(len(points), dtype = numpy.int64)
+        point_layers[line_end_positions] = line_layers
+        point_layers[line_end_positions[chain_starts] - 1] = line_layers[chain_starts]
+        is_chain_end = numpy.zeros(len(points), dtype = bool)
+        is_chain_end[line_end_positions[chain_starts] - 1] = True
+        is_chain_end[line_end_positions[chain_ends]] = True
+
+        # Remove the vertices in between that are close enough to the line between their neighbours. Of a run of such
+        # vertices only every other one is removed in a pass, since the line changes when a neighbour is removed.
+        keep = numpy.ones(len(points), dtype = bool)
+        for _ in range(max_passes):
+            kept = numpy.flatnonzero(keep)
+            inner = numpy.flatnonzero(~is_chain_end[kept])
+            if len(inner) == 0:
+                break
+            start = vertices[points[kept[inner - 1]]]
+            middle = vertices[points[kept[inner]]]
+            end = vertices[points[kept[inner + 1]]]
+            direction = end - start
+            length_squared = numpy.einsum("ij,ij->i", direction, direction)
+            along = numpy.einsum("ij,ij->i", middle - start, direction) / numpy.where(length_squared > 0, length_squared, 1)
+            closest = start + numpy.clip(along, 0, 1)[:, numpy.newaxis] * direction
+            removable = numpy.zeros(len(kept), dtype = bool)
+            removable[inner] = numpy.einsum("ij,ij->i", middle - closest, middle - closest) <= tolerance * tolerance
+
+            run_starts = removable & ~numpy.concatenate(([False], removable[:-1]))
+            run_start_indices = numpy.maximum.accumulate(numpy.where(run_starts, numpy.arange(len(kept)), 0))
+            remove = removable & ((numpy.arange(len(kept)) - run_start_indices) % 2 == 0)
+            if not remove.any():
+                break
+            keep[kept[remove]] = False
+
+        kept = numpy.flatnonzero(keep)
+        in_chain = point_chains[kept[:-1]] == point_chains[kept[1:]]
+        new_lines = numpy.stack((points[kept[:-1]][in_chain], points[kept[1:]][in_chain]), axis = 1)
+        new_line_layers = point_layers[kept[:-1]][in_chain]
+
+        travel_types = [LayerPolygon.MoveUnretractedType, LayerPolygon.MoveRetractedType, LayerPolygon.MoveWhileRetractingType, LayerPolygon.MoveWhileUnretractingType]
+        line_vectors = vertices[new_lines[:, 1]] - vertices[new_lines[:, 0]]
+        is_short_travel = numpy.isin(line_types[new_lines[:, 1]], travel_types) & (numpy.einsum("ij,ij->i", line_vectors, line_vectors) < tolerance * tolerance)
+        new_lines = new_lines[~is_short_travel]
+        new_line_layers = new_line_layers[~is_short_travel]
+
+        used_vertices = numpy.zeros(len(vertices), dtype = bool)
+        used_vertices[new_lines.ravel()] = True
+        vertex_remap = (numpy.cumsum(used_vertices) - 1).astype(numpy.int32)
+
+        element_counts = dict(zip(self._element_counts.keys(), (2 * numpy.bincount(new_line_layers, minlength = len(layer_line_counts))).tolist()))
+        attributes = {name: dict(attribute, value = attribute["value"][used_vertices])
+                      for name, attribute in self._attributes.items() if name != "prev_line_types"}  # The layer view adds that one for the vertices it draws.
+        normals = self.getNormals()
+        colors = self.getColors()
+        return LayerData(vertices = vertices[used_vertices], normals = normals[used_vertices] if normals is not None else None,
+                         indices = vertex_remap[new_lines].reshape(-1), colors = colors[used_vertices] if colors is not None else None,
+                         file_name = self.getFileName(), center_position = self.getCenterPosition(), layers = self._layers,
+                         element_counts = element_counts, attributes = attributes)
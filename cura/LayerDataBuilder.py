@@ -7,7 +7,7 @@ from UM.Mesh.MeshBuilder import MeshBuilder
 from .LayerData import LayerData
 
 import numpy
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
 
 class LayerDataBuilder(MeshBuilder):
@@ -17,6 +17,16 @@ class LayerDataBuilder(MeshBuilder):
         super().__init__()
         self._layers = {}  # type: Dict[int, Layer]
         self._element_counts = {}  # type: Dict[int, int]
+        # The arrays of the layers that were converted already, with the number of polygons they were converted from.
+        self._layer_meshes = {}  # type: Dict[int, Tuple[int, Dict[str, numpy.ndarray]]]
+
+        # What buildIncrementally put together: the layers with their number of polygons, the arrays with room to grow
+        # and the number of vertices and lines in them, and the material colors and brightness.
+        self._incremental_layers = []  # type: List[Tuple[int, int]]
+        self._incremental_arrays = {}  # type: Dict[str, numpy.ndarray]
+        self._incremental_vertex_count = 0
+        self._incremental_line_count = 0
+        self._incremental_colors = None  # type: Optional[Tuple[numpy.ndarray, float]]
 
     def addLayer(self, layer: int) -> None:
         if layer not in self._layers:
@@ -43,50 +53,276 @@ class LayerDataBuilder(MeshBuilder):
 
         self._layers[layer].setThickness(thickness)
 
-    def build(self, material_color_map, line_type_brightness = 1.0):
+    def merge(self, other: "LayerDataBuilder") -> None:
+        """Take over the layers of another builder, including the layers it already converted.
+
+        This is used to combine layers that were converted in chunks, e.g. in separate threads.
+
+        :param other: The builder to take the layers from.
+        """
+
+        self._layers.update(other._layers)
+        self._layer_meshes.update(other._layer_meshes)
+
+    def buildLayerMesh(self, layer: int) -> None:
+        """Convert a single layer to its final vertex and attribute arrays right away.
+
+        This is used when layers are processed while they are still coming in from the engine. The :py:meth:`build`
+        call at the end then only needs to stitch the arrays of the layers together.
+
+        If polygons are added to the layer afterwards, the arrays are no longer used until the layer is converted again.
+        This may be called from another thread than the one that adds the polygons.
+
+        :param layer: The number of the layer to convert.
+        """
+
+        polygons = self._layers[layer].polygons.copy()
+        self._layer_meshes[layer] = (len(polygons), self._buildMeshArrays(polygons))
+
+    def _buildMeshArrays(self, polygons: List[LayerPolygon]) -> Dict[str, numpy.ndarray]:
+        """Convert a number of polygons to vertex and attribute arrays in one go.
+
+        Rather than building each polygon by itself, the data of all polygons is concatenated and the line mesh is
+        built for all of them at once, using offset tables to find where each polygon starts. This gives the same
+        result as :py:meth:`cura.LayerPolygon.LayerPolygon.build` for each of the polygons.
+
+        :param polygons: The polygons to convert, in the order in which they should end up in the arrays.
+        :return: The vertex and attribute arrays, with the indices starting at vertex 0.
+        """
+
+        if not polygons:
+            return {
+                "vertices": numpy.empty((0, 3), numpy.float32),
+                "colors": numpy.empty((0, 4), numpy.float32),
+                "line_dimensions": numpy.empty((0, 2), numpy.float32),
+                "feedrates": numpy.empty((0), numpy.float32),
+                "extruders": numpy.empty((0), numpy.float32),
+                "line_types": numpy.empty((0), numpy.float32),
+                "indices": numpy.empty((0, 2), numpy.int32)
+            }
+
+        line_counts = numpy.fromiter((polygon.types.size for polygon in polygons), dtype = numpy.int64, count = len(polygons))
+        point_counts = numpy.fromiter((polygon.data.shape[0] for polygon in polygons), dtype = numpy.int64, count = len(polygons))
+        types = numpy.concatenate([polygon.types.ravel() for polygon in polygons])
+        points = numpy.concatenate([polygon.data for polygon in polygons])
+        line_widths = numpy.concatenate([polygon.lineWidths.ravel() for polygon in polygons])
+        line_thicknesses = numpy.concatenate([polygon.lineThicknesses.ravel() for polygon in polygons])
+        line_feedrates = numpy.concatenate([polygon.lineFeedrates.ravel() for polygon in polygons])
+        line_extruders = numpy.repeat(numpy.fromiter((polygon.extruder for polygon in polygons), dtype = numpy.float32, count = len(polygons)), line_counts)
+
+        # Offset tables: the first line and the first point of each polygon in the concatenated arrays.
+        first_lines = numpy.cumsum(line_counts) - line_counts
+        first_points = numpy.cumsum(point_counts) - point_counts
+        polygon_per_line = numpy.repeat(numpy.arange(len(polygons)), line_counts)
+        line_start_points = numpy.arange(types.size) - first_lines[polygon_per_line] + first_points[polygon_per_line]
+
+        # Line n goes from point n to n + 1. The end point of each line is always needed. The start point is only
+        # needed at the start of a polygon or if the type of line changes, since the vertex gets a different color.
+        # Otherwise the end point of the previous line is re-used.
+        needed_points = numpy.ones((types.size, 2), dtype = bool)
+        needed_points[1:, 0] = types[1:] != types[:-1]
+        needed_points[first_lines[line_counts > 0], 0] = True
+        needed_points = needed_points.ravel()
+
+        point_indices = (line_start_points.reshape((-1, 1)) + numpy.array([[0, 1]])).ravel()[needed_points]
+        line_per_vertex = numpy.repeat(numpy.arange(types.size), 2)[needed_points]
+        vertex_types = types[line_per_vertex]
+
+        line_dimensions = numpy.empty((line_per_vertex.size, 2), numpy.float32)
+        line_dimensions[:, 0] = line_widths[line_per_vertex]
+        line_dimensions[:, 1] = line_thicknesses[line_per_vertex]
+
+        # Each line uses its end vertex and the vertex right before it, which is either its own start vertex or the
+        # end vertex of the previous line.
+        end_vertices = numpy.cumsum(needed_points, dtype = numpy.int32)[1::2] - 1
+        indices = numpy.empty((types.size, 2), numpy.int32)
+        indices[:, 0] = end_vertices - 1
+        indices[:, 1] = end_vertices
+
+        return {
+            "vertices": points[point_indices].astype(numpy.float32, copy = False),
+            "colors": LayerPolygon.getColorMap()[vertex_types].astype(numpy.float32),
+            "line_dimensions": line_dimensions,
+            "feedrates": line_feedrates[line_per_vertex].astype(numpy.float32, copy = False),
+            "extruders": line_extruders[line_per_vertex],
+            "line_types": vertex_types.astype(numpy.float32),
+            "indices": indices
+        }
+
+    def build(self, material_color_map, line_type_brightness = 1.0, layer_numbers: Optional[Dict[int, int]] = None):
         """Return the layer data as :py:class:`cura.LayerData.LayerData`.
 
         :param material_color_map: [r, g, b, a] for each extruder row.
         :param line_type_brightness: compatibility layer view uses line type brightness of 0.5
+        :param layer_numbers: Optional mapping from the layer numbers in this builder to the layer numbers of the
+            resulting layer data. Layers that are not in the mapping are left out. By default all layers are used
+            with their own number.
+        """
+
+        if layer_numbers is None:
+            layer_numbers = {layer: layer for layer in self._layers}
+        included_layers = sorted(layer for layer in self._layers if layer in layer_numbers)
+
+        mesh = self._combineMeshArrays(included_layers)
+        material_colors = self._applyColors(mesh["colors"], mesh["extruders"], mesh["line_types"], material_color_map, line_type_brightness)
+        layers = {layer_numbers[layer]: self._layers[layer] for layer in included_layers}
+        return self._createLayerData(layers, mesh["vertices"], mesh["colors"], material_colors, mesh["line_dimensions"], mesh["feedrates"],
+                                     mesh["extruders"], mesh["line_types"], mesh["indices"])
+
+    def buildIncrementally(self, material_color_map, line_type_brightness = 1.0, layer_numbers: Optional[Dict[int, int]] = None) -> LayerData:
+        """Return the layer data like :py:meth:`build`, re-using what the previous call of this method put together.
+
+        This is meant to show the layers while they are still coming in. The arrays of the layers of the previous call
+        are kept, and only the layers after them are added, so a call takes as long as the new layers need rather than
+        all layers so far. If one of the earlier layers changed, or a new layer comes before the last one, everything is
+        put together again.
+
+        The arrays leave room for more layers, so they take more memory than needed. Use :py:meth:`build` for the
+        final layer data.
+
+        :param material_color_map: [r, g, b, a] for each extruder row.
+        :param line_type_brightness: compatibility layer view uses line type brightness of 0.5
+        :param layer_numbers: Optional mapping from the layer numbers in this builder to the layer numbers of the
+            resulting layer data. Layers that are not in the mapping are left out.
+        """
+
+        if layer_numbers is None:
+            layer_numbers = {layer: layer for layer in self._layers}
+        included_layers = sorted(layer for layer in self._layers if layer in layer_numbers)
+
+        previous_layers = self._incremental_layers
+        if self._incremental_colors is None or self._incremental_colors[1] != line_type_brightness \
+                or not numpy.array_equal(self._incremental_colors[0], material_color_map) \
+                or [(layer, len(self._layers[layer].polygons)) for layer in included_layers[:len(previous_layers)]] != previous_layers:
+            self._incremental_layers = []
+            self._incremental_arrays = {}
+            self._incremental_colors = (numpy.array(material_color_map), line_type_brightness)
+
+        new_layers = included_layers[len(self._incremental_layers):]
+        vertex_count = self._incremental_vertex_count if self._incremental_layers else 0
+        line_count = self._incremental_line_count if self._incremental_layers else 0
+        if new_layers or not self._incremental_arrays:
+            mesh = self._combineMeshArrays(new_layers)
+            mesh["material_colors"] = self._applyColors(mesh["colors"], mesh["extruders"], mesh["line_types"], material_color_map, line_type_brightness)
+            mesh["indices"] = mesh["indices"] + vertex_count  # Not in place, it may be the array of a converted layer.
+            for name, values in mesh.items():
+                self._appendIncrementalArray(name, values, line_count if name == "indices" else vertex_count)
+            vertex_count += len(mesh["vertices"])
+            line_count += len(mesh["indices"])
+            self._incremental_layers.extend((layer, len(self._layers[layer].polygons)) for layer in new_layers)
+            self._incremental_vertex_count = vertex_count
+            self._incremental_line_count = line_count
+
+        # The layer data gets read-only views on the arrays. Layers that are added later go after the part it can see.
+        arrays = {}
+        for name, buffer in self._incremental_arrays.items():
+            arrays[name] = buffer[:line_count if name == "indices" else vertex_count]
+            arrays[name].flags.writeable = False
+        layers = {layer_numbers[layer]: self._layers[layer] for layer in included_layers}
+        return self._createLayerData(layers, arrays["vertices"], arrays["colors"], arrays["material_colors"], arrays["line_dimensions"],
+                                     arrays["feedrates"], arrays["extruders"], arrays["line_types"], arrays["indices"])
+
+    def _appendIncrementalArray(self, name: str, values: numpy.ndarray, count: int) -> None:
+        """Add values after the first count rows of one of the arrays of :py:meth:`buildIncrementally`.
+
+        The array grows by doubling its size, so that adding the layers one at a time doesn't copy them over and over.
+        """
+
+        buffer = self._incremental_arrays.get(name)
+        if buffer is None or len(buffer) < count + len(values):
+            new_buffer = numpy.empty((max(2 * (count + len(values)), 1024), ) + values.shape[1:], dtype = values.dtype)
+            if buffer is not None:
+                new_buffer[:count] = buffer[:count]
+            buffer = new_buffer
+            self._incremental_arrays[name] = buffer
+        buffer[count:count + len(values)] = values
+
+    def _combineMeshArrays(self, layers: List[int]) -> Dict[str, numpy.ndarray]:
+        """Get the vertex and attribute arrays of a number of layers, stitched together.
+
+        Layers that were already converted while they came in are re-used, unless they got more polygons since. All the
+        others are converted together.
+
+        :param layers: The numbers of the layers, in the order in which they should end up in the arrays.
+        :return: The vertex and attribute arrays, with the indices starting at vertex 0. The colors can be changed
+            without changing the converted layers.
+        """
+
+        meshes = []
+        polygons_to_build = []  # type: List[LayerPolygon]
+        for layer in layers:
+            polygons = self._layers[layer].polygons
+            polygon_count, mesh = self._layer_meshes.get(layer, (-1, None))
+            if polygon_count != len(polygons):
+                polygons_to_build.extend(polygons)
+                continue
+            if polygons_to_build:
+                meshes.append(self._buildMeshArrays(polygons_to_build))
+                polygons_to_build = []
+            meshes.append(mesh)
+        if polygons_to_build or not meshes:
+            meshes.append(self._buildMeshArrays(polygons_to_build))
+
+        if len(meshes) == 1:
+            result = dict(meshes[0])
+            result["colors"] = result["colors"].copy()
+            return result
+        vertex_offsets = numpy.cumsum([0] + [mesh["vertices"].shape[0] for mesh in meshes[:-1]])
+        result = {name: numpy.concatenate([mesh[name] for mesh in meshes]) for name in meshes[0] if name != "indices"}
+        result["indices"] = numpy.concatenate([mesh["indices"] + vertex_offset for mesh, vertex_offset in zip(meshes, vertex_offsets)])
+        return result
+
+    def buildFromMesh(self, mesh: Dict[str, numpy.ndarray], material_color_map, line_type_brightness = 1.0) -> LayerData:
+        """Return the layer data for vertex and attribute arrays that were built before, e.g. by an earlier
+        :py:meth:`build` of which the result was stored.
+
+        The arrays are used as they are, so they may be memory-mapped from a file.
+
+        :param mesh: The vertices, line_dimensions, feedrates, extruders, line_types and indices of all layers in this
+            builder, in the order of the layer numbers. The colors are derived from the line types.
+        :param material_color_map: [r, g, b, a] for each extruder row.
+        :param line_type_brightness: compatibility layer view uses line type brightness of 0.5
+        """
+
+        line_types = mesh["line_types"]
+        colors = LayerPolygon.getColorMap()[line_types.astype(numpy.int32)].astype(numpy.float32)
+        material_colors = self._applyColors(colors, mesh["extruders"], line_types, material_color_map, line_type_brightness)
+        layers = {layer: self._layers[layer] for layer in sorted(self._layers)}
+        return self._createLayerData(layers, mesh["vertices"], colors, material_colors, mesh["line_dimensions"], mesh["feedrates"],
+                                     mesh["extruders"], line_types, mesh["indices"])
+
+    @staticmethod
+    def _applyColors(colors: numpy.ndarray, extruders: numpy.ndarray, line_types: numpy.ndarray, material_color_map,
+                     line_type_brightness: float) -> numpy.ndarray:
+        """Apply the brightness to the colors of the line types, and get the material colors of the vertices.
+
+        :param colors: The colors of the line types. The brightness is applied to this array in place.
+        :return: The color of the material of each vertex, or the color of the line type for travel moves.
         """
 
-        vertex_count = 0
-        index_count = 0
-        for layer, data in self._layers.items():
-            vertex_count += data.lineMeshVertexCount()
-            index_count += data.lineMeshElementCount()
-
-        vertices = numpy.empty((vertex_count, 3), numpy.float32)
-        line_dimensions = numpy.empty((vertex_count, 2), numpy.float32)
-        colors = numpy.empty((vertex_count, 4), numpy.float32)
-        indices = numpy.empty((index_count, 2), numpy.int32)
-        feedrates = numpy.empty((vertex_count), numpy.float32)
-        extruders = numpy.empty((vertex_count), numpy.float32)
-        line_types = numpy.empty((vertex_count), numpy.float32)
-
-        vertex_offset = 0
-        index_offset = 0
-        for layer, data in sorted(self._layers.items()):
-            vertex_offset, index_offset = data.build(vertex_offset, index_offset, vertices, colors, line_dimensions, feedrates, extruders, line_types, indices)
-            self._element_counts[layer] = data.elementCount
-
-        self.addVertices(vertices)
         colors[:, 0:3] *= line_type_brightness
-        self.addColors(colors)
-        self.addIndices(indices.flatten())
 
         # Note: we're using numpy indexing here.
         # See also: https://docs.scipy.org/doc/numpy/reference/arrays.indexing.html
-        material_colors = numpy.zeros((line_dimensions.shape[0], 4), dtype=numpy.float32)
-        for extruder_nr in range(material_color_map.shape[0]):
-            material_colors[extruders == extruder_nr] = material_color_map[extruder_nr]
-        # Set material_colors with indices where line_types (also numpy array) == MoveUnretractedType
-        material_colors[line_types == LayerPolygon.MoveUnretractedType] = colors[line_types == LayerPolygon.MoveUnretractedType]
-        material_colors[line_types == LayerPolygon.MoveRetractedType] = colors[line_types == LayerPolygon.MoveRetractedType]
-        material_colors[line_types == LayerPolygon.MoveWhileRetractingType] = colors[
-            line_types == LayerPolygon.MoveWhileRetractingType]
-        material_colors[line_types == LayerPolygon.MoveWhileUnretractingType] = colors[
-            line_types == LayerPolygon.MoveWhileUnretractingType]
+        material_colors = numpy.zeros((colors.shape[0], 4), dtype=numpy.float32)
+        extruder_indices = extruders.astype(numpy.int32)
+        known_extruders = (extruder_indices >= 0) & (extruder_indices < material_color_map.shape[0])
+        material_colors[known_extruders] = material_color_map[extruder_indices[known_extruders]]
+        # Travel moves keep the color of their line type.
+        travels = numpy.isin(line_types, [LayerPolygon.MoveUnretractedType, LayerPolygon.MoveRetractedType, LayerPolygon.MoveWhileRetractingType, LayerPolygon.MoveWhileUnretractingType])
+        material_colors[travels] = colors[travels]
+        return material_colors
+
+    def _createLayerData(self, layers: Dict[int, Layer], vertices: numpy.ndarray, colors: numpy.ndarray, material_colors: numpy.ndarray,
+                         line_dimensions: numpy.ndarray, feedrates: numpy.ndarray, extruders: numpy.ndarray, line_types: numpy.ndarray,
+                         indices: numpy.ndarray) -> LayerData:
+        """Put the arrays of the line mesh together into layer data.
+
+        :param layers: The layers that the arrays contain, by the layer number they are shown under.
+        """
+
+        # Each line is drawn with two vertices, so each layer has twice as many elements as it has lines.
+        self._element_counts = {layer_number: 2 * layer.lineMeshElementCount() for layer_number, layer in layers.items()}
 
         attributes = {
             "line_dimensions": {
@@ -116,7 +352,9 @@ class LayerDataBuilder(MeshBuilder):
                 }
             }
 
-        return LayerData(vertices=self.getVertices(), normals=self.getNormals(), indices=self.getIndices(),
-                        colors=self.getColors(), uvs=self.getUVCoordinates(), file_name=self.getFileName(),
-                        center_position=self.getCenterPosition(), layers=self._layers,
+        # The arrays are handed over directly rather than added to this builder, so that intermediate results can be
+        # built while more layers are still being added.
+        return LayerData(vertices=vertices, normals=self.getNormals(), indices=indices.reshape(-1),
+                        colors=colors, uvs=self.getUVCoordinates(), file_name=self.getFileName(),
+                        center_position=self.getCenterPosition(), layers=layers,
                         element_counts=self._element_counts, attributes=attributes)
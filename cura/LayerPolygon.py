@@ -3,7 +3,7 @@
 import math
 import numpy
 
-from typing import Optional, cast
+from typing import cast
 
 from UM.Qt.Bindings.Theme import Theme
 from UM.Qt.QtApplication import QtApplication
@@ -36,6 +36,17 @@ class LayerPolygon:
                                                    numpy.arange(__number_of_types) == MoveWhileRetractingType)),
                                                    numpy.arange(__number_of_types) == MoveWhileUnretractingType)
 
+    # When type is used as index returns true if type == LayerPolygon.InfillType
+    # or type == LayerPolygon.SkinType
+    # or type == LayerPolygon.SupportInfillType
+    # Should be generated in better way, not hardcoded.
+    __is_infill_or_skin_type_map = numpy.array([0, 0, 0, 1, 0, 0, 1, 1, 0, 0, 1, 0], dtype=bool)
+
+    # A print can have millions of polygons, so they only keep the arrays they were created with. Everything else that
+    # is needed per line is derived from the line types when it is asked for.
+    __slots__ = ("_extruder", "_types", "_data", "_line_widths", "_line_thicknesses", "_line_feedrates",
+                 "_vertex_begin", "_vertex_end", "_index_begin", "_index_end", "_jump_count", "_mesh_line_count")
+
     def __init__(self, extruder: int, line_types: numpy.ndarray, data: numpy.ndarray,
                  line_widths: numpy.ndarray, line_thicknesses: numpy.ndarray, line_feedrates: numpy.ndarray) -> None:
         """LayerPolygon, used in ProcessSlicedLayersJob
@@ -66,119 +77,44 @@ class LayerPolygon:
         self._index_begin = 0
         self._index_end = 0
 
-        self._jump_mask = self.__jump_map[self._types]
-        self._jump_count = numpy.sum(self._jump_mask)
+        self._jump_count = int(numpy.sum(self.__jump_map[self._types]))
         self._mesh_line_count = len(self._types) - self._jump_count
-        self._vertex_count = self._mesh_line_count + numpy.sum(self._types[1:] == self._types[:-1])
-
-        # Buffering the colors shouldn't be necessary as it is not
-        # re-used and can save a lot of memory usage.
-        self._color_map = LayerPolygon.getColorMap()
-        self._colors: numpy.ndarray = self._color_map[self._types]
-
-        # When type is used as index returns true if type == LayerPolygon.InfillType
-        # or type == LayerPolygon.SkinType
-        # or type == LayerPolygon.SupportInfillType
-        # Should be generated in better way, not hardcoded.
-        self._is_infill_or_skin_type_map = numpy.array([0, 0, 0, 1, 0, 0, 1, 1, 0, 0, 1, 0], dtype=bool)
-
-        self._build_cache_line_mesh_mask: Optional[numpy.ndarray] = None
-        self._build_cache_needed_points: Optional[numpy.ndarray] = None
 
     def buildCache(self) -> None:
-        # For the line mesh we do not draw Infill or Jumps. Therefore those lines are filtered out.
-        self._build_cache_line_mesh_mask = numpy.ones(self._jump_mask.shape, dtype = bool)
-        self._index_begin = 0
-        self._index_end = cast(int, numpy.sum(self._build_cache_line_mesh_mask))
+        """Compute how many vertices and indices this polygon needs in the line mesh.
 
-        self._build_cache_needed_points = numpy.ones((len(self._types), 2), dtype = bool)
-        # Only if the type of line segment changes do we need to add an extra vertex to change colors
-        self._build_cache_needed_points[1:, 0][:, numpy.newaxis] = self._types[1:] != self._types[:-1]
-        # Mark points as unneeded if they are of types we don't want in the line mesh according to the calculated mask
-        numpy.logical_and(self._build_cache_needed_points, self._build_cache_line_mesh_mask, self._build_cache_needed_points)
-
-        self._vertex_begin = 0
-        self._vertex_end = cast(int, numpy.sum(self._build_cache_needed_points))
-
-    def build(self, vertex_offset: int, index_offset: int, vertices: numpy.ndarray,
-              colors: numpy.ndarray, line_dimensions: numpy.ndarray, feedrates: numpy.ndarray,
-              extruders: numpy.ndarray, line_types: numpy.ndarray, indices: numpy.ndarray) -> None:
-        """Set all the arrays provided by the function caller, representing the LayerPolygon
-
-        The arrays are either by vertex or by indices.
-
-        :param vertex_offset: determines where to start and end filling the arrays
-        :param index_offset: determines where to start and end filling the arrays
-        :param vertices: vertex numpy array to be filled
-        :param colors: vertex numpy array to be filled
-        :param line_dimensions: vertex numpy array to be filled
-        :param feedrates: vertex numpy array to be filled
-        :param extruders: vertex numpy array to be filled
-        :param line_types: vertex numpy array to be filled
-        :param indices: index numpy array to be filled
+        The masks to build the line mesh with are not kept, since the polygon lives much longer than the mesh building.
         """
 
-        if self._build_cache_line_mesh_mask is None or self._build_cache_needed_points is None:
-            self.buildCache()
-
-        if self._build_cache_line_mesh_mask is None or self._build_cache_needed_points is None:
-            Logger.log("w", "Failed to build cache for layer polygon")
-            return
-
-        line_mesh_mask = self._build_cache_line_mesh_mask
-        needed_points_list = self._build_cache_needed_points
-
-        # Index to the points we need to represent the line mesh.
-        # This is constructed by generating simple start and end points for each line.
-        # For line segment n, these are points n and n+1. Row n reads [n n+1]
-        # Then the indices for the points we don't need are thrown away based on the pre-calculated list.
-        index_list = (numpy.arange(len(self._types)).reshape((-1, 1)) + numpy.array([[0, 1]])).reshape((-1, 1))[needed_points_list.reshape((-1, 1))]
-
-        # The relative values of begin and end indices have already been set in buildCache, so we only need to offset them to the parents offset.
-        self._vertex_begin += vertex_offset
-        self._vertex_end += vertex_offset
-
-        # Points are picked based on the index list to get the vertices needed.
-        vertices[self._vertex_begin:self._vertex_end, :] = self._data[index_list, :]
-
-        # Create an array with colors for each vertex and remove the color data for the points that has been thrown away.
-        colors[self._vertex_begin:self._vertex_end, :] = numpy.tile(self._colors, (1, 2)).reshape((-1, 4))[needed_points_list.ravel()]
-
-        # Create an array with line widths and thicknesses for each vertex.
-        line_dimensions[self._vertex_begin:self._vertex_end, 0] = numpy.tile(self._line_widths, (1, 2)).reshape((-1, 1))[needed_points_list.ravel()][:, 0]
-        line_dimensions[self._vertex_begin:self._vertex_end, 1] = numpy.tile(self._line_thicknesses, (1, 2)).reshape((-1, 1))[needed_points_list.ravel()][:, 0]
-
-        # Create an array with feedrates for each line
-        feedrates[self._vertex_begin:self._vertex_end] = numpy.tile(self._line_feedrates, (1, 2)).reshape((-1, 1))[needed_points_list.ravel()][:, 0]
+        self._index_begin = 0
+        self._index_end = len(self._types)
 
-        extruders[self._vertex_begin:self._vertex_end] = self._extruder
+        self._vertex_begin = 0
+        self._vertex_end = cast(int, numpy.sum(self._getNeededPoints()))
 
-        # Convert type per vertex to type per line
-        line_types[self._vertex_begin:self._vertex_end] = numpy.tile(self._types, (1, 2)).reshape((-1, 1))[needed_points_list.ravel()][:, 0]
+    def _getNeededPoints(self) -> numpy.ndarray:
+        """Get for each line segment whether its start and end point need a vertex of their own in the line mesh.
 
-        # The relative values of begin and end indices have already been set in buildCache,
-        # so we only need to offset them to the parents offset.
-        self._index_begin += index_offset
-        self._index_end += index_offset
+        :return: An array with a row [start end] for each line segment.
+        """
 
-        indices[self._index_begin:self._index_end, :] = numpy.arange(self._index_end-self._index_begin, dtype=numpy.int32).reshape((-1, 1))
-        # When the line type changes the index needs to be increased by 2.
-        indices[self._index_begin:self._index_end, :] += numpy.cumsum(needed_points_list[line_mesh_mask.ravel(), 0], dtype = numpy.int32).reshape((-1, 1))
-        # Each line segment goes from it's starting point p to p+1, offset by the vertex index.
-        # The -1 is to compensate for the necessarily True value of needed_points_list[0,0] which causes an unwanted +1 in cumsum above.
-        indices[self._index_begin:self._index_end, :] += numpy.array([self._vertex_begin - 1, self._vertex_begin])
+        # For the line mesh we do not draw Infill or Jumps. Therefore those lines would be filtered out here. Currently
+        # all lines are drawn though.
+        needed_points = numpy.ones((len(self._types), 2), dtype = bool)
+        # Only if the type of line segment changes do we need to add an extra vertex to change colors
+        needed_points[1:, 0][:, numpy.newaxis] = self._types[1:] != self._types[:-1]
+        return needed_points
 
-        self._build_cache_line_mesh_mask = None
-        self._build_cache_needed_points = None
+    def getColors(self) -> numpy.ndarray:
+        """Get the color of each line segment, by its line type. This is computed every time it's asked for."""
 
-    def getColors(self):
-        return self._colors
+        return self.mapLineTypeToColor(self._types)
 
     def mapLineTypeToColor(self, line_types: numpy.ndarray) -> numpy.ndarray:
-        return self._color_map[line_types]
+        return LayerPolygon.getColorMap()[line_types]
 
     def isInfillOrSkinType(self, line_types: numpy.ndarray) -> numpy.ndarray:
-        return self._is_infill_or_skin_type_map[line_types]
+        return self.__is_infill_or_skin_type_map[line_types]
 
     def lineMeshVertexCount(self) -> int:
         return self._vertex_end - self._vertex_begin
@@ -221,7 +157,7 @@ class LayerPolygon:
 
     @property
     def jumpMask(self):
-        return self._jump_mask
+        return self.__jump_map[self._types]
 
     @property
     def meshLineCount(self):
@@ -261,6 +197,10 @@ class LayerPolygon:
 
     __color_map = None  # type: numpy.ndarray
 
+    @classmethod
+    def getNumberOfTypes(cls) -> int:
+        return cls.__number_of_types
+
     @classmethod
     def getColorMap(cls) -> numpy.ndarray:
         """Gets the instance of the VersionUpgradeManager, or creates one."""
@@ -1,15 +1,17 @@
 # Copyright (c) 2020 Ultimaker B.V.
 # Cura is released under the terms of the LGPLv3 or higher.
 
+import threading
 import time
 
 from collections import deque
 
 from PyQt6.QtCore import QObject, QTimer, pyqtSignal, pyqtProperty
-from typing import Optional, Any, Set, List
+from typing import Optional, Any, Dict, Set, List
 
 from UM.Logger import Logger
 from UM.Settings.SettingDefinition import SettingDefinition
+from UM.Settings.SettingRelation import RelationType
 from UM.Settings.Validator import ValidatorState
 
 import cura.CuraApplication
@@ -23,6 +25,9 @@ class MachineErrorChecker(QObject):
     stack. According to my profiling results, the maximal runtime for such a sub-task is <0.03 secs, which should be
     good enough. Moreover, if any changes happened to the machine, we can cancel the check in progress without wait
     for it to finish the complete work.
+
+    When a setting changes, only that setting and the settings that depend on it are checked again. As many keys are
+    checked per update as fit in a small time budget, so the check doesn't take an event loop round trip per key.
     """
 
     def __init__(self, parent: Optional[QObject] = None) -> None:
@@ -48,8 +53,16 @@ class MachineErrorChecker(QObject):
         self._setCheckTimer()
 
         self._keys_to_check = set()  # type: Set[str]
+        self._changed_keys = set()  # type: Set[str]  # Keys that changed since the last check was scheduled, with the keys that depend on them.
+        self._check_all_keys = True  # Whether all keys need to be checked, rather than only the _keys_to_check.
+        self._dependent_keys_cache = {}  # type: Dict[str, Set[str]]  # For each setting key, the keys that depend on it.
+
+        self._max_time_per_update = 0.01  # How long a single update may keep checking keys, in seconds.
 
-        self._num_keys_to_check_per_update = 1
+        # Set whenever there is no need to wait for a result, so other threads can wait for the check to finish. It is
+        # cleared as soon as a check is scheduled, and only set again once a check finished with nothing pending.
+        self._result_ready_event = threading.Event()
+        self._result_ready_event.set()
 
     def initialize(self) -> None:
         self._error_check_timer.timeout.connect(self._rescheduleCheck)
@@ -85,6 +98,7 @@ class MachineErrorChecker(QObject):
                 extruder.containersChanged.disconnect(self.startErrorCheck)
 
         self._global_stack = self._machine_manager.activeMachine
+        self._dependent_keys_cache = {}
 
         if self._global_stack:
             self._global_stack.propertiesChanged.connect(self.startErrorCheckPropertyChanged)
@@ -106,6 +120,17 @@ class MachineErrorChecker(QObject):
     def needToWaitForResult(self) -> bool:
         return self._need_to_check or self._check_in_progress
 
+    def waitForResult(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until there is no need to wait for the result of the error check any more.
+
+        This is meant for other threads. Calling it from the main thread would block the check itself.
+
+        :param timeout: The maximum time to wait, in seconds, or None to wait until the check is done.
+        :return: Whether the check is done, False if the timeout expired before that.
+        """
+
+        return self._result_ready_event.wait(timeout)
+
     def startErrorCheckPropertyChanged(self, key: str, property_names: List[str]) -> None:
         """Start the error check for property changed
         this is separate from the startErrorCheck because it ignores a number property types
@@ -116,15 +141,23 @@ class MachineErrorChecker(QObject):
 
         if "validationState" not in property_names and "enabled" not in property_names:
             return
-        self._keys_to_check.add(key)
-        self.startErrorCheck()
+        self._changed_keys.add(key)
+        self._changed_keys.update(self._getDependentKeys(key))
+        self._scheduleCheck()
 
     def startErrorCheck(self, *args: Any) -> None:
-        """Starts the error check timer to schedule a new error check.
+        """Starts the error check timer to schedule a new error check of all settings.
 
         :param args:
         """
 
+        self._check_all_keys = True
+        self._scheduleCheck()
+
+    def _scheduleCheck(self) -> None:
+        """Starts the error check timer to schedule a new error check."""
+
+        self._result_ready_event.clear()
         if not self._check_in_progress:
             self._need_to_check = True
             self.needToWaitForResultChanged.emit()
@@ -149,17 +182,24 @@ class MachineErrorChecker(QObject):
         global_stack = self._machine_manager.activeMachine
         if global_stack is None:
             Logger.log("i", "No active machine, nothing to check.")
+            if not self._error_check_timer.isActive():
+                self._result_ready_event.set()
             return
 
-        # Populate the (stack, key) tuples to check
+        # Populate the (stack, key) tuples to check. Keys that change from now on are left for the next check.
+        self._keys_to_check |= self._changed_keys
+        self._changed_keys = set()
         self._stacks_and_keys_to_check = deque()
         for stack in global_stack.extruderList:
-            if not self._keys_to_check:
-                self._keys_to_check = stack.getAllKeys()
+            if self._check_all_keys:
+                self._keys_to_check = set(stack.getAllKeys())
+                self._check_all_keys = False
 
             for key in self._keys_to_check:
                 self._stacks_and_keys_to_check.append((stack, key))
+        self._check_all_keys = False  # Also without extruders, where there are no keys to check at all.
 
+        self._result_ready_event.clear()
         self._application.callLater(self._checkStack)
         self._check_start_time = time.time()
         Logger.log("d", "New error check scheduled.")
@@ -168,12 +208,14 @@ class MachineErrorChecker(QObject):
         if self._need_to_check:
             Logger.log("d", "Need to check for errors again. Discard the current progress and reschedule a check.")
             self._check_in_progress = False
-            self._application.callLater(self.startErrorCheck)
+            self._application.callLater(self._scheduleCheck)
             return
 
         self._check_in_progress = True
+        self._result_ready_event.clear()
 
-        for i in range(self._num_keys_to_check_per_update):
+        update_end_time = time.perf_counter() + self._max_time_per_update
+        while True:
             # If there is nothing to check any more, it means there is no error.
             if not self._stacks_and_keys_to_check:
                 # Finish
@@ -185,6 +227,8 @@ class MachineErrorChecker(QObject):
 
             enabled = stack.getProperty(key, "enabled")
             if not enabled:
+                if time.perf_counter() >= update_end_time:
+                    break
                 continue
 
             validation_state = stack.getProperty(key, "validationState")
@@ -205,7 +249,10 @@ class MachineErrorChecker(QObject):
                 self._setResult(True, keys_to_recheck = keys_to_recheck)
                 return
 
-        # Schedule the check for the next key
+            if time.perf_counter() >= update_end_time:
+                break
+
+        # Schedule the check for the next keys
         self._application.callLater(self._checkStack)
 
     def _setResult(self, result: bool, keys_to_recheck = None) -> None:
@@ -213,9 +260,40 @@ class MachineErrorChecker(QObject):
             self._has_errors = result
             self.hasErrorUpdated.emit()
         self._keys_to_check = keys_to_recheck if keys_to_recheck else set()
-        self._need_to_check = False
+        # If settings changed while checking, the timer is already running to check these as well.
+        self._need_to_check = bool(self._changed_keys) or self._check_all_keys
         self._check_in_progress = False
+        if not self._need_to_check:
+            self._result_ready_event.set()
         self.needToWaitForResultChanged.emit()
         self.errorCheckFinished.emit()
         execution_time = time.time() - self._check_start_time
         Logger.info(f"Error check finished, result = {result}, time = {execution_time:.2f}s")
+
+    def _getDependentKeys(self, key: str) -> Set[str]:
+        """Get the keys of all settings that depend on a setting, directly or indirectly.
+
+        The validation state of these settings may change along with the setting, e.g. because their minimum or
+        maximum value is computed from it.
+
+        :param key: The key of the setting that changed.
+        :return: The keys of the settings that depend on it, not including the key itself.
+        """
+
+        if key in self._dependent_keys_cache:
+            return self._dependent_keys_cache[key]
+
+        dependent_keys = set()  # type: Set[str]
+        if self._global_stack is not None:
+            definitions = self._global_stack.definition.findDefinitions(key = key)
+            to_visit = [relation.target for definition in definitions for relation in definition.relations if relation.type == RelationType.RequiredByTarget]
+            while to_visit:
+                definition = to_visit.pop()
+                if definition.key in dependent_keys:
+                    continue
+                dependent_keys.add(definition.key)
+                to_visit.extend(relation.target for relation in definition.relations if relation.type == RelationType.RequiredByTarget)
+            dependent_keys.discard(key)
+
+        self._dependent_keys_cache[key] = dependent_keys
+        return dependent_keys
@@ -1,17 +1,22 @@
 # Copyright (c) 2022 Ultimaker B.V.
 # Cura is released under the terms of the LGPLv3 or higher.
 
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+import numpy
 from PyQt6.QtCore import QTimer
 
 from UM.Application import Application
 from UM.Logger import Logger
 from UM.Scene.SceneNode import SceneNode
 from UM.Scene.Iterator.BreadthFirstIterator import BreadthFirstIterator
+from UM.Math.Polygon import Polygon
 from UM.Math.Vector import Vector
 from UM.Scene.Selection import Selection
 from UM.Scene.SceneNodeSettings import SceneNodeSettings
 
 from cura.Scene.ConvexHullDecorator import ConvexHullDecorator
+from cura.Scene.SpatialGrid import SpatialGrid
 
 from cura.Operations import PlatformPhysicsOperation
 from cura.Scene import ZOffsetDecorator
@@ -64,12 +69,16 @@ class PlatformPhysics:
         build_volume = app_instance.getBuildVolume()
         build_volume.updateNodeBoundaryCheck()
 
-        # Keep a list of nodes that are moving. We use this so that we don't move two intersecting objects in the
+        # Keep track of the nodes that are moving. We use this so that we don't move two intersecting objects in the
         # same direction.
-        transformed_nodes = []
+        transformed_nodes = set()  # type: Set[SceneNode]
 
         nodes = list(BreadthFirstIterator(root))
 
+        # Only nodes that are near each other can collide, so look up the nodes to check against in a grid per build
+        # plate, rather than checking against all nodes.
+        collision_grids = self._createCollisionGrids(nodes, root) if app_automatic_push_free else {}
+
         # Only check nodes inside build area.
         nodes = [node for node in nodes if (hasattr(node, "_outside_buildarea") and not node._outside_buildarea and not node.callDecoration("isAssignedToDisabledExtruder"))]
 
@@ -100,29 +109,25 @@ class PlatformPhysics:
                     continue
 
                 # Check for collisions between convex hulls
-                for other_node in BreadthFirstIterator(root):
-                    # Ignore root, ourselves and anything that is not a normal SceneNode.
-                    if other_node is root or not issubclass(type(other_node), SceneNode) or other_node is node or other_node.callDecoration("getBuildPlateNumber") != node.callDecoration("getBuildPlateNumber"):
+                # Nodes that are further away than the gap can't collide. The move vector is read again each time the
+                # nearby nodes run out, so that nodes that this node gets pushed towards are checked as well.
+                collision_grid = collision_grids.get(node.callDecoration("getBuildPlateNumber"))
+                for other_node in self._getNearbyNodes(collision_grid, self._getHullBounds(node), lambda: move_vector):
+                    # Ignore ourselves.
+                    if other_node is node:
                         continue
 
                     # Ignore collisions of a group with it's own children
-                    if other_node in node.getAllChildren() or node in other_node.getAllChildren():
+                    if self._isAncestor(node, other_node) or self._isAncestor(other_node, node):
                         continue
 
                     # Ignore collisions within a group
                     if other_node.getParent() and node.getParent() and (other_node.getParent().callDecoration("isGroup") is not None or node.getParent().callDecoration("isGroup") is not None):
                         continue
 
-                    # Ignore nodes that do not have the right properties set.
-                    if not other_node.callDecoration("getConvexHull") or not other_node.getBoundingBox():
-                        continue
-
                     if other_node in transformed_nodes:
                         continue  # Other node is already moving, wait for next pass.
 
-                    if other_node.callDecoration("isNonPrintingMesh"):
-                        continue
-
                     overlap = (0, 0)  # Start loop with no overlap
                     current_overlap_checks = 0
                     # Continue to check the overlap until we no longer find one.
@@ -169,7 +174,7 @@ class PlatformPhysics:
                                 overlap = None
 
             if not Vector.Null.equals(move_vector, epsilon = 1e-5):
-                transformed_nodes.append(node)
+                transformed_nodes.add(node)
                 op = PlatformPhysicsOperation.PlatformPhysicsOperation(node, move_vector)
                 op.push()
 
@@ -178,6 +183,86 @@ class PlatformPhysics:
         # After moving, we have to evaluate the boundary checks for nodes
         build_volume.updateNodeBoundaryCheck()
 
+    def _createCollisionGrids(self, nodes: List[SceneNode], root: SceneNode) -> Dict[Optional[int], SpatialGrid]:
+        """Put the nodes that other nodes can be pushed away from in a grid per build plate, by their convex hulls.
+
+        :param nodes: The nodes in the scene, in breadth-first order.
+        :param root: The root of the scene, which is left out.
+        :return: A grid with the nodes of each build plate, by build plate number.
+        """
+
+        nodes_per_build_plate = {}  # type: Dict[Optional[int], List[SceneNode]]
+        bounds = {}  # type: Dict[SceneNode, numpy.ndarray]
+        for other_node in nodes:
+            # Ignore root, anything that is not a normal SceneNode and nodes that do not have the right properties set.
+            if other_node is root or not issubclass(type(other_node), SceneNode) or not other_node.getBoundingBox():
+                continue
+            if not other_node.callDecoration("getConvexHull") or other_node.callDecoration("isNonPrintingMesh"):
+                continue
+            node_bounds = self._getHullBounds(other_node)
+            if node_bounds is None:
+                continue
+            bounds[other_node] = node_bounds
+            nodes_per_build_plate.setdefault(other_node.callDecoration("getBuildPlateNumber"), []).append(other_node)
+
+        grids = {}  # type: Dict[Optional[int], SpatialGrid]
+        for build_plate_number, build_plate_nodes in nodes_per_build_plate.items():
+            # Cells about the size of a typical node keep the number of cells per node as well as the number of nodes
+            # per cell low.
+            sizes = numpy.array([bounds[node][2:] - bounds[node][:2] for node in build_plate_nodes])
+            grid = SpatialGrid(float(numpy.median(sizes)) + self._minimum_gap)
+            for build_plate_node in build_plate_nodes:
+                grid.add(build_plate_node, *bounds[build_plate_node])
+            grids[build_plate_number] = grid
+        return grids
+
+    def _getNearbyNodes(self, collision_grid: Optional[SpatialGrid], node_bounds: Optional[numpy.ndarray],
+                        get_move_vector: Callable[[], Vector]) -> Iterator[SceneNode]:
+        """Get the nodes in a collision grid that a node could collide with, each once.
+
+        :param collision_grid: The grid with the nodes on the build plate of the node, if there are any.
+        :param node_bounds: The bounds of the hulls of the node, as given by _getHullBounds.
+        :param get_move_vector: Gives the vector that the node is currently moved by. Once all nodes near the moved
+            node are given, the grid is queried again if the node was moved further in the meantime.
+        """
+
+        if collision_grid is None or node_bounds is None:
+            return
+        min_x, min_y, max_x, max_y = node_bounds
+        found_nodes = set()  # type: Set[SceneNode]
+        while True:
+            move_vector = get_move_vector()
+            new_nodes = [other_node for other_node in collision_grid.query(min_x + move_vector.x - self._minimum_gap, min_y + move_vector.z - self._minimum_gap,
+                                                                           max_x + move_vector.x + self._minimum_gap, max_y + move_vector.z + self._minimum_gap)
+                         if other_node not in found_nodes]
+            if not new_nodes:
+                return
+            found_nodes.update(new_nodes)
+            yield from new_nodes
+
+    @staticmethod
+    def _getHullBounds(node: SceneNode) -> Optional[numpy.ndarray]:
+        """Get the bounding rectangle of the convex hull of a node, including the head hull for one-at-a-time printing.
+
+        :return: [min_x, min_y, max_x, max_y] of the hulls, or None if the node has no convex hull (yet).
+        """
+
+        hulls = [node.callDecoration("getConvexHull"), node.callDecoration("getConvexHullHead")]
+        points = [hull.getPoints() for hull in hulls if isinstance(hull, Polygon) and hull.isValid()]
+        if not points:
+            return None
+        points = numpy.concatenate(points)
+        return numpy.concatenate((points.min(axis = 0), points.max(axis = 0)))
+
+    @staticmethod
+    def _isAncestor(ancestor: SceneNode, node: SceneNode) -> bool:
+        parent = node.getParent()
+        while parent is not None:
+            if parent is ancestor:
+                return True
+            parent = parent.getParent()
+        return False
+
     def _onToolOperationStarted(self, tool):
         self._enabled = False
 
@@ -1,6 +1,8 @@
 # Copyright (c) 2020 Ultimaker B.V.
 # Cura is released under the terms of the LGPLv3 or higher.
 
+import concurrent.futures
+
 from PyQt6.QtCore import QTimer
 
 from UM.Application import Application
@@ -13,7 +15,7 @@ from cura.Scene import ConvexHullNode
 
 import numpy
 
-from typing import TYPE_CHECKING, Any, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 if TYPE_CHECKING:
     from UM.Scene.SceneNode import SceneNode
@@ -34,6 +36,11 @@ class ConvexHullDecorator(SceneNodeDecorator):
         self._convex_hull_node = None  # type: Optional["SceneNode"]
         self._init2DConvexHullCache()
 
+        # The vertices of the 3D convex hull of the mesh, in the coordinates of the mesh. The 2D hull for any
+        # transformation of the mesh can be computed from these, since it's the projection of the 3D hull.
+        self._mesh_hull_vertices_mesh = None  # type: Optional[MeshData]
+        self._mesh_hull_vertices = None  # type: Optional[numpy.ndarray]
+
         self._global_stack = None  # type: Optional[GlobalStack]
 
         # Make sure the timer is created on the main thread
@@ -228,21 +235,76 @@ class ConvexHullDecorator(SceneNodeDecorator):
         self._2d_convex_hull_mesh_world_transform = None  # type: Optional[Matrix]
         self._2d_convex_hull_mesh_result = None  # type: Optional[Polygon]
 
+    @classmethod
+    def computeConvexHulls(cls, nodes: List["SceneNode"], executor: Optional[concurrent.futures.Executor] = None) -> List[Optional[Polygon]]:
+        """Compute the convex hulls of many nodes at once, for instance after loading a file with a lot of objects.
+
+        The hulls of the meshes can be computed over a pool of worker threads. Nodes that share their mesh data only
+        compute the 3D hull of the mesh once, and only compute the 2D hull once if they are only moved with respect to
+        each other. The results end up in the cache of each decorator, so nothing needs to be computed again when the
+        hulls are requested later on.
+
+        :param nodes: The nodes to compute the convex hulls of. Their children are computed as well.
+        :param executor: The pool of worker threads to use. If None, everything is computed on this thread.
+        :return: The convex hull of each node, see :py:meth:`getConvexHull`. None for nodes without this decorator.
+        """
+
+        # Find the hulls that need to be computed, with the decorators that can use each of them.
+        pending = []  # type: List[Tuple[MeshData, Matrix, List[Tuple[ConvexHullDecorator, Matrix]]]]
+        pending_by_mesh = {}  # type: Dict[int, List[int]]
+        for node in nodes:
+            for descendant in [node] + node.getAllChildren():
+                decorator = descendant.getDecorator(cls)
+                mesh = descendant.getMeshData()
+                if decorator is None or mesh is None or descendant.callDecoration("isGroup"):
+                    continue
+                world_transform = descendant.getWorldTransformation(copy = True)
+                if decorator._getCachedMeshHull(mesh, world_transform) is not None:
+                    continue
+                for index in pending_by_mesh.get(id(mesh), []):
+                    if cls._getFootprintTranslation(pending[index][1], world_transform) is not None:
+                        pending[index][2].append((decorator, world_transform))
+                        break
+                else:
+                    pending_by_mesh.setdefault(id(mesh), []).append(len(pending))
+                    pending.append((mesh, world_transform, [(decorator, world_transform)]))
+
+        # First the 3D hulls of the meshes, then the 2D hulls of each transformation of them.
+        meshes = {id(mesh): mesh for mesh, _, decorators in pending if any(decorator._mesh_hull_vertices_mesh is not mesh for decorator, _ in decorators)}
+        map_function = executor.map if executor is not None and len(pending) > 1 else map
+        hull_vertices = dict(zip(meshes.keys(), map_function(cls._getMeshHullVertices, meshes.values())))
+        for mesh, _, decorators in pending:
+            for decorator, _ in decorators:
+                if decorator._mesh_hull_vertices_mesh is not mesh:
+                    decorator._mesh_hull_vertices_mesh = mesh
+                    decorator._mesh_hull_vertices = hull_vertices[id(mesh)]
+        hulls = list(map_function(lambda item: cls._computeMeshConvexHull(item[2][0][0]._mesh_hull_vertices, item[1]), pending))
+
+        for (mesh, world_transform, decorators), hull in zip(pending, hulls):
+            for decorator, decorator_transform in decorators:
+                decorator._2d_convex_hull_mesh = mesh
+                decorator._2d_convex_hull_mesh_world_transform = world_transform
+                decorator._2d_convex_hull_mesh_result = hull
+                decorator._getCachedMeshHull(mesh, decorator_transform)  # Moves the hull to where this copy of the mesh is.
+
+        result = []  # type: List[Optional[Polygon]]
+        for node in nodes:
+            decorator = node.getDecorator(cls)
+            result.append(decorator.getConvexHull() if decorator is not None else None)
+        return result
+
     def _compute2DConvexHull(self) -> Optional[Polygon]:
         if self._node is None:
             return None
         if self._node.callDecoration("isGroup"):
-            points = numpy.zeros((0, 2), dtype = numpy.int32)
+            child_points = []  # type: List[numpy.ndarray]
             for child in self._node.getChildren():
                 child_hull = child.callDecoration("_compute2DConvexHull")
-                if child_hull:
-                    try:
-                        points = numpy.append(points, child_hull.getPoints(), axis = 0)
-                    except ValueError:
-                        pass
-
-                if points.size < 3:
-                    return None
+                if child_hull and child_hull.getPoints().size > 0:
+                    child_points.append(child_hull.getPoints())
+            points = numpy.concatenate(child_points) if child_points else numpy.zeros((0, 2), dtype = numpy.int32)
+            if points.size < 3:
+                return None
             child_polygon = Polygon(points)
 
             # Check the cache
@@ -259,8 +321,6 @@ class ConvexHullDecorator(SceneNodeDecorator):
             return offset_hull
 
         else:
-            convex_hull = Polygon([])
-            offset_hull = Polygon([])
             mesh = self._node.getMeshData()
             if mesh is None:
                 return Polygon([])  # Node has no mesh data, so just return an empty Polygon.
@@ -268,45 +328,122 @@ class ConvexHullDecorator(SceneNodeDecorator):
             world_transform = self._node.getWorldTransformation(copy = True)
 
             # Check the cache
-            if mesh is self._2d_convex_hull_mesh and world_transform == self._2d_convex_hull_mesh_world_transform:
-                return self._offsetHull(self._2d_convex_hull_mesh_result)
-
-            vertex_data = mesh.getConvexHullTransformedVertices(world_transform)
-            # Don't use data below 0.
-            # TODO; We need a better check for this as this gives poor results for meshes with long edges.
-            # Do not throw away vertices: the convex hull may be too small and objects can collide.
-            # vertex_data = vertex_data[vertex_data[:,1] >= -0.01]
-
-            if vertex_data is not None and len(vertex_data) >= 4:  # type: ignore # mypy and numpy don't play along well just yet.
-                # Round the vertex data to 1/10th of a mm, then remove all duplicate vertices
-                # This is done to greatly speed up further convex hull calculations as the convex hull
-                # becomes much less complex when dealing with highly detailed models.
-                vertex_data = numpy.round(vertex_data, 1)
-
-                vertex_data = vertex_data[:, [0, 2]]  # Drop the Y components to project to 2D.
-
-                # Grab the set of unique points.
-                #
-                # This basically finds the unique rows in the array by treating them as opaque groups of bytes
-                # which are as long as the 2 float64s in each row, and giving this view to numpy.unique() to munch.
-                # See http://stackoverflow.com/questions/16970982/find-unique-rows-in-numpy-array
-                vertex_byte_view = numpy.ascontiguousarray(vertex_data).view(
-                    numpy.dtype((numpy.void, vertex_data.dtype.itemsize * vertex_data.shape[1])))
-                _, idx = numpy.unique(vertex_byte_view, return_index = True)
-                vertex_data = vertex_data[idx]  # Select the unique rows by index.
-
-                hull = Polygon(vertex_data)
-
-                if len(vertex_data) >= 3:
-                    convex_hull = hull.getConvexHull()
-                    offset_hull = self._offsetHull(convex_hull)
+            convex_hull = self._getCachedMeshHull(mesh, world_transform)
+            if convex_hull is not None:
+                return self._offsetHull(convex_hull)
+
+            if mesh is not self._mesh_hull_vertices_mesh:
+                self._mesh_hull_vertices_mesh = mesh
+                self._mesh_hull_vertices = self._getMeshHullVertices(mesh)
+            convex_hull = self._computeMeshConvexHull(self._mesh_hull_vertices, world_transform)
 
             # Store the result in the cache
             self._2d_convex_hull_mesh = mesh
             self._2d_convex_hull_mesh_world_transform = world_transform
             self._2d_convex_hull_mesh_result = convex_hull
 
-            return offset_hull
+            if not convex_hull.isValid():
+                return Polygon([])
+            return self._offsetHull(convex_hull)
+
+    def _getCachedMeshHull(self, mesh: "MeshData", world_transform: "Matrix") -> Optional[Polygon]:
+        """Get the hull of the mesh from the cache, if the mesh didn't change.
+
+        If the mesh was only moved, the hull is the moved cached hull and doesn't need to be computed again. The cache
+        is updated then.
+
+        :return: The hull of the mesh without any offsets, or None if it needs to be computed again.
+        """
+
+        if mesh is not self._2d_convex_hull_mesh or self._2d_convex_hull_mesh_result is None or self._2d_convex_hull_mesh_world_transform is None:
+            return None
+        if world_transform == self._2d_convex_hull_mesh_world_transform:
+            return self._2d_convex_hull_mesh_result
+
+        translation = self._getFootprintTranslation(self._2d_convex_hull_mesh_world_transform, world_transform)
+        if translation is None:
+            return None
+
+        if self._2d_convex_hull_mesh_result.isValid():
+            convex_hull = Polygon(self._2d_convex_hull_mesh_result.getPoints() + translation)
+        else:
+            convex_hull = self._2d_convex_hull_mesh_result
+
+        self._2d_convex_hull_mesh_world_transform = world_transform
+        self._2d_convex_hull_mesh_result = convex_hull
+        return convex_hull
+
+    @staticmethod
+    def _getFootprintTranslation(old_transform: "Matrix", new_transform: "Matrix") -> Optional[numpy.ndarray]:
+        """Get how far the footprint of a mesh on the build plate moved, when its transformation changes.
+
+        This only exists if the mesh was only moved. The 2D hull is rounded, so deriving a rotated or scaled hull from
+        the old one would make the rounding errors grow with each change. Those are computed from the 3D hull again.
+
+        :return: The movement along the X and Z axes, or None if the mesh was also transformed in another way.
+        """
+
+        old_data = old_transform.getData()
+        new_data = new_transform.getData()
+        if not numpy.allclose(old_data[0:3, 0:3], new_data[0:3, 0:3], rtol = 0, atol = 1e-9):
+            return None
+        return new_data[[0, 2], 3] - old_data[[0, 2], 3]
+
+    @staticmethod
+    def _getMeshHullVertices(mesh: "MeshData") -> Optional[numpy.ndarray]:
+        """Get the vertices of the 3D convex hull of a mesh, in the coordinates of the mesh.
+
+        This doesn't touch the scene or the decorator, so it can run on any thread.
+        """
+
+        vertices = mesh.getConvexHullVertices()
+        if vertices is None:
+            return None
+        return numpy.ascontiguousarray(vertices, dtype = numpy.float64)
+
+    @staticmethod
+    def _computeMeshConvexHull(hull_vertices: Optional[numpy.ndarray], world_transform: "Matrix") -> Polygon:
+        """Compute the 2D convex hull of a mesh, projected on the build plate.
+
+        This doesn't touch the scene or the decorator, so it can run on any thread.
+
+        :param hull_vertices: The vertices of the 3D convex hull of the mesh, see :py:meth:`_getMeshHullVertices`.
+        :param world_transform: The transformation of the mesh.
+        :return: The convex hull, without any offsets. Empty if the mesh doesn't have enough vertices.
+        """
+
+        convex_hull = Polygon([])
+        vertex_data = None
+        if hull_vertices is not None:
+            # Only the X and Z coordinates end up on the build plate, so only those need to be transformed.
+            transformation = world_transform.getData()
+            vertex_data = numpy.dot(hull_vertices, transformation[[0, 2], 0:3].T) + transformation[[0, 2], 3]
+        # Don't use data below 0.
+        # TODO; We need a better check for this as this gives poor results for meshes with long edges.
+        # Do not throw away vertices: the convex hull may be too small and objects can collide.
+        # vertex_data = vertex_data[vertex_data[:,1] >= -0.01]
+
+        if vertex_data is not None and len(vertex_data) >= 4:  # type: ignore # mypy and numpy don't play along well just yet.
+            # Round the vertex data to 1/10th of a mm, then remove all duplicate vertices
+            # This is done to greatly speed up further convex hull calculations as the convex hull
+            # becomes much less complex when dealing with highly detailed models.
+            vertex_data = numpy.round(vertex_data, 1)
+
+            # Grab the set of unique points.
+            #
+            # This basically finds the unique rows in the array by treating them as opaque groups of bytes
+            # which are as long as the 2 float64s in each row, and giving this view to numpy.unique() to munch.
+            # See http://stackoverflow.com/questions/16970982/find-unique-rows-in-numpy-array
+            vertex_byte_view = numpy.ascontiguousarray(vertex_data).view(
+                numpy.dtype((numpy.void, vertex_data.dtype.itemsize * vertex_data.shape[1])))
+            _, idx = numpy.unique(vertex_byte_view, return_index = True)
+            vertex_data = vertex_data[idx]  # Select the unique rows by index.
+
+            hull = Polygon(vertex_data)
+
+            if len(vertex_data) >= 3:
+                convex_hull = hull.getConvexHull()
+        return convex_hull
 
     def _getHeadAndFans(self) -> Polygon:
         if not self._global_stack:
@@ -0,0 +1,152 @@
+# Copyright (c) 2024 UltiMaker
+# Cura is released under the terms of the LGPLv3 or higher.
+
+import shutil
+import tempfile
+import threading
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Sequence, Tuple, Union, overload
+from collections.abc import MutableSequence
+
+
+class _Spool:
+    """Temporary file that the g-code of one or more g-code stores is written to.
+
+    Data is only ever added at the end of the file, so the stores that share it never overwrite each other's g-code.
+    """
+
+    def __init__(self) -> None:
+        self._file = None  # type: Optional[BinaryIO]
+        self._size = 0
+        self._lock = threading.Lock()  # G-code is added by jobs, while it's written to files from the main thread.
+
+    def write(self, data: bytes) -> int:
+        """Add data to the end of the file.
+
+        :return: The offset of the data in the file.
+        """
+
+        with self._lock:
+            if self._file is None:
+                self._file = tempfile.TemporaryFile(prefix = "cura_gcode_")
+            offset = self._size
+            self._file.seek(offset)
+            self._file.write(data)
+            self._size += len(data)
+            return offset
+
+    def copyFrom(self, source: BinaryIO) -> Tuple[int, int]:
+        """Add the rest of a file to the end of the file.
+
+        :return: The offset and the length of the copied data in the file.
+        """
+
+        with self._lock:
+            if self._file is None:
+                self._file = tempfile.TemporaryFile(prefix = "cura_gcode_")
+            offset = self._size
+            self._file.seek(offset)
+            shutil.copyfileobj(source, self._file)
+            self._size = self._file.tell()
+            return offset, self._size - offset
+
+    def read(self, offset: int, length: int) -> bytes:
+        if length == 0:
+            return b""
+        with self._lock:
+            assert self._file is not None  # Data was written, or it couldn't have a length.
+            self._file.seek(offset)
+            return self._file.read(length)
+
+
+class GCodeStore(MutableSequence):
+    """List of g-code strings, usually one for each layer, that keeps the g-code in a temporary file.
+
+    This can be used anywhere where a list of g-code strings is expected, such as in the gcode_dict of the scene, but
+    only the index of the strings is kept in memory. A string is read from the file whenever it's needed, so iterating
+    over the store streams the g-code to for instance a file, a layer at a time.
+
+    Changing a string adds the new string to the end of the file. The old string is only removed from the disk when the
+    store is removed, so this is meant for g-code that is mostly added to, like the g-code from the engine.
+    """
+
+    def __init__(self, gcode: Iterable[str] = ()) -> None:
+        """
+        :param gcode: The g-code strings to start with.
+        """
+
+        self._spool = _Spool()
+        self._index = []  # type: List[Tuple[int, int]] # The offset and the length of each string in the file, in bytes.
+        self.extend(gcode)
+
+    @classmethod
+    def fromFile(cls, file: BinaryIO, lengths: Sequence[int]) -> "GCodeStore":
+        """Create a g-code store with the g-code strings that were written to a file after each other.
+
+        :param file: The file to copy the g-code from, encoded as UTF-8.
+        :param lengths: The length of each of the strings in the file, in bytes.
+        """
+
+        result = cls()
+        offset, length = result._spool.copyFrom(file)
+        if sum(lengths) != length:
+            raise ValueError("The lengths of the g-code strings don't match the size of the file.")
+        for string_length in lengths:
+            result._index.append((offset, string_length))
+            offset += string_length
+        return result
+
+    def copy(self) -> "GCodeStore":
+        """Create a copy of this store, that can be changed without changing this store.
+
+        The copy shares the file with this store, so no g-code needs to be copied.
+        """
+
+        result = GCodeStore()
+        result._spool = self._spool
+        result._index = self._index.copy()
+        return result
+
+    def _store(self, gcode: str) -> Tuple[int, int]:
+        data = gcode.encode("utf-8")
+        if not data:
+            return 0, 0
+        return self._spool.write(data), len(data)
+
+    def _load(self, entry: Tuple[int, int]) -> str:
+        return self._spool.read(*entry).decode("utf-8")
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self._load(entry) for entry in self._index[index]]
+        return self._load(self._index[index])
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            self._index[index] = [self._store(gcode) for gcode in value]
+        else:
+            self._index[index] = self._store(value)
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        del self._index[index]
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def insert(self, index: int, value: str) -> None:
+        self._index.insert(index, self._store(value))
+
+    def __iter__(self) -> Iterator[str]:
+        for entry in self._index.copy():  # Strings may be added in the meanwhile.
+            yield self._load(entry)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (GCodeStore, list)):
+            return NotImplemented
+        return len(self) == len(other) and all(this_gcode == other_gcode for this_gcode, other_gcode in zip(self, other))
+
+    def __repr__(self) -> str:
+        return "<GCodeStore with {count} strings>".format(count = len(self))
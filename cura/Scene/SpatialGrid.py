@@ -0,0 +1,63 @@
+# Copyright (c) 2024 UltiMaker
+# Cura is released under the terms of the LGPLv3 or higher.
+
+import math
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+
+class SpatialGrid:
+    """Uniform grid over the build plate, to quickly find the objects that are near an area.
+
+    Objects are added with their bounding rectangle, and end up in every cell that the rectangle touches. Looking up an
+    area then only needs to look at the objects in the cells of that area, instead of at all objects. This is meant
+    as a broad phase: objects that are found may still not intersect the area, but objects that aren't found never do.
+    """
+
+    def __init__(self, cell_size: float) -> None:
+        """
+        :param cell_size: The width and depth of the cells. Ideally in the order of the size of the objects.
+        """
+
+        self._cell_size = max(cell_size, 1e-3)
+        self._cells = defaultdict(list)  # type: Dict[Tuple[int, int], List[Any]]
+        self._order = {}  # type: Dict[Any, int]
+
+    def add(self, item: Any, min_x: float, min_y: float, max_x: float, max_y: float) -> None:
+        """Add an object to the grid.
+
+        :param item: The object. It must be hashable.
+        :param min_x: The minimum X coordinate of the bounding rectangle of the object.
+        :param min_y: The minimum Y coordinate of the bounding rectangle of the object.
+        :param max_x: The maximum X coordinate of the bounding rectangle of the object.
+        :param max_y: The maximum Y coordinate of the bounding rectangle of the object.
+        """
+
+        self._order.setdefault(item, len(self._order))
+        for cell in self._getCells(min_x, min_y, max_x, max_y):
+            self._cells[cell].append(item)
+
+    def query(self, min_x: float, min_y: float, max_x: float, max_y: float) -> List[Any]:
+        """Find the objects that may intersect a rectangle.
+
+        :return: The objects of which the cells overlap with the rectangle, in the order in which they were added.
+        """
+
+        result = set()  # type: Set[Any]
+        for cell in self._getCells(min_x, min_y, max_x, max_y):
+            items = self._cells.get(cell)
+            if items:
+                result.update(items)
+        return sorted(result, key = self._order.__getitem__)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _getCells(self, min_x: float, min_y: float, max_x: float, max_y: float) -> Iterator[Tuple[int, int]]:
+        first_x = math.floor(min_x / self._cell_size)
+        first_y = math.floor(min_y / self._cell_size)
+        last_x = math.floor(max_x / self._cell_size)
+        last_y = math.floor(max_y / self._cell_size)
+        for x in range(first_x, last_x + 1):
+            for y in range(first_y, last_y + 1):
+                yield x, y
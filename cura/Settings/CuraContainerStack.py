@@ -1,7 +1,7 @@
 # Copyright (c) 2018 Ultimaker B.V.
 # Cura is released under the terms of the LGPLv3 or higher.
 
-from typing import Any, cast, List, Optional, Dict
+from typing import Any, cast, List, Optional, Dict, Tuple
 from PyQt6.QtCore import pyqtProperty, pyqtSignal, QObject
 
 from UM.Application import Application
@@ -56,14 +56,23 @@ class CuraContainerStack(ContainerStack):
         self._containers[_ContainerIndexes.Variant] = self._empty_variant
 
         self.containersChanged.connect(self._onContainersChanged)
+        self.containersChanged.connect(self._onSettingsChanged)
+        self.propertyChanged.connect(self._onSettingsChanged)
 
         import cura.CuraApplication #Here to prevent circular imports.
         self.setMetaDataEntry("setting_version", cura.CuraApplication.CuraApplication.SettingVersion)
 
         self._settable_per_extruder_cache = {}  # type: Dict[str, Any]
 
+        # The result of getAllValues(), with the settings generation and next stack it was computed with.
+        self._all_values_cache = None  # type: Optional[Tuple[int, Optional[ContainerStack], Dict[str, Any]]]
+
         self.setDirty(False)
 
+    # Counts the changes to the settings in any stack. Settings can depend on settings in other stacks (e.g. the global
+    # stack resolves values from the extruders), so a change anywhere means that the values of all stacks may change.
+    _settings_generation = 0
+
     # This is emitted whenever the containersChanged signal from the ContainerStack base class is emitted.
     pyqtContainersChanged = pyqtSignal()
 
@@ -405,6 +414,28 @@ class CuraContainerStack(ContainerStack):
     def getValue(self, key: str, context = None) -> Any:
         return self.getProperty(key, "value", context)
 
+    def getAllValues(self) -> Dict[str, Any]:
+        """Get the values of all settings in this stack at once.
+
+        The values are kept until a setting in any stack changes, so getting them again, for instance for the next
+        slice, doesn't need to evaluate any setting functions if nothing changed in the meantime.
+
+        :return: A new dictionary with the value of each setting key.
+        """
+
+        generation = CuraContainerStack._settings_generation
+        next_stack = self.getNextStack()
+        cache = self._all_values_cache
+        if cache is None or cache[0] != generation or cache[1] is not next_stack:
+            values = {key: self.getProperty(key, "value") for key in self.getAllKeys()}
+            # If anything changed while evaluating, the generation will differ the next time, so this won't be used.
+            cache = (generation, next_stack, values)
+            self._all_values_cache = cache
+        return cache[2].copy()
+
+    def _onSettingsChanged(self, *args: Any) -> None:
+        CuraContainerStack._settings_generation += 1
+
 
 class _ContainerIndexes:
     """Private helper class to keep track of container positions and their types."""
@@ -3,7 +3,7 @@
 import json
 import os.path
 import zipfile
-from typing import List, Optional, Union, TYPE_CHECKING, cast
+from typing import List, Optional, Tuple, Union, TYPE_CHECKING, cast
 
 import pySavitar as Savitar
 import numpy
@@ -98,6 +98,51 @@ class ThreeMFReader(MeshReader):
 
         return temp_mat
 
+    @staticmethod
+    def _createFlatShadedIndexedMesh(vertices: numpy.ndarray, faces: numpy.ndarray) -> Optional[Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]]:
+        """Create an indexed mesh that looks the same as the mesh with separate vertices for each face.
+
+        Each vertex can only have one normal, so a vertex is only shared between the faces around it that lie in the
+        same plane. The flat parts of e.g. mechanical parts keep sharing their vertices, while a vertex on an edge is
+        split into one for each side.
+
+        :param vertices: The vertices of the mesh, shared between its faces.
+        :param faces: For each face, the indices of its three vertices.
+        :return: The vertices, their normals and for each face the indices of its three vertices, or None if that
+            takes more memory than separate vertices for each face, like for a curved surface.
+        """
+
+        if len(faces) == 0 or faces.min() < 0 or faces.max() >= len(vertices):
+            return None
+
+        first_corners = vertices[faces[:, 0]]
+        face_normals = numpy.cross(vertices[faces[:, 1]] - first_corners, vertices[faces[:, 2]] - first_corners)
+        lengths = numpy.linalg.norm(face_normals, axis = 1)
+        face_normals /= numpy.where(lengths > 0, lengths, 1)[:, numpy.newaxis]
+
+        # Faces in the same plane get exactly the same normal key, despite rounding errors in their normals.
+        rounded_normals = numpy.round(face_normals * 10000).astype(numpy.int64) + 10000
+        normal_keys = (rounded_normals[:, 0] * 20001 + rounded_normals[:, 1]) * 20001 + rounded_normals[:, 2]
+
+        corner_vertices = faces.reshape(-1)
+        corner_normal_keys = numpy.repeat(normal_keys, 3)
+        order = numpy.lexsort((corner_normal_keys, corner_vertices))
+        sorted_vertices = corner_vertices[order]
+        sorted_normal_keys = corner_normal_keys[order]
+        is_new_vertex = numpy.ones(len(order), dtype = bool)
+        is_new_vertex[1:] = (sorted_vertices[1:] != sorted_vertices[:-1]) | (sorted_normal_keys[1:] != sorted_normal_keys[:-1])
+        vertex_count = numpy.count_nonzero(is_new_vertex)
+        if vertex_count * 2 * 3 * 4 + faces.size * 4 >= faces.size * 2 * 3 * 4:  # Vertices and normals, plus indices.
+            return None
+
+        indices = numpy.empty(len(order), dtype = numpy.int32)
+        indices[order] = numpy.cumsum(is_new_vertex) - 1
+        first_corners = order[is_new_vertex]
+        result = (vertices[corner_vertices[first_corners]], face_normals[first_corners // 3], indices.reshape((-1, 3)))
+        for array in result:
+            array.flags.writeable = False  # Mesh data copies arrays that can still be changed.
+        return result
+
     @staticmethod
     def _convertSavitarNodeToUMNode(savitar_node: Savitar.SceneNode, file_name: str = "", archive: zipfile.ZipFile = None, scene: Savitar.Scene = None) -> Optional[SceneNode]:
         """Convenience function that converts a SceneNode object (as obtained from libSavitar) to a scene node.
@@ -138,15 +183,25 @@ class ThreeMFReader(MeshReader):
 
         mesh_data = savitar_node.getMeshData()
 
-        vertices_data = numpy.fromstring(mesh_data.getFlatVerticesAsBytes(), dtype=numpy.float32)
-        vertices = numpy.resize(vertices_data, (int(vertices_data.size / 3), 3))
-
         texture_path = mesh_data.getTexturePath(scene)
-        uv_data = numpy.fromstring(mesh_data.getUVCoordinatesPerVertexAsBytes(scene), dtype=numpy.float32)
-        uv_coordinates = numpy.resize(uv_data, (int(uv_data.size / 2), 2))
-
-        mesh_builder.setVertices(vertices)
-        mesh_builder.calculateNormals(fast=True)
+        uv_coordinates = numpy.frombuffer(mesh_data.getUVCoordinatesPerVertexAsBytes(scene), dtype=numpy.float32).reshape((-1, 2))
+
+        # The vertices are shared between faces in the file. Keep sharing them where that doesn't change how the mesh is
+        # shown, unless the texture coordinates are given for each corner of each face.
+        indexed_mesh = None
+        if uv_coordinates.size == 0:
+            vertices = numpy.frombuffer(mesh_data.getVerticesAsBytes(), dtype=numpy.float32).reshape((-1, 3))
+            faces = numpy.frombuffer(mesh_data.getFacesAsBytes(), dtype=numpy.int32).reshape((-1, 3))
+            indexed_mesh = ThreeMFReader._createFlatShadedIndexedMesh(vertices, faces)
+
+        if indexed_mesh is not None:
+            vertices, normals, indices = indexed_mesh
+            mesh_builder.setVertices(vertices)
+            mesh_builder.setNormals(normals)
+            mesh_builder.setIndices(indices)
+        else:
+            mesh_builder.setVertices(numpy.frombuffer(mesh_data.getFlatVerticesAsBytes(), dtype=numpy.float32).reshape((-1, 3)))
+            mesh_builder.calculateNormals(fast=True)
         mesh_builder.setMeshId(node_id)
         mesh_builder.setUVCoordinates(uv_coordinates)
         if file_name:
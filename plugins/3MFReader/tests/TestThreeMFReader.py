@@ -0,0 +1,81 @@
+# Copyright (c) 2024 UltiMaker
+# Cura is released under the terms of the LGPLv3 or higher.
+
+import importlib
+import os
+import sys
+
+import numpy
+import pySavitar as Savitar
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+ThreeMFReader = importlib.import_module("3MFReader.ThreeMFReader").ThreeMFReader
+
+
+def createCube():
+    vertices = numpy.array([[x, y, z] for x in (0, 1) for y in (0, 1) for z in (0, 1)], dtype = numpy.float32)
+    faces = numpy.array([[0, 1, 3], [0, 3, 2], [4, 6, 7], [4, 7, 5],  # x = 0 and x = 1.
+                         [0, 4, 5], [0, 5, 1], [2, 3, 7], [2, 7, 6],  # y = 0 and y = 1.
+                         [0, 2, 6], [0, 6, 4], [1, 5, 7], [1, 7, 3]], dtype = numpy.int32)  # z = 0 and z = 1.
+    return vertices, faces
+
+
+def createGrid(size, curved = False):
+    x, y = numpy.meshgrid(numpy.arange(size + 1), numpy.arange(size + 1))
+    z = x * y / size if curved else numpy.zeros(x.shape)  # A saddle surface, where no two faces are in the same plane.
+    vertices = numpy.stack([x.ravel(), y.ravel(), z.ravel()], axis = 1).astype(numpy.float32)
+    corners = (numpy.arange(size)[:, numpy.newaxis] * (size + 1) + numpy.arange(size)).ravel()
+    faces = numpy.concatenate([numpy.stack([corners, corners + 1, corners + size + 2], axis = 1),
+                               numpy.stack([corners, corners + size + 2, corners + size + 1], axis = 1)]).astype(numpy.int32)
+    return vertices, faces
+
+
+def getFlatVertices(vertices, faces):
+    mesh_data = Savitar.MeshData()
+    mesh_data.setVerticesFromBytes(vertices.tobytes())
+    mesh_data.setFacesFromBytes(faces.tobytes())
+    return numpy.frombuffer(mesh_data.getFlatVerticesAsBytes(), dtype = numpy.float32).reshape((-1, 3))
+
+
+def test_createFlatShadedIndexedMeshCube():
+    vertices, faces = createCube()
+    result_vertices, result_normals, result_indices = ThreeMFReader._createFlatShadedIndexedMesh(vertices, faces)
+
+    # Each corner of the cube is split into one vertex for each of the three sides around it.
+    assert result_vertices.shape == (24, 3)
+    assert result_normals.shape == (24, 3)
+    assert result_indices.shape == (12, 3)
+
+    # The mesh looks the same as the one with separate vertices for each face.
+    flat_vertices = getFlatVertices(vertices, faces)
+    numpy.testing.assert_array_equal(result_vertices[result_indices].reshape((-1, 3)), flat_vertices)
+    flat_faces = flat_vertices.reshape((-1, 3, 3))
+    face_normals = numpy.cross(flat_faces[:, 1] - flat_faces[:, 0], flat_faces[:, 2] - flat_faces[:, 0])
+    face_normals /= numpy.linalg.norm(face_normals, axis = 1)[:, numpy.newaxis]
+    numpy.testing.assert_allclose(result_normals[result_indices], numpy.repeat(face_normals[:, numpy.newaxis], 3, axis = 1), atol = 1e-6)
+
+
+def test_createFlatShadedIndexedMeshFlatGrid():
+    vertices, faces = createGrid(10)
+    result_vertices, result_normals, result_indices = ThreeMFReader._createFlatShadedIndexedMesh(vertices, faces)
+
+    assert len(result_vertices) == len(vertices)  # All faces are in the same plane, so they keep sharing their vertices.
+    numpy.testing.assert_allclose(result_normals, numpy.tile([0, 0, 1], (len(vertices), 1)), atol = 1e-6)
+    numpy.testing.assert_array_equal(result_vertices[result_indices].reshape((-1, 3)), getFlatVertices(vertices, faces))
+
+
+def test_createFlatShadedIndexedMeshCurved():
+    vertices, faces = createGrid(10, curved = True)
+    assert ThreeMFReader._createFlatShadedIndexedMesh(vertices, faces) is None
+
+
+@pytest.mark.parametrize("faces", [
+    numpy.array([[0, 1, 8]], dtype = numpy.int32),
+    numpy.array([[0, -1, 2]], dtype = numpy.int32),
+    numpy.zeros((0, 3), dtype = numpy.int32)
+])
+def test_createFlatShadedIndexedMeshInvalidFaces(faces):
+    vertices, _ = createCube()
+    assert ThreeMFReader._createFlatShadedIndexedMesh(vertices, faces) is None
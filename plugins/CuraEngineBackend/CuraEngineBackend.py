@@ -8,6 +8,7 @@ import os
 from PyQt6.QtCore import QObject, QTimer, QUrl, pyqtSlot
 import sys
 from time import time
+import uuid
 from typing import Any, cast, Dict, List, Optional, Set, TYPE_CHECKING
 
 from PyQt6.QtGui import QDesktopServices, QImage
@@ -20,16 +21,20 @@ from UM.Message import Message
 from UM.PluginRegistry import PluginRegistry
 from UM.Platform import Platform
 from UM.Qt.Duration import DurationFormat
+from UM.Resources import Resources
 from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
 from UM.Settings.Interfaces import DefinitionContainerInterface
 from UM.Settings.SettingInstance import SettingInstance #For typing.
 from UM.Tool import Tool #For typing.
 
 from cura.CuraApplication import CuraApplication
+from cura.Scene.GCodeStore import GCodeStore
 from cura.Settings.ExtruderManager import ExtruderManager
 from cura.Snapshot import Snapshot
 from cura.Utils.Threading import call_on_qt_thread
 from .ProcessSlicedLayersJob import ProcessSlicedLayersJob
+from .SliceCache import CachedSlice, SliceCache
+from .SliceMessageCache import SliceMessageCache
 from .StartSliceJob import StartSliceJob, StartJobResult
 
 import pyArcus as Arcus
@@ -136,6 +141,11 @@ class CuraEngineBackend(QObject, Backend):
         # key is build plate number, then arrays are stored until they go to the ProcessSlicesLayersJob
         self._stored_optimized_layer_data: Dict[int, List[Arcus.PythonMessage]] = {}
 
+        # Results of slices that are kept to store them in the slice cache, and results that were taken from the
+        # slice cache, by build plate number.
+        self._slice_results: Dict[int, Dict[str, Any]] = {}
+        self._cached_slices: Dict[int, CachedSlice] = {}
+
         self._scene: Scene = application.getController().getScene()
         self._scene.sceneChanged.connect(self._onSceneChanged)
 
@@ -158,9 +168,12 @@ class CuraEngineBackend(QObject, Backend):
         self._message_handlers["cura.proto.PrintTimeMaterialEstimates"] = self._onPrintTimeMaterialEstimates
         self._message_handlers["cura.proto.InitialExtruder"] = self._onInitialExtruder
         self._message_handlers["cura.proto.SlicingFinished"] = self._onSlicingFinishedMessage
+        self._message_handlers["cura.proto.EngineCapabilities"] = self._onEngineCapabilitiesMessage
 
         self._start_slice_job: Optional[StartSliceJob] = None
         self._start_slice_job_build_plate: Optional[int] = None
+        self._slice_message_cache = SliceMessageCache()  # Parts of the last slice message, to reuse in the next one.
+        self._engine_supports_indexed_meshes: bool = False  # Engines that don't tell us otherwise get the vertices of each face.
         self._slicing: bool = False  # Are we currently slicing?
         self._restart: bool = False  # Back-end is currently restarting?
         self._tool_active: bool = False  # If a tool is active, some tasks do not have to do anything
@@ -184,6 +197,12 @@ class CuraEngineBackend(QObject, Backend):
         application.getPreferences().addPreference("general/auto_slice", False)
         application.getPreferences().addPreference("info/send_engine_crash", True)
         application.getPreferences().addPreference("info/anonymous_engine_crash_report", True)
+        application.getPreferences().addPreference("layerview/process_layers_while_slicing", False)
+        application.getPreferences().addPreference("layerview/layer_processing_threads", 1)
+        application.getPreferences().addPreference("backend/slice_cache_size", 1024)  # In MB. 0 disables the slice cache.
+
+        self._slice_cache: SliceCache = SliceCache(os.path.join(Resources.getCacheStoragePath(), "slice_cache"),
+                                                   int(application.getPreferences().getValue("backend/slice_cache_size")) * 1024 * 1024)
 
         self._use_timer: bool = False
 
@@ -332,8 +351,7 @@ class CuraEngineBackend(QObject, Backend):
         if self._process_layers_job is not None:
             # We were processing layers. Stop that, the layers are going to change soon.
             Logger.log("i", "Aborting process layers job...")
-            self._process_layers_job.abort()
-            self._process_layers_job = None
+            self._abortProcessLayersJob()
 
         if self._error_message:
             self._error_message.hide()
@@ -361,6 +379,11 @@ class CuraEngineBackend(QObject, Backend):
     def getLatestSnapshot(self) -> Optional[QImage]:
         return self._snapshot
 
+    def getSliceCache(self) -> SliceCache:
+        """The cache with the results of earlier slices, which also keeps the layers of g-code files that were opened."""
+
+        return self._slice_cache
+
     def slice(self) -> None:
         """Perform a slice of the scene."""
 
@@ -399,13 +422,15 @@ class CuraEngineBackend(QObject, Backend):
         self._stored_layer_data = []
 
         if build_plate_to_be_sliced not in num_objects or num_objects[build_plate_to_be_sliced] == 0:
-            self._scene.gcode_dict[build_plate_to_be_sliced] = []   # type: ignore
+            self._scene.gcode_dict[build_plate_to_be_sliced] = GCodeStore()   # type: ignore
             # We need to ignore the type because we created this attribute above.
             Logger.log("d", "Build plate %s has no objects to be sliced, skipping", build_plate_to_be_sliced)
             if self._build_plates_to_be_sliced:
                 self.slice()
             return
         self._stored_optimized_layer_data[build_plate_to_be_sliced] = []
+        self._slice_results.pop(build_plate_to_be_sliced, None)
+        self._cached_slices.pop(build_plate_to_be_sliced, None)
         if application.getPrintInformation() and build_plate_to_be_sliced == active_build_plate:
             application.getPrintInformation().setToZeroPrintInformation(build_plate_to_be_sliced)
 
@@ -417,7 +442,7 @@ class CuraEngineBackend(QObject, Backend):
         self.processingProgress.emit(0.0)
         self.backendStateChange.emit(BackendState.NotStarted)
 
-        self._scene.gcode_dict[build_plate_to_be_sliced] = []  # type: ignore #[] indexed by build plate number
+        self._scene.gcode_dict[build_plate_to_be_sliced] = GCodeStore()  # type: ignore #[] indexed by build plate number
         self._slicing = True
         self.slicingStarted.emit()
 
@@ -427,9 +452,29 @@ class CuraEngineBackend(QObject, Backend):
         self._start_slice_job = StartSliceJob(slice_message)
         self._start_slice_job_build_plate = build_plate_to_be_sliced
         self._start_slice_job.setBuildPlate(self._start_slice_job_build_plate)
+        self._start_slice_job.setSliceMessageCache(self._slice_message_cache)
+        self._start_slice_job.setIndexedMeshes(self._engine_supports_indexed_meshes)
+        self._start_slice_job.setEngineIdentity(self._getEngineIdentity())
         self._start_slice_job.start()
         self._start_slice_job.finished.connect(self._onStartSliceCompleted)
 
+    def _getEngineIdentity(self) -> Optional[str]:
+        """Get something that identifies the engine that slices, for the key of the slice in the slice cache.
+
+        The executable with its size and modification time changes whenever the engine is updated or replaced.
+
+        :return: The identity of the engine, or None if it's unknown, e.g. when an external engine is used.
+        """
+
+        if CuraApplication.getInstance().getUseExternalBackend():
+            return None
+        executable = self.getEngineCommand()[0]
+        try:
+            executable_stat = os.stat(executable)
+        except OSError:
+            return None
+        return "{path}:{size}:{modified}".format(path = os.path.abspath(executable), size = executable_stat.st_size, modified = executable_stat.st_mtime_ns)
+
     def _terminate(self) -> None:
         """Terminate the engine process.
 
@@ -441,6 +486,9 @@ class CuraEngineBackend(QObject, Backend):
             del self._stored_optimized_layer_data[self._start_slice_job_build_plate]
         if self._start_slice_job is not None:
             self._start_slice_job.cancel()
+        if self._process_layers_job is not None and self._process_layers_job.isStreaming():
+            # The engine won't send the rest of the layers anymore, so don't let the job wait for them.
+            self._abortProcessLayersJob()
 
         self.stopPlugins()
 
@@ -609,6 +657,16 @@ class CuraEngineBackend(QObject, Backend):
             self._invokeSlice()
             return
 
+        # If the exact same thing was sliced before, take the result from the cache instead of running the engine.
+        slice_key = job.getSliceKey()
+        cached_slice = self._slice_cache.get(slice_key)
+        if cached_slice is not None:
+            Logger.log("i", "Using the result of an earlier slice from the slice cache.")
+            self._useCachedSlice(cached_slice)
+            return
+        if slice_key is not None:
+            self._slice_results[self._start_slice_job_build_plate] = {"key": slice_key, "gcode": None, "info": {}}
+
         # Preparation completed, send it to the backend.
         immediate_success = self._socket.sendMessage(job.getSliceMessage())
         if (not CuraApplication.getInstance().getUseExternalBackend()) and (not immediate_success):
@@ -628,6 +686,15 @@ class CuraEngineBackend(QObject, Backend):
         # Notify the user that it's now up to the backend to do its job
         self.setState(BackendState.Processing)
 
+        # If the layers are going to be shown anyway, start processing them as they come in.
+        if (
+            self._layer_view_active and
+            self._process_layers_job is None and
+            application.getPreferences().getValue("layerview/process_layers_while_slicing") and
+            application.getMultiBuildPlateModel().activeBuildPlate == self._start_slice_job_build_plate):
+
+            self._startProcessSlicedLayersJob(self._start_slice_job_build_plate, streaming = True)
+
         # Handle time reporting.
         self._time_send_message = time()
         if self._time_start_process:
@@ -837,6 +904,11 @@ class CuraEngineBackend(QObject, Backend):
         :param message: The protobuf message containing sliced layer data.
         """
 
+        if self._process_layers_job is not None and self._process_layers_job.isStreaming():
+            # The layers are being processed while they come in, so there's no need to store them.
+            self._process_layers_job.addLayer(message)
+            return
+
         if self._start_slice_job_build_plate is not None:
             if self._start_slice_job_build_plate not in self._stored_optimized_layer_data:
                 self._stored_optimized_layer_data[self._start_slice_job_build_plate] = []
@@ -870,6 +942,15 @@ class CuraEngineBackend(QObject, Backend):
         :param message: The protobuf message signalling that slicing is finished.
         """
 
+        slice_result = self._slice_results.get(self._start_slice_job_build_plate)
+        if slice_result is not None and self._start_slice_job_build_plate in self._scene.gcode_dict:  # type: ignore
+            # Keep a copy of the g-code as the engine sent it, since post-processing scripts change the g-code in place.
+            slice_result["gcode"] = self._scene.gcode_dict[self._start_slice_job_build_plate].copy()  # type: ignore
+        self._finishSlicing()
+
+    def _finishSlicing(self) -> None:
+        """Wraps up a slice once its result is complete, whether it came from the engine or from the slice cache."""
+
         self.stopPlugins()
 
         self.setState(BackendState.Done)
@@ -883,7 +964,10 @@ class CuraEngineBackend(QObject, Backend):
 
         # See if we need to process the sliced layers job.
         active_build_plate = CuraApplication.getInstance().getMultiBuildPlateModel().activeBuildPlate
-        if (
+        if self._process_layers_job is not None and self._process_layers_job.isStreaming():
+            # The layers were already processed while they came in. The job can finish up now.
+            self._process_layers_job.finishAddingLayers()
+        elif (
             self._layer_view_active and
             (self._process_layers_job is None or not self._process_layers_job.isRunning()) and
             active_build_plate == self._start_slice_job_build_plate and
@@ -901,6 +985,29 @@ class CuraEngineBackend(QObject, Backend):
             self.enableTimer()  # manually enable timer to be able to invoke slice, also when in manual slice mode
             self._invokeSlice()
 
+    def _useCachedSlice(self, cached_slice: CachedSlice) -> None:
+        """Use the result of an earlier slice from the slice cache as the result of the current slice.
+
+        :param cached_slice: The result of the earlier slice.
+        """
+
+        build_plate_number = self._start_slice_job_build_plate
+        # The UUID identifies each slice, e.g. in the metadata of print jobs, so it's not taken from the earlier slice.
+        slice_uuid = str(uuid.uuid4())
+        try:
+            self._scene.gcode_dict[build_plate_number] = cached_slice.getGCode(slice_uuid)  # type: ignore
+        except (OSError, ValueError):
+            Logger.logException("w", "Unable to read the g-code from the slice cache.")
+            self._scene.gcode_dict[build_plate_number] = GCodeStore()  # type: ignore
+        CuraApplication.getInstance().getPrintInformation().slice_uuid = slice_uuid
+        if cached_slice.getInitialExtruder() is not None:
+            self.initialExtruderMessage.emit(cached_slice.getInitialExtruder())
+        self.printDurationMessage.emit(build_plate_number, *cached_slice.getPrintDuration())
+
+        # The layers are loaded from the cache once they need to be shown.
+        self._cached_slices[build_plate_number] = cached_slice
+        self._finishSlicing()
+
     def _onGCodeLayerMessage(self, message: Arcus.PythonMessage) -> None:
         """Called when a g-code message is received from the engine.
 
@@ -917,6 +1024,10 @@ class CuraEngineBackend(QObject, Backend):
         application = CuraApplication.getInstance()
         application.getPrintInformation().slice_uuid = message.slice_uuid
 
+    def _onEngineCapabilitiesMessage(self, message: Arcus.PythonMessage) -> None:
+        self._engine_supports_indexed_meshes = message.indexed_meshes
+        Logger.debug(f"The engine {'supports' if message.indexed_meshes else 'does not support'} indexed meshes.")
+
     def _createSocket(self, protocol_file: str = None) -> None:
         """Creates a new socket connection."""
 
@@ -931,6 +1042,7 @@ class CuraEngineBackend(QObject, Backend):
             protocol_file = os.path.abspath(os.path.join(plugin_path, "Cura.proto"))
         super()._createSocket(protocol_file)
         self._engine_is_fresh = True
+        self._engine_supports_indexed_meshes = False  # Until the new engine says otherwise.
 
     def _onChanged(self, *args: Any, **kwargs: Any) -> None:
         """Called when anything has changed to the stuff that needs to be sliced.
@@ -1002,6 +1114,8 @@ class CuraEngineBackend(QObject, Backend):
             warning_message.show()
 
         times = self._parseMessagePrintTimes(message)
+        if self._start_slice_job_build_plate in self._slice_results:
+            self._slice_results[self._start_slice_job_build_plate]["info"]["print_duration"] = [times, material_amounts, material_lengths, material_weights, material_costs, material_names]
         self.printDurationMessage.emit(self._start_slice_job_build_plate, times, material_amounts, material_lengths, material_weights, material_costs, material_names)
 
     def _onInitialExtruder(self, message: Arcus.PythonMessage) -> None:
@@ -1009,6 +1123,8 @@ class CuraEngineBackend(QObject, Backend):
 
         :param message: The protobuf message containing the extruder number
         """
+        if self._start_slice_job_build_plate in self._slice_results:
+            self._slice_results[self._start_slice_job_build_plate]["info"]["initial_extruder"] = message.extruder_nr
         self.initialExtruderMessage.emit(message.extruder_nr)
 
     def _onMessageActionTriggered(self, message: Message, message_action: str) -> None:
@@ -1081,9 +1197,13 @@ class CuraEngineBackend(QObject, Backend):
             source = self._postponed_scene_change_sources.pop(0)
             self._onSceneChanged(source)
 
-    def _startProcessSlicedLayersJob(self, build_plate_number: int) -> None:
-        self._process_layers_job = ProcessSlicedLayersJob(self._stored_optimized_layer_data[build_plate_number])
+    def _startProcessSlicedLayersJob(self, build_plate_number: int, streaming: bool = False) -> None:
+        self._process_layers_job = ProcessSlicedLayersJob(self._stored_optimized_layer_data.get(build_plate_number, []), streaming = streaming)
         self._process_layers_job.setBuildPlate(build_plate_number)
+        if build_plate_number in self._cached_slices:
+            self._process_layers_job.setCachedSlice(self._cached_slices[build_plate_number])
+        elif build_plate_number in self._slice_results:
+            self._process_layers_job.setSliceCache(self._slice_cache, self._slice_results[build_plate_number])
         self._process_layers_job.finished.connect(self._onProcessLayersFinished)
         self._process_layers_job.start()
 
@@ -1155,12 +1275,32 @@ class CuraEngineBackend(QObject, Backend):
                 extruder.containersChanged.connect(self._onChanged)
             self._onChanged()
 
-    def _onProcessLayersFinished(self, job: ProcessSlicedLayersJob) -> None:
-        if job.getBuildPlate() in self._stored_optimized_layer_data:
-            del self._stored_optimized_layer_data[job.getBuildPlate()]
-        else:
-            Logger.log("w", "The optimized layer data was already deleted for buildplate %s", job.getBuildPlate())
+    def _abortProcessLayersJob(self) -> None:
+        """Abort the job that processes the layers, and drop the layer data and slice results that were kept for it.
+
+        The aborted job may only finish later, when the next slice has started. It leaves the data of that slice alone.
+        """
+
+        job = self._process_layers_job
+        if job is None:
+            return
+        job.abort()
         self._process_layers_job = None
+        self._stored_optimized_layer_data.pop(job.getBuildPlate(), None)
+        self._slice_results.pop(job.getBuildPlate(), None)
+        self._cached_slices.pop(job.getBuildPlate(), None)
+
+    def _onProcessLayersFinished(self, job: ProcessSlicedLayersJob) -> None:
+        # An aborted job can finish after the next slice has started (e.g. when it was processing the layers while
+        # slicing). Its data was dropped when it got aborted, so don't touch the layer data of that new slice then.
+        if self._process_layers_job is job:
+            if job.getBuildPlate() in self._stored_optimized_layer_data:
+                del self._stored_optimized_layer_data[job.getBuildPlate()]
+            else:
+                Logger.log("w", "The optimized layer data was already deleted for buildplate %s", job.getBuildPlate())
+            self._slice_results.pop(job.getBuildPlate(), None)
+            self._cached_slices.pop(job.getBuildPlate(), None)
+            self._process_layers_job = None
         Logger.log("d", "See if there is more to slice(2)...")
         self._invokeSlice()
 
@@ -1181,6 +1321,9 @@ class CuraEngineBackend(QObject, Backend):
             self._change_timer.timeout.disconnect(self.slice)
 
     def _onPreferencesChanged(self, preference: str) -> None:
+        if preference == "backend/slice_cache_size":
+            self._slice_cache.setMaxSize(int(CuraApplication.getInstance().getPreferences().getValue(preference)) * 1024 * 1024)
+            return
         if preference != "general/auto_slice" and preference != "info/send_engine_crash" and preference != "info/anonymous_engine_crash_report":
             return
         if preference == "general/auto_slice":
@@ -1,8 +1,11 @@
 #Copyright (c) 2019 Ultimaker B.V.
 #Cura is released under the terms of the LGPLv3 or higher.
 
+import concurrent.futures
 import gc
-import sys
+import math
+import queue
+from typing import Any, Dict, Optional, Set
 
 from UM.Job import Job
 from UM.Application import Application
@@ -19,12 +22,15 @@ from cura.Scene.BuildPlateDecorator import BuildPlateDecorator
 from cura.Scene.CuraSceneNode import CuraSceneNode
 from cura.Settings.ExtruderManager import ExtruderManager
 from cura import LayerDataBuilder
+from cura.LayerData import LayerData
 from cura import LayerDataDecorator
 from cura import LayerPolygon
 
 import numpy
 from time import time
 from cura.Machines.Models.ExtrudersModel import ExtrudersModel
+
+from .SliceCache import CachedSlice, SliceCache
 catalog = i18nCatalog("cura")
 
 
@@ -45,14 +51,35 @@ def colorCodeToRGBA(color_code):
 
 
 class ProcessSlicedLayersJob(Job):
-    def __init__(self, layers):
+    _streaming_publish_interval = 1.0  # Minimum time in seconds between layer view updates while layers are coming in.
+
+    def __init__(self, layers, streaming = False):
+        """Creates a job to convert the sliced layers of the engine to layer data that can be shown in the layer view.
+
+        :param layers: The layer messages that the engine has sent.
+        :param streaming: Whether more layers may still come in while the job is running. These are handed over
+            through :py:meth:`addLayer` and the layers processed so far are shown in the layer view while the engine
+            is still slicing. :py:meth:`finishAddingLayers` must be called once all layers are sent.
+        """
+
         super().__init__()
         self._layers = layers
+        self._streaming = streaming
+        self._incoming_layers = queue.Queue()  # type: queue.Queue
+        self._streamed_layer_count = 0  # The number of layers handed over through addLayer so far.
         self._scene = Application.getInstance().getController().getScene()
         self._progress_message = Message(catalog.i18nc("@info:status", "Processing Layers"), 0, False, -1)
         self._abort_requested = False
         self._build_plate_number = None
 
+        # Layer numbers (as sent by the engine) of all layers seen so far, and of the layers that contain any paths.
+        self._layer_ids = set()  # type: Set[int]
+        self._layer_ids_with_data = set()  # type: Set[int]
+
+        self._cached_slice = None  # type: Optional[CachedSlice]
+        self._slice_cache = None  # type: Optional[SliceCache]
+        self._slice_result = None  # type: Optional[Dict[str, Any]]
+
     def abort(self):
         """Aborts the processing of layers.
 
@@ -63,6 +90,41 @@ class ProcessSlicedLayersJob(Job):
         """
 
         self._abort_requested = True
+        self._incoming_layers.put(None)  # Wake up the job if it is waiting for more layers.
+
+    def addLayer(self, layer) -> None:
+        """Hands a layer message that just came in from the engine to a streaming job.
+
+        :param layer: The protobuf message containing the sliced layer data.
+        """
+
+        self._streamed_layer_count += 1
+        self._incoming_layers.put(layer)
+
+    def finishAddingLayers(self) -> None:
+        """Tells a streaming job that the engine is done slicing, so no more layers will come in."""
+
+        self._incoming_layers.put(None)
+
+    def isStreaming(self) -> bool:
+        return self._streaming
+
+    def setCachedSlice(self, cached_slice: CachedSlice) -> None:
+        """Use the layers of an earlier slice from the slice cache, instead of the layer messages of the engine."""
+
+        self._cached_slice = cached_slice
+
+    def setSliceCache(self, slice_cache: SliceCache, slice_result: Dict[str, Any]) -> None:
+        """Store the processed layers in the slice cache, together with the rest of the result of the slice.
+
+        :param slice_cache: The cache to store the result in.
+        :param slice_result: The key of the slice, its g-code and the info for :py:meth:`SliceCache.store`. The g-code
+            and print duration may still come in while the layers are processed. If they're not complete once the
+            layers are done, nothing is stored.
+        """
+
+        self._slice_cache = slice_cache
+        self._slice_result = slice_result
 
     def setBuildPlate(self, new_value):
         self._build_plate_number = new_value
@@ -95,105 +157,257 @@ class ProcessSlicedLayersJob(Job):
         # sure any old layer data is really cleaned up before adding new.
         gc.collect()
 
-        mesh = MeshData()
         layer_data = LayerDataBuilder.LayerDataBuilder()
+        material_color_map = self._getMaterialColorMap()
+        line_type_brightness = self._getLineTypeBrightness()
+        decorator = LayerDataDecorator.LayerDataDecorator()
+        new_node.addDecorator(decorator)
+        new_node.setMeshData(MeshData())
+
         layer_count = len(self._layers)
+        current_layer = 0
+        next_publish_time = time() + self._streaming_publish_interval
+        worker_count = int(Application.getInstance().getPreferences().getValue("layerview/layer_processing_threads"))
+        layer_mesh = None  # type: Optional[LayerData]
+
+        if self._cached_slice is not None:
+            try:
+                layer_mesh = self._cached_slice.createLayerData(material_color_map, line_type_brightness)
+            except (OSError, ValueError, KeyError):
+                Logger.logException("w", "Unable to load the layers from the slice cache.")
+                self._abortProcessing(new_node)
+                return
+        elif not self._streaming and worker_count > 1 and layer_count > 1:
+            self._addLayersInParallel(layer_data, worker_count)
+            if self._abort_requested:
+                self._abortProcessing(new_node)
+                return
+        else:
+            for layer in self._getLayerMessages():
+                self._registerLayer(layer)
+                self._addLayer(layer_data, layer)
 
-        # Find the minimum layer number
-        # When disabling the remove empty first layers setting, the minimum layer number will be a positive
-        # value. In that case the first empty layers will be discarded and start processing layers from the
-        # first layer with data.
-        # When using a raft, the raft layers are sent as layers < 0. Instead of allowing layers < 0, we
-        # simply offset all other layers so the lowest layer is always 0. It could happens that the first
-        # raft layer has value -8 but there are just 4 raft (negative) layers.
-        min_layer_number = sys.maxsize
-        negative_layers = 0
-        for layer in self._layers:
-            if layer.repeatedMessageCount("path_segment") > 0:
-                if layer.id < min_layer_number:
-                    min_layer_number = layer.id
-                if layer.id < 0:
-                    negative_layers += 1
+                Job.yieldThread()
+                current_layer += 1
+
+                if self._abort_requested:
+                    self._abortProcessing(new_node)
+                    return
+
+                if self._streaming:
+                    # Convert the layer into its part of the final mesh right away, so that the layers that are done can
+                    # be shown while the engine is still busy with the rest.
+                    layer_data.buildLayerMesh(layer.id)
+                    if time() >= next_publish_time:
+                        publish_start_time = time()
+                        # Only the layers that came in since the last update are added to the layer data.
+                        self._publishLayerData(new_node, decorator, layer_data.buildIncrementally(material_color_map, line_type_brightness, self._getLayerNumbers()))
+                        # Don't let the updates take a large part of the time, e.g. if showing the layers gets slow.
+                        next_publish_time = time() + max(self._streaming_publish_interval, (time() - publish_start_time) * 4)
+                    if self._progress_message:
+                        # The number of layers isn't known until the engine is done, so show how far the layers that
+                        # came in so far are processed.
+                        self._progress_message.setProgress((current_layer / max(self._streamed_layer_count, 1)) * 99)
+                elif self._progress_message:
+                    progress = (current_layer / layer_count) * 99
+                    self._progress_message.setProgress(progress)
 
-        current_layer = 0
+        # We are done processing all the layers we got from the engine, now create a mesh out of the data
+        if layer_mesh is None:
+            layer_mesh = layer_data.build(material_color_map, line_type_brightness, self._getLayerNumbers())
 
-        for layer in self._layers:
-            # If the layer is below the minimum, it means that there is no data, so that we don't create a layer
-            # data. However, if there are empty layers in between, we compute them.
-            if layer.id < min_layer_number:
-                continue
+        if self._abort_requested:
+            self._abortProcessing(new_node)
+            return
 
-            # Layers are offset by the minimum layer number. In case the raft (negative layers) is being used,
-            # then the absolute layer number is adjusted by removing the empty layers that can be in between raft
-            # and the model
-            abs_layer_number = layer.id - min_layer_number
-            if layer.id >= 0 and negative_layers != 0:
-                abs_layer_number += (min_layer_number + negative_layers)
+        self._publishLayerData(new_node, decorator, layer_mesh)  # Note: After this we can no longer abort!
 
-            layer_data.addLayer(abs_layer_number)
-            this_layer = layer_data.getLayer(abs_layer_number)
-            layer_data.setLayerHeight(abs_layer_number, layer.height)
-            layer_data.setLayerThickness(abs_layer_number, layer.thickness)
+        if self._progress_message:
+            self._progress_message.setProgress(100)
 
-            for p in range(layer.repeatedMessageCount("path_segment")):
-                polygon = layer.getRepeatedMessage("path_segment", p)
+        if self._progress_message:
+            self._progress_message.hide()
 
-                extruder = polygon.extruder
+        # Clear the unparsed layers. This saves us a bunch of memory if the Job does not get destroyed.
+        self._layers = None
 
-                line_types = numpy.fromstring(polygon.line_type, dtype = "u1")  # Convert bytearray to numpy array
+        if self._slice_cache is not None and self._slice_result is not None and self._slice_result.get("gcode") is not None \
+                and "print_duration" in self._slice_result["info"]:
+            self._slice_cache.storeInBackground(self._slice_result["key"], self._slice_result["gcode"], self._slice_result["info"], layer_mesh)
 
-                line_types = line_types.reshape((-1,1))
+        Logger.log("d", "Processing layers took %s seconds", time() - start_time)
 
-                points = numpy.fromstring(polygon.points, dtype = "f4")  # Convert bytearray to numpy array
-                if polygon.point_type == 0: # Point2D
-                    points = points.reshape((-1,2))  # We get a linear list of pairs that make up the points, so make numpy interpret them correctly.
-                else:  # Point3D
-                    points = points.reshape((-1,3))
+    def _getLayerMessages(self):
+        """Gets the layer messages to process, one at a time.
 
-                line_widths = numpy.fromstring(polygon.line_width, dtype = "f4")  # Convert bytearray to numpy array
-                line_widths = line_widths.reshape((-1,1))  # We get a linear list of pairs that make up the points, so make numpy interpret them correctly.
+        When streaming, this waits for the engine to send more layers until it is done or the job is aborted.
+        """
 
-                line_thicknesses = numpy.fromstring(polygon.line_thickness, dtype = "f4")  # Convert bytearray to numpy array
-                line_thicknesses = line_thicknesses.reshape((-1,1))  # We get a linear list of pairs that make up the points, so make numpy interpret them correctly.
+        if not self._streaming:
+            yield from self._layers
+            return
 
-                line_feedrates = numpy.fromstring(polygon.line_feedrate, dtype = "f4")  # Convert bytearray to numpy array
-                line_feedrates = line_feedrates.reshape((-1,1))  # We get a linear list of pairs that make up the points, so make numpy interpret them correctly.
+        while not self._abort_requested:
+            layer = self._incoming_layers.get()
+            if layer is None:  # The engine is done sending layers, or we got aborted.
+                return
+            yield layer
 
-                # Create a new 3D-array, copy the 2D points over and insert the right height.
-                # This uses manual array creation + copy rather than numpy.insert since this is
-                # faster.
-                new_points = numpy.empty((len(points), 3), numpy.float32)
-                if polygon.point_type == 0:  # Point2D
-                    new_points[:, 0] = points[:, 0]
-                    new_points[:, 1] = layer.height / 1000  # layer height value is in backend representation
-                    new_points[:, 2] = -points[:, 1]
-                else: # Point3D
-                    new_points[:, 0] = points[:, 0]
-                    new_points[:, 1] = points[:, 2]
-                    new_points[:, 2] = -points[:, 1]
+    def _addLayersInParallel(self, layer_data: LayerDataBuilder.LayerDataBuilder, worker_count: int) -> None:
+        """Converts the layers in chunks, which are spread over a number of worker threads.
 
-                this_poly = LayerPolygon.LayerPolygon(extruder, line_types, new_points, line_widths, line_thicknesses, line_feedrates)
-                this_poly.buildCache()
+        The layers are independent of each other until they are stitched together into the final mesh, and numpy
+        releases the GIL for most of the work, so this can use multiple cores.
 
-                this_layer.polygons.append(this_poly)
+        :param layer_data: The builder to merge the converted chunks into.
+        :param worker_count: The number of worker threads to use.
+        """
 
-                Job.yieldThread()
-            Job.yieldThread()
-            current_layer += 1
-            progress = (current_layer / layer_count) * 99
-            # TODO: Rebuild the layer data mesh once the layer has been processed.
-            # This needs some work in LayerData so we can add the new layers instead of recreating the entire mesh.
+        for layer in self._layers:
+            self._registerLayer(layer)
+
+        # Use a few chunks per worker, so that the work stays evenly spread if some layers are heavier than others.
+        chunk_size = max(1, math.ceil(len(self._layers) / (worker_count * 4)))
+        chunks = [self._layers[start:start + chunk_size] for start in range(0, len(self._layers), chunk_size)]
+
+        processed_layers = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers = worker_count) as executor:
+            futures = {executor.submit(self._convertLayers, chunk): len(chunk) for chunk in chunks}
+            for future in concurrent.futures.as_completed(futures):
+                layer_data.merge(future.result())
+                processed_layers += futures[future]
+                if self._progress_message and not self._abort_requested:
+                    self._progress_message.setProgress((processed_layers / len(self._layers)) * 99)
+
+    def _convertLayers(self, layers) -> LayerDataBuilder.LayerDataBuilder:
+        """Converts a chunk of layers into their final vertex and attribute arrays. This runs in a worker thread.
+
+        :param layers: The protobuf messages containing the sliced layer data.
+        :return: A builder containing just the layers of this chunk.
+        """
 
+        chunk_data = LayerDataBuilder.LayerDataBuilder()
+        for layer in layers:
             if self._abort_requested:
-                if self._progress_message:
-                    self._progress_message.hide()
-                return
-            if self._progress_message:
-                self._progress_message.setProgress(progress)
+                break
+            self._addLayer(chunk_data, layer)
+            chunk_data.buildLayerMesh(layer.id)
+        return chunk_data
 
-        # We are done processing all the layers we got from the engine, now create a mesh out of the data
+    def _registerLayer(self, layer) -> None:
+        """Keeps track of the layer numbers that the engine sent, to be able to compute the final layer numbers."""
+
+        self._layer_ids.add(layer.id)
+        if layer.repeatedMessageCount("path_segment") > 0:
+            self._layer_ids_with_data.add(layer.id)
+
+    def _addLayer(self, layer_data: LayerDataBuilder.LayerDataBuilder, layer) -> None:
+        """Converts a layer message from the engine into a layer with polygons.
+
+        The layer is stored under the number that the engine gave it. The final layer numbers are only known once all
+        layers are in, see :py:meth:`_getLayerNumbers`.
+
+        :param layer_data: The builder to add the layer to.
+        :param layer: The protobuf message containing the sliced layer data.
+        """
+
+        layer_data.addLayer(layer.id)
+        this_layer = layer_data.getLayer(layer.id)
+        layer_data.setLayerHeight(layer.id, layer.height)
+        layer_data.setLayerThickness(layer.id, layer.thickness)
+
+        # Read the data of all path segments as numpy views on the bytes of the message, without copying it.
+        segments = []
+        for p in range(layer.repeatedMessageCount("path_segment")):
+            polygon = layer.getRepeatedMessage("path_segment", p)
+            points = numpy.frombuffer(polygon.points, dtype = "f4")
+            if polygon.point_type == 0:  # Point2D
+                points = points.reshape((-1, 2))  # We get a linear list of pairs that make up the points, so make numpy interpret them correctly.
+            else:  # Point3D
+                points = points.reshape((-1, 3))
+            segments.append((polygon.extruder,
+                             points,
+                             numpy.frombuffer(polygon.line_type, dtype = "u1"),
+                             numpy.frombuffer(polygon.line_width, dtype = "f4"),
+                             numpy.frombuffer(polygon.line_thickness, dtype = "f4"),
+                             numpy.frombuffer(polygon.line_feedrate, dtype = "f4")))
+
+        # Copy the data of all segments into one buffer for the points and one for each property of the lines of this
+        # layer. This is the only copy that's made, the polygons get views on these buffers.
+        all_points = numpy.empty((sum(len(segment[1]) for segment in segments), 3), numpy.float32)
+        line_count = sum(len(segment[2]) for segment in segments)
+        all_line_types = numpy.empty((line_count, 1), numpy.uint8)
+        all_line_widths = numpy.empty((line_count, 1), numpy.float32)
+        all_line_thicknesses = numpy.empty((line_count, 1), numpy.float32)
+        all_line_feedrates = numpy.empty((line_count, 1), numpy.float32)
+        point_offset = 0
+        line_offset = 0
+        for extruder, points, line_types, line_widths, line_thicknesses, line_feedrates in segments:
+            point_end = point_offset + len(points)
+            line_end = line_offset + len(line_types)
+
+            # Write the 2D points straight into the 3D buffer and insert the right height.
+            new_points = all_points[point_offset:point_end]
+            new_points[:, 0] = points[:, 0]
+            if points.shape[1] == 2:  # Point2D
+                new_points[:, 1] = layer.height / 1000  # layer height value is in backend representation
+            else:  # Point3D
+                new_points[:, 1] = points[:, 2]
+            new_points[:, 2] = -points[:, 1]
+
+            new_line_types = all_line_types[line_offset:line_end]
+            new_line_types[:, 0] = line_types
+            new_line_widths = all_line_widths[line_offset:line_end]
+            new_line_widths[:, 0] = line_widths
+            new_line_thicknesses = all_line_thicknesses[line_offset:line_end]
+            new_line_thicknesses[:, 0] = line_thicknesses
+            new_line_feedrates = all_line_feedrates[line_offset:line_end]
+            new_line_feedrates[:, 0] = line_feedrates
+
+            this_poly = LayerPolygon.LayerPolygon(extruder, new_line_types, new_points, new_line_widths, new_line_thicknesses, new_line_feedrates)
+            this_poly.buildCache()
+
+            this_layer.polygons.append(this_poly)
+            point_offset = point_end
+            line_offset = line_end
+
+            Job.yieldThread()
+
+    def _getLayerNumbers(self) -> Dict[int, int]:
+        """Gets the layer numbers to show the layers under, indexed by the layer numbers that the engine sent.
+
+        When disabling the remove empty first layers setting, the minimum layer number will be a positive value. In
+        that case the first empty layers will be discarded and the layers start at the first layer with data.
+        When using a raft, the raft layers are sent as layers < 0. Instead of allowing layers < 0, we simply offset all
+        other layers so the lowest layer is always 0. It could happen that the first raft layer has value -8 but there
+        are just 4 raft (negative) layers.
+        While streaming, this is based on the layers that came in so far.
+        """
+
+        if not self._layer_ids_with_data:
+            return {}
+        min_layer_number = min(self._layer_ids_with_data)
+        negative_layers = sum(1 for layer_id in self._layer_ids_with_data if layer_id < 0)
+
+        layer_numbers = {}
+        for layer_id in self._layer_ids:
+            # If the layer is below the minimum, it means that there is no data, so that we don't create a layer
+            # data. However, if there are empty layers in between, we compute them.
+            if layer_id < min_layer_number:
+                continue
+
+            # Layers are offset by the minimum layer number. In case the raft (negative layers) is being used,
+            # then the absolute layer number is adjusted by removing the empty layers that can be in between raft
+            # and the model
+            abs_layer_number = layer_id - min_layer_number
+            if layer_id >= 0 and negative_layers != 0:
+                abs_layer_number += (min_layer_number + negative_layers)
+            layer_numbers[layer_id] = abs_layer_number
+        return layer_numbers
+
+    def _getMaterialColorMap(self) -> numpy.ndarray:
+        """Find out colors per extruder."""
 
-        # Find out colors per extruder
         global_container_stack = Application.getInstance().getGlobalContainerStack()
         manager = ExtruderManager.getInstance()
         extruders = manager.getActiveExtruderStacks()
@@ -214,44 +428,41 @@ class ProcessSlicedLayersJob(Job):
             color_code = global_container_stack.material.getMetaDataEntry("color_code", default = "#e0e000")
             color = colorCodeToRGBA(color_code)
             material_color_map[0, :] = color
+        return material_color_map
 
+    def _getLineTypeBrightness(self) -> float:
         # We have to scale the colors for compatibility mode
         if OpenGLContext.isLegacyOpenGL() or bool(Application.getInstance().getPreferences().getValue("view/force_layer_view_compatibility_mode")):
-            line_type_brightness = 0.5  # for compatibility mode
-        else:
-            line_type_brightness = 1.0
-        layer_mesh = layer_data.build(material_color_map, line_type_brightness)
+            return 0.5  # for compatibility mode
+        return 1.0
 
-        if self._abort_requested:
-            if self._progress_message:
-                self._progress_message.hide()
-            return
+    def _publishLayerData(self, new_node: CuraSceneNode, decorator: LayerDataDecorator.LayerDataDecorator, layer_mesh: LayerData) -> None:
+        """Shows the layer data in the scene.
+
+        The first time this is called the node gets added to the scene. After that, the layer data of the node is
+        replaced, which happens when the layers processed so far are shown while the engine is still slicing.
+        """
 
-        # Add LayerDataDecorator to scene node to indicate that the node has layer data
-        decorator = LayerDataDecorator.LayerDataDecorator()
         decorator.setLayerData(layer_mesh)
-        new_node.addDecorator(decorator)
+        if new_node.getParent() is not None:
+            new_node.meshDataChanged.emit(new_node)
+            return
 
-        new_node.setMeshData(mesh)
         # Set build volume as parent, the build volume can move as a result of raft settings.
         # It makes sense to set the build volume as parent: the print is actually printed on it.
         new_node_parent = Application.getInstance().getBuildVolume()
-        new_node.setParent(new_node_parent)  # Note: After this we can no longer abort!
+        new_node.setParent(new_node_parent)
 
         settings = Application.getInstance().getGlobalContainerStack()
         if not settings.getProperty("machine_center_is_zero", "value"):
             new_node.setPosition(Vector(-settings.getProperty("machine_width", "value") / 2, 0.0, settings.getProperty("machine_depth", "value") / 2))
 
-        if self._progress_message:
-            self._progress_message.setProgress(100)
-
+    def _abortProcessing(self, new_node: CuraSceneNode) -> None:
         if self._progress_message:
             self._progress_message.hide()
-
-        # Clear the unparsed layers. This saves us a bunch of memory if the Job does not get destroyed.
-        self._layers = None
-
-        Logger.log("d", "Processing layers took %s seconds", time() - start_time)
+        # When streaming, the layers so far may already be shown. These are outdated now.
+        if new_node.getParent() is not None:
+            new_node.setParent(None)
 
     def _onActiveViewChanged(self):
         if self.isRunning():
@@ -0,0 +1,301 @@
+# Copyright (c) 2024 UltiMaker
+# Cura is released under the terms of the LGPLv3 or higher.
+
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy
+
+from UM.Job import Job
+from UM.Logger import Logger
+
+from cura.LayerData import LayerData
+from cura.LayerDataBuilder import LayerDataBuilder
+from cura.LayerPolygon import LayerPolygon
+from cura.Scene.GCodeStore import GCodeStore
+
+
+class CachedSlice:
+    """The result of an earlier slice, as stored by the :py:class:`SliceCache`."""
+
+    def __init__(self, path: str, info: Dict[str, Any]) -> None:
+        self._path = path
+        self._info = info
+
+    def getGCode(self, slice_uuid: Optional[str] = None) -> GCodeStore:
+        """The g-code of the slice.
+
+        :param slice_uuid: The UUID to put in the header of the g-code instead of the one of the earlier slice.
+        """
+
+        lengths = numpy.load(os.path.join(self._path, SliceCache.GCodeLengthsFileName))
+        with open(os.path.join(self._path, SliceCache.GCodeFileName), "rb") as f:
+            gcode = GCodeStore.fromFile(f, lengths.tolist())
+        if slice_uuid is not None and len(gcode) > 0:
+            # The header is the first string of g-code.
+            gcode[0] = re.sub(r"^;SLICE_UUID:.*$", ";SLICE_UUID:" + slice_uuid, gcode[0], count = 1, flags = re.MULTILINE)
+        return gcode
+
+    def getPrintDuration(self) -> List[Any]:
+        """The arguments of the printDurationMessage signal for this slice, except for the build plate number."""
+
+        return self._info["print_duration"]
+
+    def getInitialExtruder(self) -> Optional[int]:
+        return self._info.get("initial_extruder")
+
+    def createLayerData(self, material_color_map: numpy.ndarray, line_type_brightness: float = 1.0) -> LayerData:
+        """Create the layer data of this slice.
+
+        The arrays are memory-mapped from the cache, so the operating system only loads the parts that are used.
+
+        :param material_color_map: [r, g, b, a] for each extruder row.
+        :param line_type_brightness: compatibility layer view uses line type brightness of 0.5
+        """
+
+        arrays = {name: numpy.load(os.path.join(self._path, name + ".npy"), mmap_mode = "r") for name in SliceCache.ArrayNames}
+
+        builder = LayerDataBuilder()
+        polygons = arrays["polygons"]
+        polygon_index = 0
+        line_offset = 0
+        point_offset = 0
+        for layer in arrays["layers"]:
+            layer_number = int(layer["number"])
+            builder.addLayer(layer_number)
+            builder.setLayerHeight(layer_number, float(layer["height"]))
+            builder.setLayerThickness(layer_number, float(layer["thickness"]))
+            this_layer = builder.getLayer(layer_number)
+            for polygon in polygons[polygon_index:polygon_index + int(layer["polygon_count"])]:
+                line_end = line_offset + int(polygon["line_count"])
+                point_end = point_offset + int(polygon["point_count"])
+                this_polygon = LayerPolygon(int(polygon["extruder"]),
+                                            arrays["polygon_types"][line_offset:line_end].reshape((-1, 1)),
+                                            arrays["polygon_points"][point_offset:point_end],
+                                            arrays["polygon_widths"][line_offset:line_end].reshape((-1, 1)),
+                                            arrays["polygon_thicknesses"][line_offset:line_end].reshape((-1, 1)),
+                                            arrays["polygon_feedrates"][line_offset:line_end].reshape((-1, 1)))
+                this_polygon.buildCache()
+                this_layer.polygons.append(this_polygon)
+                line_offset = line_end
+                point_offset = point_end
+            polygon_index += int(layer["polygon_count"])
+
+        return builder.buildFromMesh(arrays, material_color_map, line_type_brightness)
+
+
+class SliceCache:
+    """Keeps the results of earlier slices on disk, so that slicing the exact same thing again doesn't need the engine.
+
+    The results are stored by the key of the slice (see :py:meth:`StartSliceJob.getSliceKey`), each in a directory of
+    its own. Next to the g-code and the print time estimates, the arrays of the layer data are stored as .npy files.
+    The g-code is stored as one file, with the lengths of its layers next to it.
+    When the cache grows larger than its maximum size, the results that were used the longest ago are removed.
+
+    The layer data is part of a result, so a result is only stored once its layers were processed, which happens when
+    they are shown in the layer view. A slice that is only saved, without previewing it, isn't stored.
+    """
+
+    IndexFileName = "index.json"
+    InfoFileName = "info.json"
+    GCodeFileName = "gcode.gcode"
+    GCodeLengthsFileName = "gcode_lengths.npy"
+    ArrayNames = ["layers", "polygons", "polygon_types", "polygon_points", "polygon_widths", "polygon_thicknesses", "polygon_feedrates",
+                  "vertices", "indices", "line_dimensions", "feedrates", "extruders", "line_types"]
+
+    _layer_type = numpy.dtype([("number", "i4"), ("height", "f8"), ("thickness", "f8"), ("polygon_count", "i8")])
+    _polygon_type = numpy.dtype([("extruder", "i4"), ("line_count", "i8"), ("point_count", "i8")])
+
+    def __init__(self, path: str, max_size: int) -> None:
+        """
+        :param path: The directory to store the results in.
+        :param max_size: The maximum total size of the stored results, in bytes. If 0, nothing is stored.
+        """
+
+        self._path = path
+        self._max_size = max_size
+        self._lock = threading.Lock()  # Results are stored from a job, while they are looked up from the main thread.
+        self._index = None  # type: Optional[Dict[str, Dict[str, Any]]]
+
+    def setMaxSize(self, max_size: int) -> None:
+        with self._lock:
+            self._max_size = max_size
+            if self._max_size > 0:
+                self._evict()
+
+    def getMaxSize(self) -> int:
+        return self._max_size
+
+    def get(self, key: Optional[str]) -> Optional[CachedSlice]:
+        """Find the stored result of a slice.
+
+        :param key: The key of the slice. If None, the slice can't be cached.
+        :return: The result, or None if it's not in the cache.
+        """
+
+        if key is None or self._max_size <= 0:
+            return None
+        with self._lock:
+            index = self._getIndex()
+            if key not in index:
+                return None
+            entry_path = os.path.join(self._path, key)
+            try:
+                with open(os.path.join(entry_path, self.InfoFileName), encoding = "utf-8") as f:
+                    info = json.load(f)
+                if not os.path.isfile(os.path.join(entry_path, self.GCodeFileName)):
+                    raise FileNotFoundError("The cached slice result has no g-code.")
+            except (OSError, ValueError):
+                Logger.logException("w", "Unable to read the cached slice result %s.", key)
+                self._remove(key)
+                self._saveIndex()
+                return None
+            index[key]["last_used"] = time.time()
+            self._saveIndex()
+        return CachedSlice(entry_path, info)
+
+    def store(self, key: str, gcode: Sequence[str], info: Dict[str, Any], layer_data: LayerData) -> None:
+        """Store the result of a slice.
+
+        :param key: The key of the slice.
+        :param gcode: The g-code that the engine sent, one string per layer.
+        :param info: The rest of the result, such as the print duration. See :py:class:`CachedSlice`.
+        :param layer_data: The processed layers.
+        """
+
+        if self._max_size <= 0:
+            return
+        with self._lock:
+            self._getIndex()  # Load the index before writing anything, in case it needs to be cleared.
+
+        # Write the result to a temporary directory first, so that a half-written result is never used.
+        temp_path = os.path.join(self._path, "tmp_" + uuid.uuid4().hex)
+        try:
+            os.makedirs(temp_path)
+            gcode_lengths = []
+            with open(os.path.join(temp_path, self.GCodeFileName), "wb") as f:
+                for layer_gcode in gcode:
+                    gcode_lengths.append(f.write(layer_gcode.encode("utf-8")))
+            numpy.save(os.path.join(temp_path, self.GCodeLengthsFileName), numpy.array(gcode_lengths, dtype = numpy.int64))
+            with open(os.path.join(temp_path, self.InfoFileName), "w", encoding = "utf-8") as f:
+                json.dump(info, f)
+            for name, array in self._getLayerArrays(layer_data).items():
+                numpy.save(os.path.join(temp_path, name + ".npy"), array)
+            size = sum(entry.stat().st_size for entry in os.scandir(temp_path))
+        except (OSError, ValueError, TypeError):
+            Logger.logException("w", "Unable to store the slice result in the cache.")
+            shutil.rmtree(temp_path, ignore_errors = True)
+            return
+
+        with self._lock:
+            index = self._getIndex()
+            if key in index:
+                self._remove(key)
+            try:
+                os.replace(temp_path, os.path.join(self._path, key))
+            except OSError:
+                Logger.logException("w", "Unable to store the slice result in the cache.")
+                shutil.rmtree(temp_path, ignore_errors = True)
+                return
+            index[key] = {"size": size, "last_used": time.time()}
+            self._evict()
+
+    def storeInBackground(self, key: str, gcode: Sequence[str], info: Dict[str, Any], layer_data: LayerData) -> None:
+        """Store the result of a slice in a job, see :py:meth:`store`."""
+
+        StoreSliceJob(self, key, gcode, info, layer_data).start()
+
+    def _getLayerArrays(self, layer_data: LayerData) -> Dict[str, numpy.ndarray]:
+        """Get the arrays to store of the layer data: the data of the layers and their polygons, and the line mesh."""
+
+        layer_numbers = sorted(layer_data.getLayers())
+        layers = numpy.empty(len(layer_numbers), dtype = self._layer_type)
+        polygons = []  # type: List[LayerPolygon]
+        for index, layer_number in enumerate(layer_numbers):
+            layer = layer_data.getLayer(layer_number)
+            layers[index] = (layer_number, layer.height, layer.thickness, len(layer.polygons))
+            polygons.extend(layer.polygons)
+
+        polygon_table = numpy.empty(len(polygons), dtype = self._polygon_type)
+        polygon_table["extruder"] = [polygon.extruder for polygon in polygons]
+        polygon_table["line_count"] = [polygon.types.size for polygon in polygons]
+        polygon_table["point_count"] = [polygon.data.shape[0] for polygon in polygons]
+
+        def concatenate(arrays: List[numpy.ndarray], empty_shape: tuple, dtype) -> numpy.ndarray:
+            return numpy.concatenate(arrays).astype(dtype, copy = False) if arrays else numpy.empty(empty_shape, dtype)
+
+        return {
+            "layers": layers,
+            "polygons": polygon_table,
+            "polygon_types": concatenate([polygon.types.ravel() for polygon in polygons], (0, ), numpy.uint8),
+            "polygon_points": concatenate([polygon.data for polygon in polygons], (0, 3), numpy.float32),
+            "polygon_widths": concatenate([polygon.lineWidths.ravel() for polygon in polygons], (0, ), numpy.float32),
+            "polygon_thicknesses": concatenate([polygon.lineThicknesses.ravel() for polygon in polygons], (0, ), numpy.float32),
+            "polygon_feedrates": concatenate([polygon.lineFeedrates.ravel() for polygon in polygons], (0, ), numpy.float32),
+            "vertices": layer_data.getVertices(),
+            "indices": layer_data.getIndices(),
+            "line_dimensions": layer_data.getAttribute("line_dimensions")["value"],
+            "feedrates": layer_data.getAttribute("feedrates")["value"],
+            "extruders": layer_data.getAttribute("extruders")["value"],
+            "line_types": layer_data.getAttribute("line_types")["value"]
+        }
+
+    def _getIndex(self) -> Dict[str, Dict[str, Any]]:
+        """Get the size and the last time of use of each stored result. Must be called with the lock held."""
+
+        if self._index is None:
+            self._index = {}
+            try:
+                with open(os.path.join(self._path, self.IndexFileName), encoding = "utf-8") as f:
+                    self._index = json.load(f)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError):
+                Logger.logException("w", "The slice cache index is corrupt. Clearing the slice cache.")
+                shutil.rmtree(self._path, ignore_errors = True)
+        return self._index
+
+    def _saveIndex(self) -> None:
+        try:
+            os.makedirs(self._path, exist_ok = True)
+            with open(os.path.join(self._path, self.IndexFileName), "w", encoding = "utf-8") as f:
+                json.dump(self._getIndex(), f)
+        except OSError:
+            Logger.logException("w", "Unable to save the slice cache index.")
+
+    def _remove(self, key: str) -> None:
+        del self._getIndex()[key]
+        shutil.rmtree(os.path.join(self._path, key), ignore_errors = True)
+
+    def _evict(self) -> None:
+        """Remove the results that were used the longest ago until the cache fits in its maximum size again."""
+
+        index = self._getIndex()
+        total_size = sum(entry["size"] for entry in index.values())
+        for key in sorted(index, key = lambda key: index[key]["last_used"]):
+            if total_size <= self._max_size:
+                break
+            total_size -= index[key]["size"]
+            self._remove(key)
+        self._saveIndex()
+
+
+class StoreSliceJob(Job):
+    """Job that writes the result of a slice to the slice cache, so that this doesn't hold up anything else."""
+
+    def __init__(self, slice_cache: SliceCache, key: str, gcode: Sequence[str], info: Dict[str, Any], layer_data: LayerData) -> None:
+        super().__init__()
+        self._slice_cache = slice_cache
+        self._key = key
+        self._gcode = gcode
+        self._info = info
+        self._layer_data = layer_data
+
+    def run(self) -> None:
+        self._slice_cache.store(self._key, self._gcode, self._info, self._layer_data)
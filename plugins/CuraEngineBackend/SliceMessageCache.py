@@ -0,0 +1,123 @@
+# Copyright (c) 2024 UltiMaker
+# Cura is released under the terms of the LGPLv3 or higher.
+
+from collections import OrderedDict
+import hashlib
+import threading
+from typing import Optional, Set, Tuple, TYPE_CHECKING
+
+import numpy
+
+if TYPE_CHECKING:
+    from UM.Math.Matrix import Matrix
+    from UM.Mesh.MeshData import MeshData
+
+
+class SliceMessageCache:
+    """Keeps the parts of a slice message that take long to build, so that the next slice message can reuse them.
+
+    Every slice needs a new slice message, but usually only one object moved or one setting changed since the previous
+    slice. The vertices of an object only need to be transformed again if its mesh or its transformation changed.
+    Entries that weren't used for the last slice message are removed, so the cache doesn't grow beyond one scene. When
+    the vertices of a scene take more than the maximum size, the entries that were used the longest ago are removed.
+    """
+
+    def __init__(self, max_size: int = 512 * 1024 * 1024) -> None:
+        """
+        :param max_size: The maximum total size of the cached vertices and indices, in bytes.
+        """
+
+        self._max_size = max_size
+        self._size = 0
+        self._objects = OrderedDict()  # type: OrderedDict[Tuple[int, bytes, bool], Tuple[MeshData, numpy.ndarray, Optional[numpy.ndarray], bytes]]
+        self._used_objects = set()  # type: Set[Tuple[int, bytes, bool]]
+        self._lock = threading.Lock()  # Slice messages are built in a job.
+
+    def getObjectMesh(self, mesh_data: "MeshData", transformation: "Matrix", indexed: bool = False) -> Tuple[numpy.ndarray, Optional[numpy.ndarray], bytes]:
+        """Get the vertices and indices of an object as they are sent to the engine.
+
+        :param mesh_data: The mesh of the object.
+        :param transformation: The world transformation of the object.
+        :param indexed: Whether to keep the vertices shared between faces, for an engine that supports indexed meshes.
+            Otherwise the vertices of each face are put after each other.
+        :return: The vertices in the coordinate system of the engine, the indices of the vertices of each face (None if
+            the vertices of each face are after each other), and a digest of them to use in the slice key.
+        """
+
+        key = (id(mesh_data), transformation.getData().tobytes(), indexed)
+        with self._lock:
+            self._used_objects.add(key)
+            entry = self._objects.get(key)
+            if entry is not None:
+                self._objects.move_to_end(key)
+                return entry[1], entry[2], entry[3]
+
+        vertices = transformVertices(mesh_data, transformation)
+        indices = mesh_data.getIndices()
+        digest = hashlib.sha256()
+        if indices is not None and indexed:
+            indices = numpy.ascontiguousarray(indices, dtype = numpy.int32)
+            digest.update(b"indexed")
+            digest.update(indices)
+        elif indices is not None:
+            vertices = numpy.take(vertices, indices.reshape(-1), axis = 0)
+            indices = None
+        digest.update(numpy.ascontiguousarray(vertices))
+
+        with self._lock:
+            # Keep the mesh data in the entry, so that its ID can't be reused by another mesh while it's cached.
+            self._removeObject(key)
+            self._objects[key] = (mesh_data, vertices, indices, digest.digest())
+            self._size += self._getEntrySize(self._objects[key])
+            while self._size > self._max_size:
+                self._removeObject(next(iter(self._objects)))
+        return vertices, indices, digest.digest()
+
+    def finishMessage(self) -> None:
+        """Indicate that a slice message is complete, to remove everything that it didn't use from the cache."""
+
+        with self._lock:
+            for key in [key for key in self._objects if key not in self._used_objects]:
+                self._removeObject(key)
+            self._used_objects = set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._objects = OrderedDict()
+            self._size = 0
+            self._used_objects = set()
+
+    def _removeObject(self, key: Tuple[int, bytes, bool]) -> None:
+        entry = self._objects.pop(key, None)
+        if entry is not None:
+            self._size -= self._getEntrySize(entry)
+
+    @staticmethod
+    def _getEntrySize(entry: Tuple["MeshData", numpy.ndarray, Optional[numpy.ndarray], bytes]) -> int:
+        return entry[1].nbytes + (entry[2].nbytes if entry[2] is not None else 0)
+
+
+def transformVertices(mesh_data: "MeshData", transformation: "Matrix") -> numpy.ndarray:
+    """Transform the vertices of a mesh to the coordinate system of the engine.
+
+    This effectively performs a limited form of MeshData.getTransformed that ignores normals, and converts from Y up
+    axes to Z up axes in the same matrix multiplication.
+
+    :param mesh_data: The mesh to get the vertices of.
+    :param transformation: The world transformation of the mesh.
+    :return: The transformed vertices, without applying the indices of the mesh.
+    """
+
+    data = transformation.getData()
+    rot_scale = data[0:3, 0:3].T.copy()
+    translate = data[:3, 3].copy()
+
+    # Convert from Y up axes to Z up axes. Equals a 90 degree rotation.
+    rot_scale[:, [1, 2]] = rot_scale[:, [2, 1]]
+    rot_scale[:, 1] *= -1
+    translate[[1, 2]] = translate[[2, 1]]
+    translate[1] *= -1
+
+    vertices = mesh_data.getVertices().dot(rot_scale)
+    vertices += translate
+    return vertices
@@ -1,5 +1,6 @@
 #  Copyright (c) 2024 UltiMaker
 #  Cura is released under the terms of the LGPLv3 or higher.
+import hashlib
 import uuid
 
 import numpy
@@ -28,12 +29,46 @@ from UM.Settings.SettingRelation import RelationType
 from cura.CuraApplication import CuraApplication
 from cura.Scene.CuraSceneNode import CuraSceneNode
 from cura.OneAtATimeIterator import OneAtATimeIterator
+from cura.Settings.CuraContainerStack import CuraContainerStack
 from cura.Settings.ExtruderManager import ExtruderManager
 from cura.CuraVersion import CuraVersion
 
+from .SliceMessageCache import SliceMessageCache
+
 
 NON_PRINTING_MESH_SETTINGS = ["anti_overhang_mesh", "infill_mesh", "cutting_mesh"]
 
+# Replacement tokens that are different every time, so they are left out of the slice key. If the g-code uses them, the
+# slice has no key at all.
+VOLATILE_REPLACEMENT_TOKENS = ["time", "date", "day"]
+VOLATILE_REPLACEMENT_TOKENS_PATTERN = re.compile(r"\{(%s)\b" % "|".join(VOLATILE_REPLACEMENT_TOKENS))
+
+# For each pair of global and extruder definitions, the keys of the settings that are not settable per extruder.
+_not_settable_per_extruder_cache: Dict[Tuple[str, str], Set[str]] = {}
+
+
+def _getNotSettablePerExtruderKeys(global_definition: ContainerInterface, own_definition: ContainerInterface) -> Set[str]:
+    """Get the keys of the settings that are not settable per extruder, according to the definitions of a machine.
+
+    Since this can only be set in definition files, it never changes, so it's only computed once per machine.
+
+    :param global_definition: The definition of the machine.
+    :param own_definition: The definition of the extruder.
+    :return: The keys of the settings that are not settable per extruder. Settings without definition are settable.
+    """
+
+    cache_key = (global_definition.getId(), own_definition.getId())
+    if cache_key not in _not_settable_per_extruder_cache:
+        keys = set()
+        for key in set(global_definition.getAllKeys()) | set(own_definition.getAllKeys()):
+            settable_per_extruder_global = global_definition.getProperty(key, "settable_per_extruder")
+            settable_per_extruder_own = own_definition.getProperty(key, "settable_per_extruder")
+            if (settable_per_extruder_global is not None or settable_per_extruder_own is not None) and not settable_per_extruder_global and \
+                    not settable_per_extruder_own:
+                keys.add(key)
+        _not_settable_per_extruder_cache[cache_key] = keys
+    return _not_settable_per_extruder_cache[cache_key]
+
 
 class StartJobResult(IntEnum):
     Finished = 1
@@ -61,15 +96,63 @@ class StartSliceJob(Job):
         # cache for all setting values from all stacks (global & extruder) for the current machine
         self._all_extruders_settings: Optional[Dict[str, Any]] = None
 
+        # Parts of the previous slice message that can be reused.
+        self._slice_message_cache: SliceMessageCache = SliceMessageCache()
+        # Whether to send the vertices and indices of meshes separately, rather than the vertices of each face.
+        self._indexed_meshes: bool = False
+        # Identifies the engine that is going to slice, for the slice key. None if it's unknown.
+        self._engine_identity: Optional[str] = None
+
+        # Hash of everything in the slice message that influences the result of the slice.
+        self._slice_key = hashlib.sha256()
+        self._slice_key_is_reproducible: bool = True
+
     def getSliceMessage(self) -> Arcus.PythonMessage:
         return self._slice_message
 
+    def getSliceKey(self) -> Optional[str]:
+        """Get a key that identifies the result of this slice.
+
+        Slicing the same models with the same settings again gives the same key, so the key can be used to look up the
+        result of an earlier slice. This is only valid once the job has finished.
+        :return: The key, or None if the result would be different every time, e.g. if the g-code contains the time.
+        """
+
+        if not self._slice_key_is_reproducible:
+            return None
+        return self._slice_key.hexdigest()
+
     def getAssociatedDisabledExtruders(self) -> List[int]:
         return self._associated_disabled_extruders
 
     def setBuildPlate(self, build_plate_number: int) -> None:
         self._build_plate_number = build_plate_number
 
+    def setSliceMessageCache(self, slice_message_cache: SliceMessageCache) -> None:
+        """Reuse the parts of the previous slice message that didn't change, and keep the parts of this one.
+
+        :param slice_message_cache: The cache to reuse parts from.
+        """
+
+        self._slice_message_cache = slice_message_cache
+
+    def setIndexedMeshes(self, indexed_meshes: bool) -> None:
+        """Send meshes with shared vertices and indices. Only do this if the engine advertised support for it.
+
+        :param indexed_meshes: Whether to send indexed meshes, rather than the vertices of each face after each other.
+        """
+
+        self._indexed_meshes = indexed_meshes
+
+    def setEngineIdentity(self, engine_identity: Optional[str]) -> None:
+        """Set what identifies the engine that is going to slice, so that the results of other engines aren't reused.
+
+        :param engine_identity: Something that changes whenever the engine does, e.g. its executable and when that was
+            modified. None if it's unknown, in which case the result of the slice can't be looked up by its key.
+        """
+
+        self._engine_identity = engine_identity
+
     def _checkStackForErrors(self, stack: ContainerStack) -> bool:
         """Check if a stack has any errors."""
 
@@ -109,6 +192,13 @@ class StartSliceJob(Job):
     def run(self) -> None:
         """Runs the job that initiates the slicing."""
 
+        try:
+            self._buildSliceMessage()
+        finally:
+            # Also if the slice message couldn't be built, so that the cache only keeps what this message used.
+            self._slice_message_cache.finishMessage()
+
+    def _buildSliceMessage(self) -> None:
         if self._build_plate_number is None:
             self.setResult(StartJobResult.Error)
             return
@@ -123,8 +213,7 @@ class StartSliceJob(Job):
             return
 
         # Wait for error checker to be done.
-        while CuraApplication.getInstance().getMachineErrorChecker().needToWaitForResult:
-            time.sleep(0.1)
+        CuraApplication.getInstance().getMachineErrorChecker().waitForResult()
 
         # Don't slice if there is a setting with an error value.
         if CuraApplication.getInstance().getMachineErrorChecker().hasError:
@@ -264,6 +353,10 @@ class StartSliceJob(Job):
         user_id %= 2 ** 16  # So to make it anonymous, apply a bitmask selecting only the last 16 bits. This prevents it from being traceable to a specific user but still gives somewhat of an idea of whether it's just the same user hitting the same crash over and over again, or if it's widespread.
         self._slice_message.sentry_id = f"{user_id}"
         self._slice_message.cura_version = CuraVersion
+        self._addToSliceKey("cura_version", CuraVersion)
+        if self._engine_identity is None:
+            self._slice_key_is_reproducible = False
+        self._addToSliceKey("engine", self._engine_identity)
 
         # Add the project name to the message if the user allows for non-anonymous crash data collection.
         account = CuraApplication.getInstance().getCuraAPI().account
@@ -296,9 +389,11 @@ class StartSliceJob(Job):
                 plugin_message.port = plugin.getPort()
                 plugin_message.plugin_name = plugin.getPluginId()
                 plugin_message.plugin_version = plugin.getVersion()
+                self._addToSliceKey("engine_plugin", slot, plugin.getPluginId(), plugin.getVersion())
 
         for group in filtered_object_groups:
             group_message = self._slice_message.addRepeatedMessage("object_lists")
+            self._addToSliceKey("object_list")
             parent = group[0].getParent()
             if parent is not None and parent.callDecoration("isGroup"):
                 self._handlePerObjectSettings(cast(CuraSceneNode, parent), group_message)
@@ -307,36 +402,28 @@ class StartSliceJob(Job):
                 mesh_data = object.getMeshData()
                 if mesh_data is None:
                     continue
-                rot_scale = object.getWorldTransformation().getTransposed().getData()[0:3, 0:3]
-                translate = object.getWorldTransformation().getData()[:3, 3]
-
-                # This effectively performs a limited form of MeshData.getTransformed that ignores normals.
-                verts = mesh_data.getVertices()
-                verts = verts.dot(rot_scale)
-                verts += translate
-
-                # Convert from Y up axes to Z up axes. Equals a 90 degree rotation.
-                verts[:, [1, 2]] = verts[:, [2, 1]]
-                verts[:, 1] *= -1
+                vertices, indices, mesh_digest = self._slice_message_cache.getObjectMesh(mesh_data, object.getWorldTransformation(), self._indexed_meshes)
 
                 obj = group_message.addRepeatedMessage("objects")
                 obj.id = id(object)
                 obj.name = object.getName()
-                indices = mesh_data.getIndices()
+                obj.vertices = vertices
                 if indices is not None:
-                    flat_verts = numpy.take(verts, indices.flatten(), axis=0)
-                else:
-                    flat_verts = numpy.array(verts)
-
-                obj.vertices = flat_verts
+                    obj.indices = indices
+                self._addToSliceKey("object", object.getName())
+                self._slice_key.update(mesh_digest)
 
                 uv_coordinates = mesh_data.getUVCoordinates()
                 if uv_coordinates is not None:
                     obj.uv_coordinates = uv_coordinates.flatten()
+                    self._addToSliceKey("uv_coordinates")
+                    self._slice_key.update(numpy.ascontiguousarray(uv_coordinates))
 
                 packed_texture = object.callDecoration("packTexture")
                 if packed_texture is not None:
                     obj.texture = packed_texture
+                    self._addToSliceKey("texture")
+                    self._slice_key.update(packed_texture)
 
                 self._handlePerObjectSettings(cast(CuraSceneNode, object), obj)
 
@@ -344,6 +431,28 @@ class StartSliceJob(Job):
 
         self.setResult(StartJobResult.Finished)
 
+    def _addToSliceKey(self, *values: Any) -> None:
+        """Add values that end up in the slice message to the slice key."""
+
+        self._slice_key.update(json.dumps([str(value) for value in values]).encode("utf-8"))
+
+    def _addSettingsToSliceKey(self, name: str, settings: Dict[str, Any]) -> None:
+        """Add the values of settings that end up in the slice message to the slice key.
+
+        The settings are added in a fixed order, since the order in which they are sent isn't always the same.
+        :param name: What the settings belong to, e.g. the global stack or an extruder.
+        :param settings: The values of the settings, by setting key.
+        """
+
+        self._addToSliceKey(name)
+        for key in sorted(settings):
+            if key in VOLATILE_REPLACEMENT_TOKENS:
+                continue
+            value = str(settings[key])
+            if VOLATILE_REPLACEMENT_TOKENS_PATTERN.search(value):
+                self._slice_key_is_reproducible = False
+            self._addToSliceKey(key, value)
+
     def cancel(self) -> None:
         super().cancel()
         self._is_cancelled = True
@@ -362,6 +471,9 @@ class StartSliceJob(Job):
         :return: A dictionary of replacement tokens to the values they should be replaced with.
         """
 
+        if isinstance(stack, CuraContainerStack):
+            return stack.getAllValues()
+
         result = {}
         for key in stack.getAllKeys():
             result[key] = stack.getProperty(key, "value")
@@ -473,23 +585,21 @@ class StartSliceJob(Job):
 
         global_definition = cast(ContainerInterface, cast(ContainerStack, stack.getNextStack()).getBottom())
         own_definition = cast(ContainerInterface, stack.getBottom())
+        # Do not send settings that are not settable_per_extruder.
+        # Since these can only be set in definition files, we only have to ask there.
+        # Settings that have no definition are those added manually, so include them.
+        not_settable_per_extruder = _getNotSettablePerExtruderKeys(global_definition, own_definition)
 
+        sent_settings = {}
         for key, value in settings.items():
-            # Do not send settings that are not settable_per_extruder.
-            # Since these can only be set in definition files, we only have to ask there.
-            # Settings that have no definition are those added manually, so include them.
-
-            settable_per_extruder_global = global_definition.getProperty(key, "settable_per_extruder")
-            settable_per_extruder_own = own_definition.getProperty(key, "settable_per_extruder")
-
-            if (settable_per_extruder_global is not None or settable_per_extruder_own is not None) and not settable_per_extruder_global and \
-                not settable_per_extruder_own:
+            if key in not_settable_per_extruder:
                 continue
 
             setting = message.getMessage("settings").addRepeatedMessage("settings")
             setting.name = key
             setting.value = str(value).encode("utf-8")
-            Job.yieldThread()
+            sent_settings[key] = value
+        self._addSettingsToSliceKey("extruder %s" % stack.getMetaDataEntry("position"), sent_settings)
 
     def _buildGlobalSettingsMessage(self, stack: ContainerStack) -> None:
         """Sends all global settings to the engine.
@@ -531,6 +641,7 @@ class StartSliceJob(Job):
             setting_message.name = key
             setting_message.value = str(value).encode("utf-8")
             Job.yieldThread()
+        self._addSettingsToSliceKey("global", settings)
 
     def _buildGlobalInheritsStackMessage(self, stack: ContainerStack) -> None:
         """Sends for some settings which extruder they should fallback to if not set.
@@ -542,13 +653,16 @@ class StartSliceJob(Job):
             limit_to_extruder property.
         """
 
+        limits = {}
         for key in stack.getAllKeys():
             extruder_position = int(round(float(stack.getProperty(key, "limit_to_extruder"))))
             if extruder_position >= 0:  # Set to a specific extruder.
                 setting_extruder = self._slice_message.addRepeatedMessage("limit_to_extruder")
                 setting_extruder.name = key
                 setting_extruder.extruder = extruder_position
+                limits[key] = extruder_position
             Job.yieldThread()
+        self._addSettingsToSliceKey("limit_to_extruder", limits)
 
     def _handlePerObjectSettings(self, node: CuraSceneNode, message: Arcus.PythonMessage):
         """Check if a node has per object settings and ensure that they are set correctly in the message
@@ -577,6 +691,7 @@ class StartSliceJob(Job):
         changed_setting_keys.add("extruder_nr")
 
         # Get values for all changed settings
+        sent_settings = {}
         for key in changed_setting_keys:
             setting = message.addRepeatedMessage("settings")
             setting.name = key
@@ -588,9 +703,12 @@ class StartSliceJob(Job):
             else:
                 limited_stack = stack
 
-            setting.value = str(limited_stack.getProperty(key, "value")).encode("utf-8")
+            value = limited_stack.getProperty(key, "value")
+            setting.value = str(value).encode("utf-8")
+            sent_settings[key] = value
 
             Job.yieldThread()
+        self._addSettingsToSliceKey("per_object", sent_settings)
 
     def _addRelations(self, relations_set: Set[str], relations: List[SettingRelation]):
         """Recursive function to put all settings that require each other for value changes in a list
@@ -0,0 +1,91 @@
+# Copyright (c) 2024 UltiMaker
+# Cura is released under the terms of the LGPLv3 or higher.
+
+import os
+import sys
+
+import numpy
+import pytest
+
+from cura.LayerDataBuilder import LayerDataBuilder
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from SliceCache import SliceCache
+
+material_color_map = numpy.array([[1, 0, 0, 1], [0, 1, 0, 1]], dtype = numpy.float32)
+print_duration = [{"travel": 12.5}, [1.0, 2.0], [3.0, 4.0], [5.0, 6.0], [7.0, 8.0], ["PLA", "PVA"]]
+
+pytestmark = pytest.mark.usefixtures("layer_color_map")
+
+
+def createLayerData(create_layer_polygon):
+    builder = LayerDataBuilder()
+    for layer_nr in [0, 1, 2]:
+        builder.addLayer(layer_nr)
+        builder.setLayerHeight(layer_nr, 0.2 * (layer_nr + 1))
+        builder.getLayer(layer_nr).polygons.append(create_layer_polygon([1, 1, 8, 2], extruder = 0, offset = layer_nr))
+        builder.getLayer(layer_nr).polygons.append(create_layer_polygon([6, 9, 6], extruder = 1, offset = 10 * layer_nr))
+    return builder.build(material_color_map)
+
+
+def test_storeAndGet(tmp_path, create_layer_polygon):
+    cache = SliceCache(str(tmp_path), 1024 * 1024)
+    expected = createLayerData(create_layer_polygon)
+    cache.store("abc", [";FLAVOR:Marlin\n", "G1 X10\n"], {"print_duration": print_duration}, expected)
+
+    cached_slice = cache.get("abc")
+    assert cached_slice is not None
+    assert cached_slice.getGCode() == [";FLAVOR:Marlin\n", "G1 X10\n"]
+    assert cached_slice.getPrintDuration() == print_duration
+    assert cached_slice.getInitialExtruder() is None
+
+    result = cached_slice.createLayerData(material_color_map)
+    numpy.testing.assert_array_equal(result.getVertices(), expected.getVertices())
+    numpy.testing.assert_array_equal(result.getIndices(), expected.getIndices())
+    numpy.testing.assert_array_equal(result.getColors(), expected.getColors())
+    for name in ["line_dimensions", "extruders", "colors", "line_types", "feedrates"]:
+        numpy.testing.assert_array_equal(result.getAttribute(name)["value"], expected.getAttribute(name)["value"])
+    assert result.getElementCounts() == expected.getElementCounts()
+    assert result.getLayer(1).height == pytest.approx(0.4)
+    numpy.testing.assert_array_equal(result.getLayer(2).polygons[1].data, expected.getLayer(2).polygons[1].data)
+
+
+def test_getGCodeWithSliceUUID(tmp_path, create_layer_polygon):
+    cache = SliceCache(str(tmp_path), 1024 * 1024)
+    cache.store("abc", [";FLAVOR:Marlin\n;SLICE_UUID:old-uuid\n;LAYER_COUNT:3\n", ";LAYER:0\n"], {"print_duration": print_duration}, createLayerData(create_layer_polygon))
+
+    gcode = cache.get("abc").getGCode("new-uuid")
+    assert gcode == [";FLAVOR:Marlin\n;SLICE_UUID:new-uuid\n;LAYER_COUNT:3\n", ";LAYER:0\n"]
+
+
+def test_getUnknown(tmp_path):
+    cache = SliceCache(str(tmp_path), 1024 * 1024)
+    assert cache.get("abc") is None
+    assert cache.get(None) is None
+
+
+def test_disabled(tmp_path, create_layer_polygon):
+    cache = SliceCache(str(tmp_path), 0)
+    cache.store("abc", [], {"print_duration": print_duration}, createLayerData(create_layer_polygon))
+    assert cache.get("abc") is None
+    assert not os.path.exists(os.path.join(str(tmp_path), "abc"))
+
+
+def test_evictLeastRecentlyUsed(tmp_path, create_layer_polygon):
+    cache = SliceCache(str(tmp_path), 1024 * 1024)
+    layer_data = createLayerData(create_layer_polygon)
+    for key in ["a", "b", "c"]:
+        cache.store(key, [], {"print_duration": print_duration}, layer_data)
+    cache.get("a")  # Now "b" was used the longest ago.
+
+    entry_size = sum(entry.stat().st_size for entry in os.scandir(os.path.join(str(tmp_path), "a")))
+    cache.setMaxSize(2 * entry_size)
+
+    assert cache.get("b") is None
+    assert not os.path.exists(os.path.join(str(tmp_path), "b"))
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+    # The index is kept on disk, so the results are still there when the cache is opened again.
+    assert SliceCache(str(tmp_path), 1024 * 1024).get("c") is not None
@@ -0,0 +1,107 @@
+# Copyright (c) 2024 UltiMaker
+# Cura is released under the terms of the LGPLv3 or higher.
+
+import os
+import sys
+from unittest.mock import MagicMock
+
+import numpy
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from SliceMessageCache import SliceMessageCache, transformVertices
+
+vertices = numpy.array([[0, 0, 0], [10, 0, 0], [0, 20, 0], [0, 0, 30]], dtype = numpy.float32)
+indices = numpy.array([[0, 1, 2], [0, 2, 3]], dtype = numpy.int32)
+transformation_data = numpy.array([[0, 0, 2, 5], [0, 1, 0, 6], [-2, 0, 0, 7], [0, 0, 0, 1]], dtype = numpy.float64)
+
+
+def createMeshData():
+    mesh_data = MagicMock()
+    mesh_data.getVertices = MagicMock(return_value = vertices)
+    mesh_data.getIndices = MagicMock(return_value = indices)
+    return mesh_data
+
+
+def createTransformation(data = transformation_data):
+    transformation = MagicMock()
+    transformation.getData = MagicMock(return_value = data)
+    return transformation
+
+
+def test_transformVertices():
+    # The way the vertices were transformed before: first the transformation, then converting the axes.
+    expected = vertices.dot(transformation_data.T[0:3, 0:3]) + transformation_data[:3, 3]
+    expected[:, [1, 2]] = expected[:, [2, 1]]
+    expected[:, 1] *= -1
+
+    numpy.testing.assert_array_equal(transformVertices(createMeshData(), createTransformation()), expected)
+
+
+def test_getObjectMesh():
+    cache = SliceMessageCache()
+    mesh_data = createMeshData()
+
+    result, result_indices, digest = cache.getObjectMesh(mesh_data, createTransformation())
+    assert result_indices is None
+    numpy.testing.assert_array_equal(result, numpy.take(transformVertices(mesh_data, createTransformation()), indices.reshape(-1), axis = 0))
+
+    mesh_data.getVertices.reset_mock()
+    cached_result, _, cached_digest = cache.getObjectMesh(mesh_data, createTransformation(transformation_data.copy()))
+    mesh_data.getVertices.assert_not_called()  # Same mesh and transformation, so nothing needs to be computed again.
+    assert cached_result is result
+    assert cached_digest == digest
+
+    moved = transformation_data.copy()
+    moved[0, 3] += 1
+    moved_result, _, moved_digest = cache.getObjectMesh(mesh_data, createTransformation(moved))
+    numpy.testing.assert_array_equal(moved_result[:, 0], result[:, 0] + 1)
+    assert moved_digest != digest
+
+
+def test_finishMessage():
+    cache = SliceMessageCache()
+    first_mesh = createMeshData()
+    second_mesh = createMeshData()
+    cache.getObjectMesh(first_mesh, createTransformation())
+    cache.getObjectMesh(second_mesh, createTransformation())
+    cache.finishMessage()
+
+    cache.getObjectMesh(first_mesh, createTransformation())  # The second mesh isn't in this slice any more.
+    cache.finishMessage()
+
+    first_mesh.getVertices.reset_mock()
+    second_mesh.getVertices.reset_mock()
+    cache.getObjectMesh(first_mesh, createTransformation())
+    cache.getObjectMesh(second_mesh, createTransformation())
+    first_mesh.getVertices.assert_not_called()
+    second_mesh.getVertices.assert_called_once()
+
+
+def test_maxSize():
+    entry_size = len(indices.reshape(-1)) * 3 * 8  # The flattened vertices of one object, as float64.
+    cache = SliceMessageCache(max_size = 2 * entry_size)
+    meshes = [createMeshData() for _ in range(3)]
+    cache.getObjectMesh(meshes[0], createTransformation())
+    cache.getObjectMesh(meshes[1], createTransformation())
+    cache.getObjectMesh(meshes[0], createTransformation())  # Now the second mesh is the one that was used the longest ago.
+    cache.getObjectMesh(meshes[2], createTransformation())
+
+    for mesh_data in meshes:
+        mesh_data.getVertices.reset_mock()
+        cache.getObjectMesh(mesh_data, createTransformation())
+    meshes[0].getVertices.assert_not_called()
+    meshes[1].getVertices.assert_called_once()
+
+
+def test_getObjectMeshIndexed():
+    cache = SliceMessageCache()
+    mesh_data = createMeshData()
+
+    indexed_vertices, indexed_indices, indexed_digest = cache.getObjectMesh(mesh_data, createTransformation(), indexed = True)
+    flat_vertices, _, flat_digest = cache.getObjectMesh(mesh_data, createTransformation(), indexed = False)
+
+    assert len(indexed_vertices) == len(vertices)  # Shared vertices are only sent once.
+    assert indexed_indices.dtype == numpy.int32
+    numpy.testing.assert_array_equal(indexed_vertices[indexed_indices.reshape(-1)], flat_vertices)  # But describe the same faces.
+    assert indexed_digest != flat_digest
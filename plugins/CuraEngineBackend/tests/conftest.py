@@ -0,0 +1,32 @@
+# Copyright (c) 2024 UltiMaker
+# Cura is released under the terms of the LGPLv3 or higher.
+
+from unittest.mock import patch
+import numpy
+import pytest
+
+from cura.LayerPolygon import LayerPolygon
+
+
+# Replaces the colours of the line types, which normally come from the theme, and returns the colours used instead.
+@pytest.fixture()
+def layer_color_map():
+    color_map = numpy.arange(LayerPolygon.getNumberOfTypes() * 4, dtype = numpy.float32).reshape((-1, 4)) / 60
+    with patch("cura.LayerPolygon.LayerPolygon.getColorMap", return_value = color_map):
+        yield color_map
+
+
+# Returns a function that creates layer polygons with the given line types. Unless the points are given, the lines
+# follow each other along a diagonal, shifted by the offset.
+@pytest.fixture()
+def create_layer_polygon():
+    def createLayerPolygon(line_types, extruder = 0, points = None, offset = 0.0) -> LayerPolygon:
+        line_count = len(line_types)
+        if points is None:
+            points = numpy.arange((line_count + 1) * 3, dtype = numpy.float32).reshape((-1, 3)) + offset
+        polygon = LayerPolygon(extruder, numpy.array(line_types, dtype = numpy.uint8).reshape((-1, 1)), numpy.array(points, dtype = numpy.float32),
+                               numpy.full((line_count, 1), 0.4, dtype = numpy.float32), numpy.full((line_count, 1), 0.2, dtype = numpy.float32),
+                               numpy.arange(line_count, dtype = numpy.float32).reshape((-1, 1)) + 10)
+        polygon.buildCache()
+        return polygon
+    return createLayerPolygon
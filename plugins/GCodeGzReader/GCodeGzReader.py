@@ -2,6 +2,8 @@
 # Cura is released under the terms of the LGPLv3 or higher.
 
 import gzip
+import struct
+from typing import Optional
 
 from UM.Mesh.MeshReader import MeshReader #The class we're extending/implementing.
 from UM.MimeTypeDatabase import MimeTypeDatabase, MimeType #To add the .gcode.gz files to the MIME type database.
@@ -26,10 +28,25 @@ class GCodeGzReader(MeshReader):
         self._supported_extensions = [".gcode.gz"]
 
     def _read(self, file_name):
-        with open(file_name, "rb") as file:
-            file_data = file.read()
-        uncompressed_gcode = gzip.decompress(file_data).decode("utf-8")
-        PluginRegistry.getInstance().getPluginObject("GCodeReader").preReadFromStream(uncompressed_gcode)
-        result = PluginRegistry.getInstance().getPluginObject("GCodeReader").readFromStream(uncompressed_gcode, file_name)
+        gcode_reader = PluginRegistry.getInstance().getPluginObject("GCodeReader")
+        # The g-code is decompressed while it's parsed, so it's never in memory as a whole.
+        with gzip.open(file_name, "rt", encoding = "utf-8") as file:
+            gcode_reader.preReadFromStream(file)  # Only reads the header.
+        with gzip.open(file_name, "rt", encoding = "utf-8") as file:
+            result = gcode_reader.readFromStream(file, file_name, self._getUncompressedSize(file_name), gcode_reader.getCacheKey(file_name))
 
         return result
+
+    @staticmethod
+    def _getUncompressedSize(file_name: str) -> Optional[int]:
+        """Get the size of the g-code when it's decompressed, to show the progress of reading it.
+
+        The size is stored at the end of the file. It is only correct up to 4 GB, which is good enough for the progress.
+        """
+
+        try:
+            with open(file_name, "rb") as file:
+                file.seek(-4, 2)
+                return struct.unpack("<I", file.read(4))[0]
+        except (OSError, struct.error):
+            return None
@@ -2,7 +2,9 @@
 # Cura is released under the terms of the LGPLv3 or higher.
 
 import gzip
-from io import StringIO, BufferedIOBase #To write the g-code to a temporary buffer, and for typing.
+import shutil
+import tempfile
+from io import TextIOWrapper, BufferedIOBase #To write the g-code as text to the compressed stream, and for typing.
 from typing import cast, List
 
 from UM.Logger import Logger
@@ -20,6 +22,7 @@ class GCodeGzWriter(MeshWriter):
     If you're zipping g-code, you might as well use gzip!
     """
 
+    _spool_max_size = 16 * 1024 * 1024  # Compressed g-code up to this size is kept in memory before it's written, larger g-code in a temporary file.
 
     def __init__(self) -> None:
         super().__init__(add_to_recent_files = False)
@@ -43,14 +46,18 @@ class GCodeGzWriter(MeshWriter):
             self.setInformation(catalog.i18nc("@error:not supported", "GCodeGzWriter does not support text mode."))
             return False
 
-        #Get the g-code from the g-code writer.
-        gcode_textio = StringIO() #We have to convert the g-code into bytes.
+        #Get the g-code from the g-code writer, compressing it while it's written so that it's never in memory as a whole.
+        #It's compressed into a spool first, so that nothing is written to the stream if there turns out to be no g-code.
         gcode_writer = cast(MeshWriter, PluginRegistry.getInstance().getPluginObject("GCodeWriter"))
-        success = gcode_writer.write(gcode_textio, None)
-        if not success: #Writing the g-code failed. Then I can also not write the gzipped g-code.
-            self.setInformation(gcode_writer.getInformation())
-            return False
-
-        result = gzip.compress(gcode_textio.getvalue().encode("utf-8"))
-        stream.write(result)
+        with tempfile.SpooledTemporaryFile(max_size = self._spool_max_size) as spool:
+            with gzip.GzipFile(filename = "", mode = "wb", fileobj = spool) as gzip_stream:
+                gcode_textio = TextIOWrapper(gzip_stream, encoding = "utf-8", newline = "") #We have to convert the g-code into bytes.
+                success = gcode_writer.write(gcode_textio, None)
+                gcode_textio.flush()
+                gcode_textio.detach() #Leave closing the compressed stream to the GzipFile.
+            if not success: #Writing the g-code failed. Then I can also not write the gzipped g-code.
+                self.setInformation(gcode_writer.getInformation())
+                return False
+            spool.seek(0)
+            shutil.copyfileobj(spool, stream)
         return True
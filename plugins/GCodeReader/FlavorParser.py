@@ -1,9 +1,13 @@
 # Copyright (c) 2022 Ultimaker B.V.
 # Cura is released under the terms of the LGPLv3 or higher.
 
+import concurrent.futures
+import hashlib
+import io
 import math
 import re
-from typing import Dict, List, NamedTuple, Optional, Union, Set
+from time import time
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union, Set
 
 import numpy
 
@@ -11,6 +15,7 @@ from UM.Backend import Backend
 from UM.Job import Job
 from UM.Logger import Logger
 from UM.Math.Vector import Vector
+from UM.Mesh.MeshData import MeshData
 from UM.Message import Message
 from UM.i18n import i18nCatalog
 
@@ -18,14 +23,113 @@ from cura.CuraApplication import CuraApplication
 from cura.LayerDataBuilder import LayerDataBuilder
 from cura.LayerDataDecorator import LayerDataDecorator
 from cura.LayerPolygon import LayerPolygon
+from cura.Scene.BuildPlateDecorator import BuildPlateDecorator
 from cura.Scene.CuraSceneNode import CuraSceneNode
 from cura.Scene.GCodeListDecorator import GCodeListDecorator
+from cura.Scene.GCodeStore import GCodeStore
 from cura.Settings.ExtruderManager import ExtruderManager
 
 catalog = i18nCatalog("cura")
 
 PositionOptional = NamedTuple("PositionOptional", [("x", Optional[float]), ("y", Optional[float]), ("z", Optional[float]), ("f", Optional[float]), ("e", Optional[float])])
-Position = NamedTuple("Position", [("x", float), ("y", float), ("z", float), ("f", float), ("e", List[float])])
+
+
+class Position:
+    """The state of the head: the X, Y and Z position, the F feedrate and the E value of each extruder.
+
+    The g-code commands update the state in place, rather than creating a new state for each move.
+    """
+
+    __slots__ = ("x", "y", "z", "f", "e")
+
+    def __init__(self, x: float, y: float, z: float, f: float, e: List[float]) -> None:
+        self.x = x
+        self.y = y
+        self.z = z
+        self.f = f
+        self.e = e
+
+    def __iter__(self) -> Iterator[Union[float, List[float]]]:
+        return iter((self.x, self.y, self.z, self.f, self.e))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Position):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __repr__(self) -> str:
+        return "Position(x={x}, y={y}, z={z}, f={f}, e={e})".format(x = self.x, y = self.y, z = self.z, f = self.f, e = self.e)
+
+
+class PathBuffer:
+    """The points of a path, with a row of [x, y, z, f, e, line type] for each point.
+
+    The rows are kept in one array that grows as needed, rather than in a list per point, so that long paths don't
+    create lots of small objects.
+    """
+
+    __slots__ = ("_data", "_size")
+
+    COLUMN_COUNT = 6
+
+    def __init__(self, capacity: int = 1024) -> None:
+        """
+        :param capacity: The number of points to make room for initially.
+        """
+
+        self._data = numpy.empty((capacity, self.COLUMN_COUNT), dtype = numpy.float64)
+        self._size = 0
+
+    def _reserve(self, count: int) -> None:
+        required_size = self._size + count
+        if required_size > len(self._data):
+            # Grow to at least double the size, so that adding points one at a time doesn't copy the buffer each time.
+            data = numpy.empty((max(required_size, 2 * len(self._data)), self.COLUMN_COUNT), dtype = numpy.float64)
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+
+    def append(self, point: Sequence[float]) -> None:
+        self._reserve(1)
+        self._data[self._size] = point
+        self._size += 1
+
+    def extend(self, points: numpy.ndarray) -> None:
+        """Add a number of points at once.
+
+        :param points: An array with a row for each point.
+        """
+
+        self._reserve(len(points))
+        self._data[self._size:self._size + len(points)] = points
+        self._size += len(points)
+
+    def clear(self) -> None:
+        self._size = 0  # Keep the memory, for the next path.
+
+    def getData(self) -> numpy.ndarray:
+        """Get the points in the buffer.
+
+        :return: A view on the buffer, which is only valid until points are added or the buffer is cleared.
+        """
+
+        return self._data[:self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+
+def _fillForward(values: numpy.ndarray, initial: List[float]) -> numpy.ndarray:
+    """Replace the NaN values in each column by the last value above them that isn't NaN.
+
+    :param values: The array to fill, with a column for each value.
+    :param initial: The values to use for the NaN values at the top of each column.
+    :return: A filled copy of the array.
+    """
+
+    values = numpy.vstack([initial, values])
+    indices = numpy.where(numpy.isnan(values), 0, numpy.arange(len(values))[:, numpy.newaxis])
+    numpy.maximum.accumulate(indices, axis = 0, out = indices)
+    return values[indices, numpy.arange(values.shape[1])][1:]
 
 
 class FlavorParser:
@@ -33,6 +137,13 @@ class FlavorParser:
 
     MAX_EXTRUDER_COUNT = 16
     DEFAULT_FILAMENT_DIAMETER = 2.85
+    MAX_MOVE_BLOCK_SIZE = 10000  # Maximum number of consecutive moves that are parsed at once.
+    _preview_publish_interval = 1.0  # Minimum time in seconds between layer view updates while the file is parsed.
+
+    _move_pattern = re.compile(r"\s*G0*[01](?=[\s;]|$)")
+    _comment_pattern = re.compile(r";[^\n]*")
+    # Finds the X, Y, Z, F and E parameters and the line breaks in upper case g-code without comments.
+    _parameter_pattern = re.compile(r"(?<!\S)[XYZFE][-+]?(?:\d+\.?\d*|\.\d+)(?!\S)|\n")
 
     def __init__(self) -> None:
         CuraApplication.getInstance().hideMessageSignal.connect(self._onHideMessage)
@@ -52,6 +163,14 @@ class FlavorParser:
         self._current_filament_diameter = 2.85       # default
         self._previous_extrusion_value = 0.0  # keep track of the filament retractions
 
+        # The layers are converted to their final vertex arrays in worker threads while the rest of the file is parsed.
+        # The parsing itself isn't split up: the position, positioning mode and extruder offsets carry over from one
+        # line to the next, so the lines are parsed in order, in this thread.
+        self._layer_mesh_executor = None  # type: Optional[concurrent.futures.ThreadPoolExecutor]
+        self._layer_mesh_futures = {}  # type: Dict[int, concurrent.futures.Future]
+        self._unbuilt_layers = set()  # type: Set[int] # Layers that got polygons since they were last converted.
+        self._preview_node = None  # type: Optional[CuraSceneNode] # Shows the layers parsed so far.
+
         CuraApplication.getInstance().getPreferences().addPreference("gcodereader/show_caution", True)
 
     def _clearValues(self) -> None:
@@ -98,55 +217,40 @@ class FlavorParser:
         if message == self._message:
             self._cancelled = True
 
-    def _createPolygon(self, layer_thickness: float, path: List[List[Union[float, int]]], extruder_offsets: List[float]) -> bool:
-        countvalid = 0
-        for point in path:
-            if point[5] > 0:
-                countvalid += 1
-                if countvalid >= 2:
-                    # we know what to do now, no need to count further
-                    continue
-        if countvalid < 2:
+    def _createPolygon(self, layer_thickness: float, path: PathBuffer, extruder_offsets: List[float]) -> bool:
+        path_data = path.getData()
+        if numpy.count_nonzero(path_data[:, 5] > 0) < 2:
             return False
         try:
             self._layer_data_builder.addLayer(self._layer_number)
-            self._layer_data_builder.setLayerHeight(self._layer_number, path[0][2])
+            self._layer_data_builder.setLayerHeight(self._layer_number, path_data[0, 2])
             self._layer_data_builder.setLayerThickness(self._layer_number, layer_thickness)
             this_layer = self._layer_data_builder.getLayer(self._layer_number)
             if not this_layer:
                 return False
         except ValueError:
             return False
-        count = len(path)
-        line_types = numpy.empty((count - 1, 1), numpy.int32)
-        line_widths = numpy.empty((count - 1, 1), numpy.float32)
-        line_thicknesses = numpy.empty((count - 1, 1), numpy.float32)
-        line_feedrates = numpy.empty((count - 1, 1), numpy.float32)
-        line_widths[:, 0] = 0.35  # Just a guess
-        line_thicknesses[:, 0] = layer_thickness
+        count = len(path_data)
         points = numpy.empty((count, 3), numpy.float32)
-        extrusion_values = numpy.empty((count, 1), numpy.float32)
-        i = 0
-        for point in path:
-            points[i, :] = [point[0] + extruder_offsets[0], point[2], -point[1] - extruder_offsets[1]]
-            extrusion_values[i] = point[4]
-            if i > 0:
-                line_feedrates[i - 1] = point[3]
-                line_types[i - 1] = point[5]
-                if point[5] in [LayerPolygon.MoveUnretractedType,
-                                LayerPolygon.MoveRetractedType,
-                                LayerPolygon.MoveWhileRetractingType,
-                                LayerPolygon.MoveWhileUnretractingType]:
-                    line_widths[i - 1] = 0.1
-                    line_thicknesses[i - 1] = 0.0 # Travels are set as zero thickness lines
-                else:
-                    line_widths[i - 1] = self._calculateLineWidth(points[i], points[i-1], extrusion_values[i], extrusion_values[i-1], layer_thickness)
-            i += 1
+        points[:, 0] = path_data[:, 0] + extruder_offsets[0]
+        points[:, 1] = path_data[:, 2]
+        points[:, 2] = -path_data[:, 1] - extruder_offsets[1]
+        extrusion_values = path_data[:, 4].astype(numpy.float32)
+        line_types = path_data[1:, 5].astype(numpy.int32).reshape((-1, 1))
+        line_feedrates = path_data[1:, 3].astype(numpy.float32).reshape((-1, 1))
+
+        travels = numpy.isin(line_types, [LayerPolygon.MoveUnretractedType,
+                                          LayerPolygon.MoveRetractedType,
+                                          LayerPolygon.MoveWhileRetractingType,
+                                          LayerPolygon.MoveWhileUnretractingType])
+        line_widths = numpy.where(travels, 0.1, self._calculateLineWidths(points, extrusion_values, layer_thickness)).astype(numpy.float32)
+        line_thicknesses = numpy.where(travels, 0.0, layer_thickness).astype(numpy.float32)  # Travels are set as zero thickness lines
 
         this_poly = LayerPolygon(self._extruder_number, line_types, points, line_widths, line_thicknesses, line_feedrates)
         this_poly.buildCache()
 
         this_layer.polygons.append(this_poly)
+        self._unbuilt_layers.add(self._layer_number)
         return True
 
     def _createEmptyLayer(self, layer_number: int) -> None:
@@ -154,32 +258,34 @@ class FlavorParser:
         self._layer_data_builder.setLayerHeight(layer_number, 0)
         self._layer_data_builder.setLayerThickness(layer_number, 0)
 
-    def _calculateLineWidth(self, current_point: Position, previous_point: Position, current_extrusion: float, previous_extrusion: float, layer_thickness: float) -> float:
+    def _calculateLineWidths(self, points: numpy.ndarray, extrusion_values: numpy.ndarray, layer_thickness: float) -> numpy.ndarray:
+        """Calculate the widths of the lines between consecutive points of a path.
+
+        :param points: The points of the path, in scene coordinates.
+        :param extrusion_values: The extrusion value at each point of the path.
+        :param layer_thickness: The thickness of the lines.
+        :return: A column with the width of each line.
+        """
+
         # Area of the filament
         Af = (self._current_filament_diameter / 2) ** 2 * numpy.pi
-        # Length of the extruded filament
-        de = current_extrusion - previous_extrusion
         # Volume of the extruded filament
-        dVe = de * Af
-        # Length of the printed line
-        dX = numpy.sqrt((current_point[0] - previous_point[0])**2 + (current_point[2] - previous_point[2])**2)
-        # When the extruder recovers from a retraction, we get zero distance
-        if dX == 0:
-            return 0.1
-        # Area of the printed line. This area is a rectangle
-        Ae = dVe / dX
-        # This area is a rectangle with area equal to layer_thickness * layer_width
-        line_width = Ae / layer_thickness
+        dVe = numpy.diff(extrusion_values) * Af
+        # Length of the printed lines
+        dX = numpy.sqrt(numpy.diff(points[:, 0]) ** 2 + numpy.diff(points[:, 2]) ** 2)
+        with numpy.errstate(divide = "ignore", invalid = "ignore"):
+            # Area of the printed line. This area is a rectangle with area equal to layer_thickness * layer_width
+            line_widths = dVe / dX / layer_thickness
 
         # A threshold is set to avoid weird paths in the GCode
-        if line_width > 1.2:
-            return 0.35
+        line_widths[line_widths > 1.2] = 0.35
         # Prevent showing infinitely wide lines
-        if line_width < 0.0:
-            return 0.0
-        return line_width
+        line_widths[line_widths < 0.0] = 0.0
+        # When the extruder recovers from a retraction, we get zero distance
+        line_widths[dX == 0] = 0.1
+        return line_widths.reshape((-1, 1))
 
-    def _gCode0(self, position: Position, params: PositionOptional, path: List[List[Union[float, int]]]) -> Position:
+    def _gCode0(self, position: Position, params: PositionOptional, path: PathBuffer) -> Position:
         x, y, z, f, e = position
 
         if self._is_absolute_positioning:
@@ -211,37 +317,36 @@ class FlavorParser:
             path.append([x, y, z, f, e[self._extruder_number] + self._extrusion_length_offset[self._extruder_number], LayerPolygon.MoveRetractedType])
         else:
             path.append([x, y, z, f, e[self._extruder_number] + self._extrusion_length_offset[self._extruder_number], LayerPolygon.MoveUnretractedType])
-        return self._position(x, y, z, f, e)
+        position.x, position.y, position.z, position.f = x, y, z, f
+        return position
 
 
     # G0 and G1 should be handled exactly the same.
     _gCode1 = _gCode0
 
-    def _gCode28(self, position: Position, params: PositionOptional, path: List[List[Union[float, int]]]) -> Position:
+    def _gCode28(self, position: Position, params: PositionOptional, path: PathBuffer) -> Position:
         """Home the head."""
 
-        return self._position(
-            params.x if params.x is not None else position.x,
-            params.y if params.y is not None else position.y,
-            params.z if params.z is not None else position.z,
-            position.f,
-            position.e)
+        position.x = params.x if params.x is not None else position.x
+        position.y = params.y if params.y is not None else position.y
+        position.z = params.z if params.z is not None else position.z
+        return position
 
-    def _gCode90(self, position: Position, params: PositionOptional, path: List[List[Union[float, int]]]) -> Position:
+    def _gCode90(self, position: Position, params: PositionOptional, path: PathBuffer) -> Position:
         """Set the absolute positioning"""
 
         self._is_absolute_positioning = True
         self._is_absolute_extrusion = True
         return position
 
-    def _gCode91(self, position: Position, params: PositionOptional, path: List[List[Union[float, int]]]) -> Position:
+    def _gCode91(self, position: Position, params: PositionOptional, path: PathBuffer) -> Position:
         """Set the relative positioning"""
 
         self._is_absolute_positioning = False
         self._is_absolute_extrusion = False
         return position
 
-    def _gCode92(self, position: Position, params: PositionOptional, path: List[List[Union[float, int]]]) -> Position:
+    def _gCode92(self, position: Position, params: PositionOptional, path: PathBuffer) -> Position:
         """Reset the current position to the values specified.
 
         For example: G92 X10 will set the X to 10 without any physical motion.
@@ -254,14 +359,13 @@ class FlavorParser:
             self._previous_extrusion_value = params.e
         else:
             self._previous_extrusion_value = 0.0
-        return self._position(
-            params.x if params.x is not None else position.x,
-            params.y if params.y is not None else position.y,
-            params.z if params.z is not None else position.z,
-            params.f if params.f is not None else position.f,
-            position.e)
-
-    def processGCode(self, G: int, line: str, position: Position, path: List[List[Union[float, int]]]) -> Position:
+        position.x = params.x if params.x is not None else position.x
+        position.y = params.y if params.y is not None else position.y
+        position.z = params.z if params.z is not None else position.z
+        position.f = params.f if params.f is not None else position.f
+        return position
+
+    def processGCode(self, G: int, line: str, position: Position, path: PathBuffer) -> Position:
         func = getattr(self, "_gCode%s" % G, None)
         line = line.split(";", 1)[0]  # Remove comments (if any)
         if func is not None:
@@ -289,7 +393,92 @@ class FlavorParser:
             return func(position, params, path)
         return position
 
-    def processTCode(self, global_stack, T: int, line: str, position: Position, path: List[List[Union[float, int]]]) -> Position:
+    @classmethod
+    def _parseMoveParameters(cls, lines: List[str]) -> numpy.ndarray:
+        """Parse the parameters of a block of G0 and G1 lines at once.
+
+        :param lines: The lines, each ending with a line break.
+        :return: A row of [x, y, z, f, e] for each line, with NaN for the parameters that a line doesn't have.
+        """
+
+        result = numpy.full((len(lines), 5), numpy.nan)
+        text = "".join(lines).upper()
+        if ";" in text:
+            text = cls._comment_pattern.sub("", text)
+        words = cls._parameter_pattern.findall(text)
+        if not words:
+            return result
+
+        # Split the words into their codes and their values. The line breaks are words too, to count the lines.
+        data = numpy.frombuffer(" ".join(words).encode("ascii"), numpy.uint8).copy()
+        starts = numpy.concatenate([[0], numpy.flatnonzero(data == ord(" ")) + 1])
+        codes = data[starts]
+        data[starts] = ord(" ")
+        values = numpy.array(data.tobytes().split(), dtype = numpy.float64)
+        is_parameter = codes != ord("\n")
+        line_numbers = numpy.cumsum(~is_parameter)[is_parameter]
+        codes = codes[is_parameter]
+
+        for column, code in enumerate(b"XYZFE"):
+            selected = codes == code
+            result[line_numbers[selected], column] = values[selected]
+        result[:, 3] /= 60
+        return result
+
+    def _processMoves(self, lines: List[str], position: Position, path: PathBuffer) -> Position:
+        """Process a block of consecutive G0 and G1 lines at once.
+
+        This gives the same result as processing each line with processGCode, but computes the positions of the whole
+        block with array operations. The positioning and extrusion modes can't change within the block.
+
+        :param lines: The lines, each ending with a line break.
+        :param position: The position before the first line.
+        :param path: The path to add the moves to.
+        :return: The position after the last line.
+        """
+
+        params = self._parseMoveParameters(lines)
+        has_params = ~numpy.isnan(params)
+
+        if self._is_absolute_positioning:
+            xyz = _fillForward(params[:, 0:3], [position.x, position.y, position.z])
+        else:
+            xyz = numpy.cumsum(numpy.vstack([[position.x, position.y, position.z], numpy.nan_to_num(params[:, 0:3])]), axis = 0)[1:]
+        f = _fillForward(params[:, 3:4], [position.f])[:, 0]
+
+        e_before = position.e[self._extruder_number]
+        has_e = has_params[:, 4]
+        if self._is_absolute_extrusion:
+            e = _fillForward(params[:, 4:5], [e_before])[:, 0]
+        else:
+            e = numpy.cumsum(numpy.concatenate([[e_before], numpy.nan_to_num(params[:, 4])]))[1:]
+        previous_e = numpy.concatenate([[e_before], e[:-1]])
+        extruding = has_e & (e > previous_e)
+        extrusion_values = _fillForward(numpy.where(extruding, e, numpy.nan)[:, numpy.newaxis], [self._previous_extrusion_value])[:, 0]
+        previous_extrusion_values = numpy.concatenate([[self._previous_extrusion_value], extrusion_values[:-1]])
+
+        line_types = numpy.full(len(lines), LayerPolygon.MoveUnretractedType, dtype = numpy.float64)
+        line_types[(has_e & ~extruding) | (~has_e & (previous_extrusion_values > e))] = LayerPolygon.MoveRetractedType
+        line_types[extruding] = self._layer_type
+        path.extend(numpy.column_stack([xyz, f, e + self._extrusion_length_offset[self._extruder_number], line_types]))
+
+        # Only when extruding we can determine the latest known "layer height" which is the difference in height between extrusions
+        # Also, 1.5 is a heuristic for any priming or whatsoever, we skip those.
+        z = xyz[has_e & (has_params[:, 0] | has_params[:, 1]), 2]
+        changed = numpy.ones(len(z), dtype = bool)
+        changed[1:] = z[1:] != z[:-1]
+        for layer_z in z[changed]:
+            if layer_z > self._previous_z and (layer_z - self._previous_z < 1.5):
+                self._current_layer_thickness = layer_z - self._previous_z  # allow a tiny overlap
+                self._previous_z = layer_z
+
+        self._previous_extrusion_value = float(extrusion_values[-1])
+        position.e[self._extruder_number] = float(e[-1])
+        position.x, position.y, position.z = (float(value) for value in xyz[-1])
+        position.f = float(f[-1])
+        return position
+
+    def processTCode(self, global_stack,T: int, line: str, position: Position, path: PathBuffer) -> Position:
         self._extruder_number = T
         try:
             self._current_filament_diameter = global_stack.extruderList[self._extruder_number].getProperty("material_diameter", "value")
@@ -301,7 +490,7 @@ class FlavorParser:
             position.e.extend([0] * (self._extruder_number - len(position.e) + 1))
         return position
 
-    def processMCode(self, M: int, line: str, position: Position, path: List[List[Union[float, int]]]) -> None:
+    def processMCode(self, M: int, line: str, position: Position, path: PathBuffer) -> None:
         # Set extrusion mode
         if M == 82:
             # Set absolute extrusion mode
@@ -328,7 +517,19 @@ class FlavorParser:
     # This function needs the filename so it can be set to the SceneNode. Otherwise, if you load a GCode file and press
     # F5, that gcode SceneNode will be removed because it doesn't have a file to be reloaded from.
     #
-    def processGCodeStream(self, stream: str, filename: str) -> Optional["CuraSceneNode"]:
+    def processGCodeStream(self, stream: Union[str, Iterable[str]], filename: str, stream_size: Optional[int] = None, cache_key: Optional[str] = None) -> Optional["CuraSceneNode"]:
+        """Parse g-code into layer data.
+
+        :param stream: The g-code, or its lines (each ending with a line break), for instance a file that is read while
+            parsing.
+        :param filename: The file the g-code was read from.
+        :param stream_size: The length of the g-code, to show the progress. If the g-code is a string, its own length
+            is used.
+        :param cache_key: A key that identifies the contents of the g-code file. If given, the layers are stored in the
+            slice cache, so that they don't need to be parsed again when the same file is opened again.
+        :return: A scene node with the layer data of the g-code.
+        """
+
         Logger.log("d", "Preparing to load g-code")
         self._cancelled = False
         # We obtain the filament diameter from the selected extruder to calculate line widths
@@ -343,26 +544,185 @@ class FlavorParser:
             # There can be a mismatch between the number of extruders in the G-Code file and the number of extruders in the current machine.
             self._current_filament_diameter = self.DEFAULT_FILAMENT_DIAMETER
 
-        scene_node = CuraSceneNode()
+        if isinstance(stream, str):
+            stream_size = len(stream)
+            stream = io.StringIO(stream)
 
-        gcode_list = []
-        self._is_layers_in_file = False
+        scene_node = CuraSceneNode()
 
         self._extruder_offsets = self._extruderOffsets()  # dict with index the extruder number. can be empty
 
+        material_color_map = numpy.zeros((8, 4), dtype = numpy.float32)
+        material_color_map[0, :] = [0.0, 0.7, 0.9, 1.0]
+        material_color_map[1, :] = [0.7, 0.9, 0.0, 1.0]
+        material_color_map[2, :] = [0.9, 0.0, 0.7, 1.0]
+        material_color_map[3, :] = [0.7, 0.0, 0.0, 1.0]
+        material_color_map[4, :] = [0.0, 0.7, 0.0, 1.0]
+        material_color_map[5, :] = [0.0, 0.0, 0.7, 1.0]
+        material_color_map[6, :] = [0.3, 0.3, 0.3, 1.0]
+        material_color_map[7, :] = [0.7, 0.7, 0.7, 1.0]
+        slice_cache = None
+        if cache_key is not None:
+            # Only CuraEngine's backend has a slice cache.
+            get_slice_cache = getattr(CuraApplication.getInstance().getBackend(), "getSliceCache", None)
+            slice_cache = get_slice_cache() if get_slice_cache is not None else None
+        if slice_cache is not None:
+            cache_key = self._getCacheKey(cache_key, global_stack)
+        cached_slice = slice_cache.get(cache_key) if slice_cache is not None else None
+        gcode_list = None  # type: Optional[GCodeStore]
+        if cached_slice is not None:
+            try:
+                layer_mesh = cached_slice.createLayerData(material_color_map)
+                gcode_list = cached_slice.getGCode()
+                self._layer_number = len(layer_mesh.getLayers())
+                Logger.log("d", "Loaded the layers of the g-code from the slice cache.")
+            except (OSError, ValueError):
+                Logger.logException("w", "Unable to load the layers of the g-code from the slice cache.")
+                gcode_list = None
+
+        if gcode_list is None:
+            worker_count = int(CuraApplication.getInstance().getPreferences().getValue("layerview/layer_processing_threads") or 1)
+            if worker_count > 1:
+                self._layer_mesh_executor = concurrent.futures.ThreadPoolExecutor(max_workers = worker_count)
+            try:
+                gcode_list = self._parseGCode(stream, stream_size, global_stack, material_color_map)
+                if gcode_list is None:  # Cancelled.
+                    return None
+                self._buildLayerMeshes()
+                for future in self._layer_mesh_futures.values():
+                    future.result()
+                layer_mesh = self._layer_data_builder.build(material_color_map)
+            finally:
+                if self._layer_mesh_executor is not None:
+                    self._layer_mesh_executor.shutdown(cancel_futures = True)
+                    self._layer_mesh_executor = None
+                self._layer_mesh_futures = {}
+                self._unbuilt_layers = set()
+                self._removePreview()
+            if slice_cache is not None:
+                slice_cache.storeInBackground(cache_key, gcode_list.copy(), {"print_duration": []}, layer_mesh)
+
+        decorator = LayerDataDecorator()
+        decorator.setLayerData(layer_mesh)
+        scene_node.addDecorator(decorator)
+
+        gcode_list_decorator = GCodeListDecorator()
+        gcode_list_decorator.setGcodeFileName(filename)
+        gcode_list_decorator.setGCodeList(gcode_list)
+        scene_node.addDecorator(gcode_list_decorator)
+
+        # gcode_dict stores gcode_lists for a number of build plates.
+        active_build_plate_id = CuraApplication.getInstance().getMultiBuildPlateModel().activeBuildPlate
+        gcode_dict = {active_build_plate_id: gcode_list}
+        CuraApplication.getInstance().getController().getScene().gcode_dict = gcode_dict #type: ignore #Because gcode_dict is generated dynamically.
+
+        if self._layer_number == 0:
+            Logger.log("w", "File doesn't contain any valid layers")
+
+        if not global_stack.getProperty("machine_center_is_zero", "value"):
+            machine_width = global_stack.getProperty("machine_width", "value")
+            machine_depth = global_stack.getProperty("machine_depth", "value")
+            scene_node.setPosition(Vector(-machine_width / 2, 0, machine_depth / 2))
+
+        Logger.log("d", "G-code loading finished.")
+
+        if CuraApplication.getInstance().getPreferences().getValue("gcodereader/show_caution"):
+            caution_message = Message(catalog.i18nc(
+                "@info:generic",
+                "Make sure the g-code is suitable for your printer and printer configuration before sending the file to it. The g-code representation may not be accurate."),
+                lifetime=0,
+                title = catalog.i18nc("@info:title", "G-code Details"),
+                message_type = Message.MessageType.WARNING)
+            caution_message.show()
+
+        # The "save/print" button's state is bound to the backend state.
+        backend = CuraApplication.getInstance().getBackend()
+        backend.setState(Backend.BackendState.Disabled)
+
+        return scene_node
+
+    def _getCacheKey(self, file_key: str, global_stack) -> str:
+        """Get the key to store the layers of g-code with in the slice cache.
+
+        Apart from the contents of the file, the layers depend on the flavor and on the extruders of the printer.
+
+        :param file_key: A key that identifies the contents of the g-code file.
+        :param global_stack: The printer to show the g-code on.
+        """
+
+        diameters = [extruder.getProperty("material_diameter", "value") for extruder in global_stack.extruderList]
+        key = hashlib.sha256()
+        key.update(file_key.encode("utf-8"))
+        key.update(repr((type(self).__name__, diameters, sorted(self._extruder_offsets.items()))).encode("utf-8"))
+        return "gcode_" + key.hexdigest()
+
+    def _buildLayerMeshes(self) -> None:
+        """Convert the layers that got new polygons to their final vertex arrays, in the worker threads.
+
+        This way the final layer data only needs to stitch the layers together, and the layers parsed so far can be
+        shown quickly while the rest of the file is still being parsed. Without worker threads, all layers are converted
+        at once at the end.
+        """
+
+        if self._layer_mesh_executor is None:
+            self._unbuilt_layers.clear()
+            return
+        for layer_number in self._unbuilt_layers:
+            previous_future = self._layer_mesh_futures.get(layer_number)
+            if previous_future is not None:
+                previous_future.result()  # Make sure an older version of the layer can't overwrite the new one.
+            self._layer_mesh_futures[layer_number] = self._layer_mesh_executor.submit(self._layer_data_builder.buildLayerMesh, layer_number)
+        self._unbuilt_layers.clear()
+
+    def _publishPreview(self, material_color_map: numpy.ndarray, global_stack) -> None:
+        """Show the layers that are parsed so far in the layer view, while the rest of the file is still being parsed.
+
+        The first time this is called a temporary node gets added to the scene. After that, its layer data is replaced.
+        """
+
+        layer_data = self._layer_data_builder.build(material_color_map)
+        if self._preview_node is not None:
+            self._preview_node.callDecoration("setLayerData", layer_data)
+            self._preview_node.meshDataChanged.emit(self._preview_node)
+            return
+
+        application = CuraApplication.getInstance()
+        self._preview_node = CuraSceneNode(no_setting_override = True)
+        self._preview_node.addDecorator(BuildPlateDecorator(application.getMultiBuildPlateModel().activeBuildPlate))
+        decorator = LayerDataDecorator()
+        decorator.setLayerData(layer_data)
+        self._preview_node.addDecorator(decorator)
+        self._preview_node.setMeshData(MeshData())
+        if not global_stack.getProperty("machine_center_is_zero", "value"):
+            machine_width = global_stack.getProperty("machine_width", "value")
+            machine_depth = global_stack.getProperty("machine_depth", "value")
+            self._preview_node.setPosition(Vector(-machine_width / 2, 0, machine_depth / 2))
+        self._preview_node.setParent(application.getBuildVolume())
+        application.callLater(application.getController().setActiveStage, "PreviewStage")
+
+    def _removePreview(self) -> None:
+        """Remove the layers that were shown while parsing. The node with the complete layers replaces them."""
+
+        if self._preview_node is not None:
+            self._preview_node.setParent(None)
+            self._preview_node = None
+
+    def _parseGCode(self, stream: Iterable[str], stream_size: Optional[int], global_stack, material_color_map: numpy.ndarray) -> Optional[GCodeStore]:
+        """Parse the lines of g-code into the layer data builder.
+
+        At every layer change the layers that are done are converted to their final vertex arrays in the background,
+        and every now and then the layers so far are shown in the layer view.
+
+        :return: The g-code, one string per layer, or None if parsing was cancelled.
+        """
+
+        gcode_list = GCodeStore()  # Keeps the g-code on the disk rather than in memory.
+        layer_gcode = []  # type: List[str]
+        self._is_layers_in_file = False
+
         ##############################################################################################
         ##  This part is where the action starts
         ##############################################################################################
-        file_lines = 0
-        current_line = 0
-        for line in stream.split("\n"):
-            file_lines += 1
-            gcode_list.append(line + "\n")
-            if not self._is_layers_in_file and line[:len(self._layer_keyword)] == self._layer_keyword:
-                self._is_layers_in_file = True
-
-        file_step = max(math.floor(file_lines / 100), 1)
-
         self._clearValues()
 
         self._message = Message(catalog.i18nc("@info:status", "Parsing G-code"),
@@ -376,21 +736,54 @@ class FlavorParser:
         Logger.log("d", "Parsing g-code...")
 
         current_position = Position(0, 0, 0, 0, [0] * self.MAX_EXTRUDER_COUNT)
-        current_path = [] #type: List[List[float]]
+        current_path = PathBuffer()
+        move_lines = []  # type: List[str] # Consecutive G0 and G1 lines that still need to be processed.
         min_layer_number = 0
         negative_layers = 0
         previous_layer = 0
         self._previous_extrusion_value = 0.0
+        show_preview = CuraApplication.getInstance().getPreferences().getValue("gcodereader/show_layers_while_parsing")
+        next_preview_time = time() + self._preview_publish_interval
+        progress_step = max(stream_size // 100, 1) if stream_size else 1 << 20
+        next_progress = progress_step
+        read_size = 0
 
-        for line in stream.split("\n"):
+        for line in stream:
             if self._cancelled:
                 Logger.log("d", "Parsing g-code file cancelled.")
                 return None
-            current_line += 1
 
-            if current_line % file_step == 0:
-                self._message.setProgress(math.floor(current_line / file_lines * 100))
+            read_size += len(line)
+            if read_size >= next_progress:
+                if stream_size:
+                    self._message.setProgress(min(math.floor(read_size / stream_size * 100), 100))
+                next_progress = read_size + progress_step
                 Job.yieldThread()
+
+            # Moves are collected, to process them all at once when something else comes along.
+            if line.startswith(("G1 ", "G0 ")) or self._move_pattern.match(line):
+                layer_gcode.append(line)
+                move_lines.append(line)
+                if len(move_lines) >= self.MAX_MOVE_BLOCK_SIZE:
+                    current_position = self._processMoves(move_lines, current_position, current_path)
+                    move_lines = []
+                continue
+
+            # The g-code is kept as one string per layer, like the g-code from the engine.
+            if line.startswith(self._layer_keyword) and layer_gcode:
+                gcode_list.append("".join(layer_gcode))
+                layer_gcode = []
+            layer_gcode.append(line)
+
+            # Comments don't change anything (except for the type_keyword and the layer_keyword).
+            if line.startswith(";") and not line.startswith(self._type_keyword) and not line.startswith(self._layer_keyword):
+                continue
+
+            if move_lines:
+                current_position = self._processMoves(move_lines, current_position, current_path)
+                move_lines = []
+
+            line = line.rstrip("\n")
             if len(line) == 0:
                 continue
 
@@ -416,7 +809,8 @@ class FlavorParser:
                     Logger.log("w", "Encountered a unknown type (%s) while parsing g-code.", type)
 
             # When the layer change is reached, the polygon is computed so we have just one layer per extruder
-            if self._is_layers_in_file and line[:len(self._layer_keyword)] == self._layer_keyword:
+            if line[:len(self._layer_keyword)] == self._layer_keyword:
+                self._is_layers_in_file = True
                 try:
                     layer_number = int(line[len(self._layer_keyword):])
                     self._createPolygon(self._current_layer_thickness, current_path, self._extruder_offsets.get(self._extruder_number, [0, 0]))
@@ -443,6 +837,13 @@ class FlavorParser:
                 except:
                     pass
 
+                self._buildLayerMeshes()
+                if show_preview and time() >= next_preview_time:
+                    publish_start_time = time()
+                    self._publishPreview(material_color_map, global_stack)
+                    # Showing the layers takes longer as more layers come in, so don't let it slow down the parsing much.
+                    next_preview_time = time() + max(self._preview_publish_interval, (time() - publish_start_time) * 4)
+
             # This line is a comment. Ignore it (except for the layer_keyword)
             if line.startswith(";"):
                 continue
@@ -473,60 +874,17 @@ class FlavorParser:
                 if M is not None:
                     self.processMCode(M, line, current_position, current_path)
 
+        if move_lines:
+            current_position = self._processMoves(move_lines, current_position, current_path)
+        if layer_gcode:
+            gcode_list.append("".join(layer_gcode))
+
         # "Flush" leftovers. Last layer paths are still stored
         if len(current_path) > 1:
             if self._createPolygon(self._current_layer_thickness, current_path, self._extruder_offsets.get(self._extruder_number, [0, 0])):
                 self._layer_number += 1
                 current_path.clear()
 
-        material_color_map = numpy.zeros((8, 4), dtype = numpy.float32)
-        material_color_map[0, :] = [0.0, 0.7, 0.9, 1.0]
-        material_color_map[1, :] = [0.7, 0.9, 0.0, 1.0]
-        material_color_map[2, :] = [0.9, 0.0, 0.7, 1.0]
-        material_color_map[3, :] = [0.7, 0.0, 0.0, 1.0]
-        material_color_map[4, :] = [0.0, 0.7, 0.0, 1.0]
-        material_color_map[5, :] = [0.0, 0.0, 0.7, 1.0]
-        material_color_map[6, :] = [0.3, 0.3, 0.3, 1.0]
-        material_color_map[7, :] = [0.7, 0.7, 0.7, 1.0]
-        layer_mesh = self._layer_data_builder.build(material_color_map)
-        decorator = LayerDataDecorator()
-        decorator.setLayerData(layer_mesh)
-        scene_node.addDecorator(decorator)
-
-        gcode_list_decorator = GCodeListDecorator()
-        gcode_list_decorator.setGcodeFileName(filename)
-        gcode_list_decorator.setGCodeList(gcode_list)
-        scene_node.addDecorator(gcode_list_decorator)
-
-        # gcode_dict stores gcode_lists for a number of build plates.
-        active_build_plate_id = CuraApplication.getInstance().getMultiBuildPlateModel().activeBuildPlate
-        gcode_dict = {active_build_plate_id: gcode_list}
-        CuraApplication.getInstance().getController().getScene().gcode_dict = gcode_dict #type: ignore #Because gcode_dict is generated dynamically.
-
         Logger.log("d", "Finished parsing g-code.")
         self._message.hide()
-
-        if self._layer_number == 0:
-            Logger.log("w", "File doesn't contain any valid layers")
-
-        if not global_stack.getProperty("machine_center_is_zero", "value"):
-            machine_width = global_stack.getProperty("machine_width", "value")
-            machine_depth = global_stack.getProperty("machine_depth", "value")
-            scene_node.setPosition(Vector(-machine_width / 2, 0, machine_depth / 2))
-
-        Logger.log("d", "G-code loading finished.")
-
-        if CuraApplication.getInstance().getPreferences().getValue("gcodereader/show_caution"):
-            caution_message = Message(catalog.i18nc(
-                "@info:generic",
-                "Make sure the g-code is suitable for your printer and printer configuration before sending the file to it. The g-code representation may not be accurate."),
-                lifetime=0,
-                title = catalog.i18nc("@info:title", "G-code Details"),
-                message_type = Message.MessageType.WARNING)
-            caution_message.show()
-
-        # The "save/print" button's state is bound to the backend state.
-        backend = CuraApplication.getInstance().getBackend()
-        backend.setState(Backend.BackendState.Disabled)
-
-        return scene_node
+        return gcode_list
@@ -2,7 +2,9 @@
 # Copyright (c) 2020 Ultimaker B.V.
 # Cura is released under the terms of the LGPLv3 or higher.
 
-from typing import Optional, Union, List, TYPE_CHECKING
+import io
+import os
+from typing import Iterable, Optional, Union, List, TYPE_CHECKING
 
 from UM.FileHandler.FileReader import FileReader
 from UM.Mesh.MeshReader import MeshReader
@@ -41,9 +43,21 @@ class GCodeReader(MeshReader):
         self._flavor_reader = None  # type: Optional[FlavorParser]
 
         Application.getInstance().getPreferences().addPreference("gcodereader/show_caution", True)
+        Application.getInstance().getPreferences().addPreference("gcodereader/show_layers_while_parsing", True)
 
-    def preReadFromStream(self, stream, *args, **kwargs):
-        for line in stream.split("\n"):
+    def preReadFromStream(self, stream: Union[str, Iterable[str]], *args, **kwargs):
+        """Find the flavor of g-code from its header.
+
+        Only the lines up to the flavor or up to the end of the header (the first line that's not a comment) are read.
+
+        :param stream: The g-code, or its lines.
+        """
+
+        if isinstance(stream, str):
+            stream = io.StringIO(stream)
+        for line in stream:
+            if line.strip() and not line.startswith(";"):
+                break  # The flavor is only written in the header.
             if line[:len(self._flavor_keyword)] == self._flavor_keyword:
                 try:
                     self._flavor_reader = self._flavor_readers_dict[line[len(self._flavor_keyword):].rstrip()]
@@ -59,19 +73,42 @@ class GCodeReader(MeshReader):
     # PreRead is used to get the correct flavor. If not, Marlin is set by default
     def preRead(self, file_name, *args, **kwargs):
         with open(file_name, "r", encoding = "utf-8") as file:
-            file_data = file.read()
-        return self.preReadFromStream(file_data, args, kwargs)
+            return self.preReadFromStream(file, args, kwargs)
+
+    def readFromStream(self, stream: Union[str, Iterable[str]], filename: str, stream_size: Optional[int] = None, cache_key: Optional[str] = None) -> Optional["CuraSceneNode"]:
+        """Parse g-code.
+
+        :param stream: The g-code, or its lines. The lines are parsed as they come, so this can be a file.
+        :param filename: The file the g-code was read from.
+        :param stream_size: The length of the g-code, to show the progress while parsing its lines.
+        :param cache_key: The key of the file to store the parsed layers with, see :py:meth:`getCacheKey`.
+        """
 
-    def readFromStream(self, stream: str, filename: str) -> Optional["CuraSceneNode"]:
         if self._flavor_reader is None:
             return None
-        return self._flavor_reader.processGCodeStream(stream, filename)
+        return self._flavor_reader.processGCodeStream(stream, filename, stream_size, cache_key)
+
+    @staticmethod
+    def getCacheKey(file_name: str) -> Optional[str]:
+        """Get a key that identifies a file and its contents, to find the parsed layers of the file in the slice cache.
+
+        The file isn't read for this, since that would take as long as reading it to parse it. Instead the key changes
+        whenever the file is changed, going by its size and modification time.
+
+        :return: The key, or None if the file can't be found.
+        """
+
+        try:
+            stat = os.stat(file_name)
+        except OSError:
+            return None
+        return "{path}:{size}:{mtime}".format(path = os.path.abspath(file_name), size = stat.st_size, mtime = stat.st_mtime_ns)
 
     def _read(self, file_name: str) -> Union["SceneNode", List["SceneNode"]]:
-        with open(file_name, "r", encoding = "utf-8") as file:
-            file_data = file.read()
         result = []  # type: List[SceneNode]
-        node = self.readFromStream(file_data, file_name)
+        # The file is read while parsing it, so it never needs to be in memory as a whole.
+        with open(file_name, "r", encoding = "utf-8") as file:
+            node = self.readFromStream(file, file_name, os.path.getsize(file_name), self.getCacheKey(file_name))
         if node is not None:
             result.append(node)
         return result
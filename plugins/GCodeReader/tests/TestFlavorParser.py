@@ -0,0 +1,132 @@
+# Copyright (c) 2024 UltiMaker
+# Cura is released under the terms of the LGPLv3 or higher.
+
+import os
+import sys
+from unittest.mock import patch, MagicMock
+
+import numpy
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import FlavorParser
+
+moves = [
+    "G0 F6000 X10 Y10 Z0.3\n",
+    "G1 F1500 X20 Y10 E1.5\n",
+    "G1 X20 Y20 E3 ; With a comment X100\n",
+    "G1 F2400 E-2\n",  # Retraction.
+    "G0 X30 Y30\n",
+    "G1 E3\n",  # Unretraction.
+    "G1 X30 Y40 Z0.5 E4\n",
+    "G1 x35 y45 e5\n",  # Lower case.
+    "G1 X1.2.3 Y50\n",  # Improperly formatted coordinate.
+    "G0\n"
+]
+
+
+@pytest.fixture
+def parser():
+    with patch("cura.CuraApplication.CuraApplication.getInstance", MagicMock()):
+        return FlavorParser.FlavorParser()
+
+
+@pytest.fixture
+def application():
+    app = MagicMock()
+    global_stack = MagicMock()
+    extruder = MagicMock()
+    extruder.getProperty = MagicMock(return_value = 2.85)
+    global_stack.extruderList = [extruder]
+    app.getGlobalContainerStack = MagicMock(return_value = global_stack)
+    extruder_manager = MagicMock()
+    extruder_manager.getActiveExtruderStacks = MagicMock(return_value = [])
+    with patch("cura.CuraApplication.CuraApplication.getInstance", MagicMock(return_value = app)):
+        with patch("cura.Settings.ExtruderManager.ExtruderManager.getInstance", MagicMock(return_value = extruder_manager)):
+            with patch("FlavorParser.Message"):
+                yield app
+
+
+def test_processGCodeStreamFromSliceCache(parser, application):
+    cached_slice = MagicMock()
+    cached_slice.getGCode = MagicMock(return_value = [";LAYER:0\n", ";LAYER:1\n"])
+    slice_cache = application.getBackend().getSliceCache()
+    slice_cache.get = MagicMock(return_value = cached_slice)
+
+    with patch.object(parser, "_parseGCode") as parse_gcode:
+        node = parser.processGCodeStream(";LAYER:0\n;LAYER:1\n", "test.gcode", cache_key = "file_key")
+
+    parse_gcode.assert_not_called()
+    slice_cache.get.assert_called_once_with(parser._getCacheKey("file_key", application.getGlobalContainerStack()))
+    assert node.callDecoration("getLayerData") is cached_slice.createLayerData.return_value
+    assert node.callDecoration("getGCodeList") == [";LAYER:0\n", ";LAYER:1\n"]
+
+
+def test_processGCodeStreamWithoutSliceCache(parser, application):
+    application.getBackend = MagicMock(return_value = MagicMock(spec = ["setState"]))  # Another backend than CuraEngine's.
+
+    with patch.object(parser, "_parseGCode", MagicMock(return_value = None)) as parse_gcode:  # As if parsing got cancelled.
+        assert parser.processGCodeStream(";LAYER:0\n", "test.gcode", cache_key = "file_key") is None
+
+    parse_gcode.assert_called_once()
+
+
+def test_getCacheKey(parser, application):
+    global_stack = application.getGlobalContainerStack()
+    key = parser._getCacheKey("file_key", global_stack)
+
+    assert parser._getCacheKey("file_key", global_stack) == key
+    assert parser._getCacheKey("other_file_key", global_stack) != key
+    global_stack.extruderList[0].getProperty = MagicMock(return_value = 1.75)  # The line widths depend on the filament.
+    assert parser._getCacheKey("file_key", global_stack) != key
+
+
+def test_parseMoveParameters():
+    result = FlavorParser.FlavorParser._parseMoveParameters(moves)
+
+    assert result.shape == (len(moves), 5)
+    numpy.testing.assert_array_equal(result[0], [10, 10, 0.3, 100, numpy.nan])
+    numpy.testing.assert_array_equal(result[2], [20, 20, numpy.nan, numpy.nan, 3])  # Not the X in the comment.
+    numpy.testing.assert_array_equal(result[3], [numpy.nan, numpy.nan, numpy.nan, 40, -2])
+    numpy.testing.assert_array_equal(result[7], [35, 45, numpy.nan, numpy.nan, 5])
+    numpy.testing.assert_array_equal(result[8], [numpy.nan, 50, numpy.nan, numpy.nan, numpy.nan])
+    assert numpy.isnan(result[9]).all()
+
+
+@pytest.mark.parametrize("absolute_positioning, absolute_extrusion", [(True, True), (False, True), (True, False), (False, False)])
+def test_processMovesSameAsProcessGCode(parser, absolute_positioning, absolute_extrusion):
+    results = []
+    for process_at_once in [False, True]:
+        parser._clearValues()
+        parser._is_absolute_positioning = absolute_positioning
+        parser._is_absolute_extrusion = absolute_extrusion
+        parser._previous_extrusion_value = 0.0
+        position = FlavorParser.Position(1, 2, 0, 10, [0.5] * parser.MAX_EXTRUDER_COUNT)
+        path = FlavorParser.PathBuffer(capacity = 2)  # Small, to check that it grows.
+        if process_at_once:
+            position = parser._processMoves(moves, position, path)
+        else:
+            for line in moves:
+                position = parser.processGCode(int(line[1]), line.rstrip("\n"), position, path)
+        results.append((position, path, parser._previous_extrusion_value, parser._current_layer_thickness))
+
+    (expected_position, expected_path, expected_extrusion, expected_thickness), (position, path, extrusion, thickness) = results
+    assert position == expected_position
+    numpy.testing.assert_array_equal(path.getData(), expected_path.getData())
+    assert extrusion == expected_extrusion
+    assert thickness == expected_thickness
+
+
+def test_pathBuffer():
+    path = FlavorParser.PathBuffer(capacity = 1)
+    path.append([1, 2, 3, 4, 5, 6])
+    path.extend(numpy.arange(18).reshape((3, 6)))
+    path.append([7, 8, 9, 10, 11, 12])
+
+    assert len(path) == 5
+    numpy.testing.assert_array_equal(path.getData()[:, 0], [1, 0, 6, 12, 7])
+
+    path.clear()
+    assert len(path) == 0
+    assert path.getData().shape == (0, 6)
@@ -0,0 +1,29 @@
+# Copyright (c) 2024 UltiMaker
+# Cura is released under the terms of the LGPLv3 or higher.
+
+import os
+import sys
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+with patch("cura.CuraApplication.CuraApplication.getInstance", MagicMock()):  # The flavor parsers are created on import.
+    from GCodeReader.GCodeReader import GCodeReader
+
+
+def test_getCacheKey(tmp_path):
+    file_name = str(tmp_path / "test.gcode")
+    with open(file_name, "w") as f:
+        f.write(";LAYER:0\nG1 X10 Y10 E1\n")
+    key = GCodeReader.getCacheKey(file_name)
+
+    assert key is not None
+    assert GCodeReader.getCacheKey(file_name) == key
+
+    with open(file_name, "a") as f:
+        f.write("G1 X20 Y10 E2\n")
+    assert GCodeReader.getCacheKey(file_name) != key
+
+
+def test_getCacheKeyMissingFile(tmp_path):
+    assert GCodeReader.getCacheKey(str(tmp_path / "missing.gcode")) is None
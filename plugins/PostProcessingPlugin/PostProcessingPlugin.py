@@ -20,6 +20,7 @@ from UM.Trust import Trust, TrustBasics
 from UM.i18n import i18nCatalog
 from cura import ApplicationMetadata
 from cura.CuraApplication import CuraApplication
+from cura.Scene.GCodeStore import GCodeStore
 
 i18n_catalog = i18nCatalog("cura")
 
@@ -86,6 +87,11 @@ class PostProcessingPlugin(QObject, Extension):
             return
 
         if ";POSTPROCESSED" not in gcode_list[0]:
+            # The scripts look up and change layers all over the g-code, which would read them from the disk each
+            # time. Give them the layers in memory instead, and only keep them on the disk again when they're done.
+            stored_on_disk = isinstance(gcode_list, GCodeStore)
+            if stored_on_disk:
+                gcode_list = list(gcode_list)
             for script in self._script_list:
                 try:
                     gcode_list = script.execute(gcode_list)
@@ -98,6 +104,8 @@ class PostProcessingPlugin(QObject, Extension):
                 for pp_name in pp_name_list.split("\n"):
                     pp_name = pp_name.split("]")
                     gcode_list[0] += ";  " + str(pp_name[0]) + "]\n"
+            if stored_on_disk:
+                gcode_list = GCodeStore(gcode_list)
             gcode_dict[active_build_plate_id] = gcode_list
             setattr(scene, "gcode_dict", gcode_dict)
         else:
@@ -8,6 +8,7 @@ from unittest.mock import patch, MagicMock
 from UM.PluginRegistry import PluginRegistry
 from UM.Resources import Resources
 from UM.Trust import Trust
+from cura.Scene.GCodeStore import GCodeStore
 from ..PostProcessingPlugin import PostProcessingPlugin
 
 # not sure if needed
@@ -57,6 +58,30 @@ def test_enterprise_bundled_script_allowed():
     assert PostProcessingPlugin._isScriptAllowed(_bundled_file_path())
 
 
+def test_executeOnGCodeStore():
+    scene = MagicMock()
+    scene.gcode_dict = {0: GCodeStore([";FLAVOR:Marlin\n", ";LAYER:0\n", ";LAYER:1\n"])}
+    application = MagicMock()
+    application.getController().getScene.return_value = scene
+    application.getGlobalContainerStack().getMetaDataEntry.return_value = "[Script]"
+    application.getMultiBuildPlateModel().activeBuildPlate = 0
+
+    def executeScript(data):
+        assert isinstance(data, list)  # The scripts get the layers in memory, so looking them up doesn't read the disk.
+        data[data.index(";LAYER:1\n")] += "M117 Done\n"
+        return data
+    script = MagicMock()
+    script.execute = MagicMock(side_effect = executeScript)
+    plugin = MagicMock(_script_list = [script])
+
+    with patch("UM.Application.Application.getInstance", return_value = application):
+        with patch("cura.CuraApplication.CuraApplication.getInstance", return_value = application):
+            PostProcessingPlugin.execute(plugin, None)
+
+    assert isinstance(scene.gcode_dict[0], GCodeStore)
+    assert scene.gcode_dict[0] == [";FLAVOR:Marlin\n;POSTPROCESSED\n;  [Script]\n", ";LAYER:0\n", ";LAYER:1\nM117 Done\n"]
+
+
 def _bundled_file_path():
     return os.path.join(
         Resources.getStoragePath(Resources.Resources) + "scripts/blaat.py"
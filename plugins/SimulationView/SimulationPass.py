@@ -16,10 +16,12 @@ from UM.View.RenderBatch import RenderBatch
 from UM.View.GL.OpenGL import OpenGL
 
 from cura.Settings.ExtruderManager import ExtruderManager
+from cura.LayerData import LayerData
 from cura.LayerPolygon import LayerPolygon
 
 import os.path
 import numpy
+from typing import Tuple
 
 ## RenderPass used to display g-code paths.
 from .NozzleNode import NozzleNode
@@ -206,15 +208,16 @@ class SimulationPass(RenderPass):
                     self._layer_shader.setUniformValue("u_next_vertex", not_a_vector)
                     self._layer_shader.setUniformValue("u_last_line_ratio", 1.0)
 
-                    # The first line does not have a previous line: add a MoveUnretractedType in front for start detection
-                    # this way the first start of the layer can also be drawn
-                    prev_line_types = numpy.concatenate([numpy.asarray([LayerPolygon.MoveUnretractedType], dtype = numpy.float32), layer_data._attributes["line_types"]["value"]])
-                    # Remove the last element
-                    prev_line_types = prev_line_types[0:layer_data._attributes["line_types"]["value"].size]
-                    layer_data._attributes["prev_line_types"] =  {'opengl_type': 'float', 'value': prev_line_types, 'opengl_name': 'a_prev_line_type'}
+                    # When many layers are shown from far away, they are drawn simplified where that's less than a pixel.
+                    layers_mesh = layer_data
+                    if end - start >= self._layer_view.LEVEL_OF_DETAIL_MINIMUM_ELEMENT_COUNT:
+                        layers_mesh, start, end = self._getLevelOfDetail(node, layer_data, start, end)
+
+                    self._addPrevLineTypes(layer_data)
+                    self._addPrevLineTypes(layers_mesh)
 
                     layers_batch = RenderBatch(self._current_shader, type = RenderBatch.RenderType.Solid, mode = RenderBatch.RenderMode.Lines, range = (start, end), backface_cull = True)
-                    layers_batch.addItem(node.getWorldTransformation(), layer_data)
+                    layers_batch.addItem(node.getWorldTransformation(), layers_mesh)
                     layers_batch.render(self._scene.getActiveCamera())
 
                     # Current selected layer is rendered
@@ -266,6 +269,54 @@ class SimulationPass(RenderPass):
 
         self.release()
 
+    def _addPrevLineTypes(self, layer_data: LayerData) -> None:
+        if "prev_line_types" in layer_data._attributes:
+            return  # The line types of layer data don't change, so this only needs to be done once.
+        # The first line does not have a previous line: add a MoveUnretractedType in front for start detection
+        # this way the first start of the layer can also be drawn
+        prev_line_types = numpy.concatenate([numpy.asarray([LayerPolygon.MoveUnretractedType], dtype = numpy.float32), layer_data._attributes["line_types"]["value"]])
+        # Remove the last element
+        prev_line_types = prev_line_types[0:layer_data._attributes["line_types"]["value"].size]
+        layer_data._attributes["prev_line_types"] =  {'opengl_type': 'float', 'value': prev_line_types, 'opengl_name': 'a_prev_line_type'}
+
+    def _getLevelOfDetail(self, node: SceneNode, layer_data: LayerData, start: int, end: int) -> Tuple[LayerData, int, int]:
+        """Get the layer data to draw a range of layers with, and the range of elements to draw of it.
+
+        The coarsest level of detail is used of which the tolerance is less than a pixel at the part of the print that's
+        closest to the camera. If there is none, the layer data itself is used with the range as it was.
+        """
+
+        pixel_size = self._getPixelSize(node)
+        result = layer_data
+        for tolerance, level_of_detail in layer_data.getLevelsOfDetail():
+            if tolerance > pixel_size:
+                break
+            result = level_of_detail
+        if result is layer_data:
+            return layer_data, start, end
+
+        element_counts = result.getElementCounts()
+        start = sum(count for layer, count in element_counts.items() if layer < self._layer_view.getMinimumLayer())
+        end = sum(count for layer, count in element_counts.items() if layer < self._layer_view.getCurrentLayer())
+        return result, start, end
+
+    def _getPixelSize(self, node: SceneNode) -> float:
+        """Get how large a pixel is in millimetres, at the part of a node that's closest to the camera."""
+
+        camera = self._scene.getActiveCamera()
+        projection = camera.getProjectionMatrix().getData()
+        if projection[1, 1] == 0 or camera.getViewportHeight() <= 0:
+            return 0.0
+        pixel_size = 2.0 / (projection[1, 1] * camera.getViewportHeight())
+        if camera.isPerspective():
+            bounding_box = node.getBoundingBox()
+            if bounding_box is None:
+                return 0.0
+            camera_position = camera.getWorldPosition().getData()
+            closest = numpy.clip(camera_position, bounding_box.minimum.getData(), bounding_box.maximum.getData())
+            pixel_size *= float(numpy.linalg.norm(camera_position - closest))
+        return pixel_size
+
     def _onSceneChanged(self, changed_object: SceneNode):
         if changed_object.callDecoration("getLayerData"):  # Any layer data has changed.
             self._switching_layers = True
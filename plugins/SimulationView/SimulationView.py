@@ -1,9 +1,12 @@
 # Copyright (c) 2021 Ultimaker B.V.
 # Cura is released under the terms of the LGPLv3 or higher.
+import collections
 import math
 import sys
+import threading
+import time
 
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QOpenGLContext
 from PyQt6.QtWidgets import QApplication
 
@@ -30,6 +33,7 @@ from UM.View.GL.ShaderProgram import ShaderProgram
 
 from UM.i18n import i18nCatalog
 from cura.CuraView import CuraView
+from cura.Layer import Layer
 from cura.LayerPolygon import LayerPolygon  # To distinguish line types.
 from cura.Scene.ConvexHullNode import ConvexHullNode
 from cura.CuraApplication import CuraApplication
@@ -40,10 +44,12 @@ from .SimulationViewProxy import SimulationViewProxy
 import numpy
 import os.path
 
-from typing import Optional, TYPE_CHECKING, List, cast
+from typing import Dict, Optional, TYPE_CHECKING, List, Tuple, cast
 
 if TYPE_CHECKING:
+    from UM.Mesh.MeshData import MeshData
     from UM.Scene.SceneNode import SceneNode
+    from cura.LayerData import LayerData
     from UM.Scene.Scene import Scene
     from UM.Settings.ContainerStack import ContainerStack
 
@@ -59,6 +65,10 @@ class SimulationView(CuraView):
     LAYER_VIEW_TYPE_FEEDRATE = 2
     LAYER_VIEW_TYPE_THICKNESS = 3
     SIMULATION_FACTOR = 2
+    # Simplified versions of the layer data are built for prints with more elements than this, with these tolerances
+    # in millimetres. The layer view draws the layers below the current layer with these when it's zoomed out far.
+    LEVEL_OF_DETAIL_MINIMUM_ELEMENT_COUNT = 500000
+    LEVEL_OF_DETAIL_TOLERANCES = (0.1, 0.4, 1.6)
 
     _no_layers_warning_preference = "view/no_layers_warning"
 
@@ -71,6 +81,13 @@ class SimulationView(CuraView):
         self._current_layer_mesh = None
         self._current_layer_jumps = None
         self._top_layers_job = None  # type: Optional["_CreateTopLayersJob"]
+        self._top_layer_meshes = _LayerMeshCache()  # Meshes of the layers shown in compatibility mode, to reuse them.
+        self._levels_of_detail_job = None  # type: Optional["_BuildLevelsOfDetailJob"]
+        # Layer data that is shown while slicing gets replaced often. Only build levels of detail once it stays.
+        self._levels_of_detail_timer = QTimer()
+        self._levels_of_detail_timer.setInterval(2000)
+        self._levels_of_detail_timer.setSingleShot(True)
+        self._levels_of_detail_timer.timeout.connect(self._startBuildLevelsOfDetail)
         self._activity = False
         self._old_max_layers = 0
 
@@ -98,8 +115,11 @@ class SimulationView(CuraView):
         self._min_line_width = sys.float_info.max
         self._min_flow_rate = sys.float_info.max
         self._max_flow_rate = sys.float_info.min
-        self._cumulative_line_duration_layer: Optional[int] = None
-        self._cumulative_line_duration: List[float] = []
+        # For each layer, the time at which each path of the layer is done in the simulation. Computed when needed.
+        self._cumulative_line_durations: Dict[int, numpy.ndarray] = {}
+        self._layer_data_node: Optional["SceneNode"] = None  # The node with the layer data, found again when the scene changes.
+        # For the layer data of each node, the minimum and maximum of the line properties of each line type.
+        self._line_type_limits: Dict[int, Tuple["LayerData", numpy.ndarray]] = {}
 
         # Cache for layer heights to avoid recalculating on every query
         self._layer_heights_cache: dict[int, float] = {}
@@ -208,25 +228,11 @@ class SimulationView(CuraView):
         cumulative_line_duration = self.cumulativeLineDuration()
         if len(cumulative_line_duration) > 0:
             self._current_time = time
-            left_i = 0
-            right_i = len(cumulative_line_duration) - 1
-            total_duration = cumulative_line_duration[-1]
-            # make an educated guess about where to start
-            i = int(right_i * max(0.0, min(1.0, self._current_time / total_duration)))
-            # binary search for the correct path
-            while left_i < right_i:
-                if cumulative_line_duration[i] <= self._current_time:
-                    left_i = i + 1
-                else:
-                    right_i = i
-                i = int((left_i + right_i) / 2)
-
-            left_value = cumulative_line_duration[i - 1] if i > 0 else 0.0
-            right_value = cumulative_line_duration[i]
+            # Find the first path that isn't done yet at this time.
+            i = min(int(numpy.searchsorted(cumulative_line_duration, self._current_time, side = "right")), len(cumulative_line_duration) - 1)
 
-            if not (left_value <= self._current_time <= right_value):
-                Logger.warn(
-                    f"Binary search error (out of bounds): index {i}: left value {left_value} right value {right_value} and current time is {self._current_time}")
+            left_value = float(cumulative_line_duration[i - 1]) if i > 0 else 0.0
+            right_value = float(cumulative_line_duration[i])
 
             segment_duration = right_value - left_value
             fractional_value = 0.0 if segment_duration == 0.0 else (self._current_time - left_value) / segment_duration
@@ -255,43 +261,51 @@ class SimulationView(CuraView):
         else:
             self.setTime(self._current_time + time_increase)
 
-    def cumulativeLineDuration(self) -> List[float]:
-        # Make sure _cumulative_line_duration is initialized properly
-        if self.getCurrentLayer() != self._cumulative_line_duration_layer:
-            #clear cache
-            self._cumulative_line_duration = []
-            total_duration = 0.0
+    def cumulativeLineDuration(self) -> numpy.ndarray:
+        """Get the time at which each path of the current layer is done in the simulation.
+
+        This is computed once for each layer, until the layer data changes.
+        """
+
+        layer_number = self.getCurrentLayer()
+        cumulative_line_duration = self._cumulative_line_durations.get(layer_number)
+        if cumulative_line_duration is None:
+            line_durations = []
             polylines = self.getLayerData()
             if polylines is not None:
                 for polyline in polylines.polygons:
-                    for line_index in range(len(polyline.lineLengths)):
-                        line_length = polyline.lineLengths[line_index]
-                        line_feedrate = polyline.lineFeedrates[line_index][0]
+                    line_lengths = polyline.lineLengths.astype(numpy.float64)
+                    line_feedrates = numpy.asarray(polyline.lineFeedrates, dtype = numpy.float64).reshape(-1)[:len(line_lengths)]
+                    with numpy.errstate(divide = "ignore", invalid = "ignore"):
+                        # If something is wrong with a line, it gets an arbitrary non-null duration.
+                        line_durations.append(numpy.where(line_feedrates > 0.0, line_lengths / line_feedrates, 0.1))
+                    # for tool change we add an extra tool path
+                    line_durations.append(numpy.zeros(1))
+            if line_durations:
+                cumulative_line_duration = numpy.cumsum(numpy.concatenate(line_durations)) / SimulationView.SIMULATION_FACTOR
+            else:
+                cumulative_line_duration = numpy.zeros(0)
+            self._cumulative_line_durations[layer_number] = cumulative_line_duration
 
-                        if line_feedrate > 0.0:
-                            line_duration = line_length / line_feedrate
-                        else:
-                            # Something is wrong with this line, set an arbitrary non-null duration
-                            line_duration = 0.1
+        return cumulative_line_duration
 
-                        total_duration += line_duration / SimulationView.SIMULATION_FACTOR
-                        self._cumulative_line_duration.append(total_duration)
+    def _getLayerDataNode(self) -> Optional["SceneNode"]:
+        """Get the node that has the layer data, without searching the scene each time."""
 
-                    # for tool change we add an extra tool path
-                    self._cumulative_line_duration.append(total_duration)
-            # set current cached layer
-            self._cumulative_line_duration_layer = self.getCurrentLayer()
-
-        return self._cumulative_line_duration
+        node = self._layer_data_node
+        if node is None or node.getParent() is None or not node.callDecoration("getLayerData"):
+            self._layer_data_node = None
+            for node in DepthFirstIterator(self.getController().getScene().getRoot()):  # type: ignore
+                if node.callDecoration("getLayerData"):
+                    self._layer_data_node = node
+                    break
+        return self._layer_data_node
 
     def getLayerData(self) -> Optional["LayerData"]:
-        scene = self.getController().getScene()
-        for node in DepthFirstIterator(scene.getRoot()):  # type: ignore
-            layer_data = node.callDecoration("getLayerData")
-            if not layer_data:
-                continue
-            return layer_data.getLayer(self.getCurrentLayer())
-        return None
+        node = self._getLayerDataNode()
+        if node is None:
+            return None
+        return node.callDecoration("getLayerData").getLayer(self.getCurrentLayer())
 
     def _calculateLayerHeightsCache(self) -> None:
         """Calculate and cache heights for all layers.
@@ -388,11 +402,21 @@ class SimulationView(CuraView):
 
     def _onSceneChanged(self, node: "SceneNode") -> None:
         self.setActivity(False)
+        self._layer_data_node = None
+        self._cumulative_line_durations = {}
+        self._top_layer_meshes.clear()
+        self._levels_of_detail_timer.start()
         self._calculateLayerHeightsCache()
         self.calculateColorSchemeLimits()
         self.calculateMaxLayers()
         self.calculateMaxPathsOnLayer(self._current_layer_num)
 
+    def _onMeshDataChanged(self, node: "SceneNode") -> None:
+        # The layer data of a node gets replaced while the layers are still being processed, e.g. when they are shown
+        # while slicing.
+        if node.callDecoration("getLayerData"):
+            self._onSceneChanged(node)
+
     def isBusy(self) -> bool:
         return self._busy
 
@@ -674,16 +698,6 @@ class SimulationView(CuraView):
         old_min_flow_rate = self._min_flow_rate
         old_max_flow_rate = self._max_flow_rate
 
-        self._min_feedrate = sys.float_info.max
-        self._max_feedrate = sys.float_info.min
-        self._min_line_width = sys.float_info.max
-        self._max_line_width = sys.float_info.min
-        self._min_thickness = sys.float_info.max
-        self._max_thickness = sys.float_info.min
-        self._min_flow_rate = sys.float_info.max
-        self._max_flow_rate = sys.float_info.min
-        self._cumulative_line_duration = []
-
         # The colour scheme is only influenced by the visible lines, so filter the lines by if they should be visible.
         visible_line_types = []
         if self.getShowSkin():  # Actually "shell".
@@ -705,38 +719,33 @@ class SimulationView(CuraView):
             visible_line_types.append(LayerPolygon.MoveWhileRetractingType)
             visible_line_types.append(LayerPolygon.MoveWhileUnretractingType)
 
+        # Combine the limits of each line type of all layers, which are only calculated when the layer data changes.
+        line_type_limits = []
+        cached_line_type_limits = {}
         for node in DepthFirstIterator(self.getController().getScene().getRoot()):
             layer_data = node.callDecoration("getLayerData")
             if not layer_data:
                 continue
-
-            for layer_index in layer_data.getLayers():
-                for polyline in layer_data.getLayer(layer_index).polygons:
-                    is_visible = numpy.isin(polyline.types, visible_line_types)
-                    visible_indices = numpy.where(is_visible)[0]
-                    visible_indicies_with_extrusion = numpy.where(numpy.isin(polyline.types, visible_line_types_with_extrusion))[0]
-                    if visible_indices.size == 0:  # No items to take maximum or minimum of.
-                        continue
-                    visible_feedrates = numpy.take(polyline.lineFeedrates, visible_indices)
-                    visible_feedrates_with_extrusion = numpy.take(polyline.lineFeedrates, visible_indicies_with_extrusion)
-                    visible_linewidths = numpy.take(polyline.lineWidths, visible_indices)
-                    visible_linewidths_with_extrusion = numpy.take(polyline.lineWidths, visible_indicies_with_extrusion)
-                    visible_thicknesses = numpy.take(polyline.lineThicknesses, visible_indices)
-                    visible_thicknesses_with_extrusion = numpy.take(polyline.lineThicknesses, visible_indicies_with_extrusion)
-                    self._max_feedrate = max(float(visible_feedrates.max()), self._max_feedrate)
-                    if visible_feedrates_with_extrusion.size != 0:
-                        flow_rates = visible_feedrates_with_extrusion * visible_linewidths_with_extrusion * visible_thicknesses_with_extrusion
-                        self._min_flow_rate = min(float(flow_rates.min()), self._min_flow_rate)
-                        self._max_flow_rate = max(float(flow_rates.max()), self._max_flow_rate)
-                    self._min_feedrate = min(float(visible_feedrates.min()), self._min_feedrate)
-                    self._max_line_width = max(float(visible_linewidths.max()), self._max_line_width)
-                    self._min_line_width = min(float(visible_linewidths.min()), self._min_line_width)
-                    self._max_thickness = max(float(visible_thicknesses.max()), self._max_thickness)
-                    try:
-                        self._min_thickness = min(float(visible_thicknesses[numpy.nonzero(visible_thicknesses)].min()), self._min_thickness)
-                    except ValueError:
-                        # Sometimes, when importing a GCode the line thicknesses are zero and so the minimum (avoiding the zero) can't be calculated.
-                        Logger.log("w", "Min thickness can't be calculated because all the values are zero")
+            limits = self._getLineTypeLimits(layer_data)
+            cached_line_type_limits[id(layer_data)] = (layer_data, limits)
+            line_type_limits.append(limits)
+        self._line_type_limits = cached_line_type_limits  # Forget the layer data that's not in the scene any more.
+        line_type_limits_array = numpy.array(line_type_limits).reshape((-1, LayerPolygon.getNumberOfTypes(), 2 * len(Layer.LINE_TYPE_LIMIT_PROPERTIES)))
+        visible_limits = line_type_limits_array[:, numpy.array(visible_line_types, dtype = numpy.intp)].reshape((-1, line_type_limits_array.shape[2]))
+        visible_limits_with_extrusion = line_type_limits_array[:, numpy.array(visible_line_types_with_extrusion, dtype = numpy.intp)].reshape((-1, line_type_limits_array.shape[2]))
+
+        # The limits stay at their initial values if there are no visible lines.
+        self._min_feedrate = min(float(visible_limits[:, 0].min(initial = numpy.inf)), sys.float_info.max)
+        self._max_feedrate = max(float(visible_limits[:, 1].max(initial = -numpy.inf)), sys.float_info.min)
+        self._min_line_width = min(float(visible_limits[:, 2].min(initial = numpy.inf)), sys.float_info.max)
+        self._max_line_width = max(float(visible_limits[:, 3].max(initial = -numpy.inf)), sys.float_info.min)
+        self._min_thickness = min(float(visible_limits[:, 4].min(initial = numpy.inf)), sys.float_info.max)
+        self._max_thickness = max(float(visible_limits[:, 5].max(initial = -numpy.inf)), sys.float_info.min)
+        self._min_flow_rate = min(float(visible_limits_with_extrusion[:, 6].min(initial = numpy.inf)), sys.float_info.max)
+        self._max_flow_rate = max(float(visible_limits_with_extrusion[:, 7].max(initial = -numpy.inf)), sys.float_info.min)
+        if numpy.isinf(visible_limits[:, 4]).all() and numpy.isfinite(visible_limits[:, 5]).any():
+            # Sometimes, when importing a GCode the line thicknesses are zero and so the minimum (avoiding the zero) can't be calculated.
+            Logger.log("w", "Min thickness can't be calculated because all the values are zero")
 
         if old_min_feedrate != self._min_feedrate or old_max_feedrate != self._max_feedrate \
                 or old_min_linewidth != self._min_line_width or old_max_linewidth != self._max_line_width \
@@ -744,16 +753,34 @@ class SimulationView(CuraView):
                 or old_min_flow_rate != self._min_flow_rate or old_max_flow_rate != self._max_flow_rate:
             self.colorSchemeLimitsChanged.emit()
 
+    def _getLineTypeLimits(self, layer_data: "LayerData") -> numpy.ndarray:
+        """Get the minimum and maximum of the line properties of each line type over all layers of the layer data.
+
+        :return: An array like :py:meth:`cura.Layer.Layer.getLineTypeLimits`, but for all layers together.
+        """
+
+        cached_limits = self._line_type_limits.get(id(layer_data))
+        if cached_limits is not None and cached_limits[0] is layer_data:
+            return cached_limits[1]
+
+        # The limits of the layers themselves are kept in the layers, so only new layers need to be gone over when the
+        # layer data is replaced while the layers are still coming in.
+        limits = numpy.empty((LayerPolygon.getNumberOfTypes(), 2 * len(Layer.LINE_TYPE_LIMIT_PROPERTIES)), dtype = numpy.float64)
+        limits[:, 0::2] = numpy.inf
+        limits[:, 1::2] = -numpy.inf
+        layers = layer_data.getLayers().values()
+        if layers:
+            layer_limits = numpy.array([layer.getLineTypeLimits() for layer in layers])
+            limits[:, 0::2] = layer_limits[:, :, 0::2].min(axis = 0)
+            limits[:, 1::2] = layer_limits[:, :, 1::2].max(axis = 0)
+        return limits
+
     def calculateMaxPathsOnLayer(self, layer_num: int) -> None:
         # Update the currentPath
         new_max_paths = 0
-        scene = self.getController().getScene()
-        for node in DepthFirstIterator(scene.getRoot()):  # type: ignore
-            layer_data = node.callDecoration("getLayerData")
-            if not layer_data:
-                continue
-
-            layer = layer_data.getLayer(layer_num)
+        node = self._getLayerDataNode()
+        if node is not None:
+            layer = node.callDecoration("getLayerData").getLayer(layer_num)
             if layer is not None:
                 new_max_paths = layer.lineMeshElementCount()
 
@@ -803,7 +830,11 @@ class SimulationView(CuraView):
             # Start listening to changes.
             Application.getInstance().getPreferences().preferenceChanged.connect(self._onPreferencesChanged)
             self._controller.getScene().getRoot().childrenChanged.connect(self._onSceneChanged)
+            self._controller.getScene().getRoot().meshDataChanged.connect(self._onMeshDataChanged)
 
+            self._layer_data_node = None
+            self._cumulative_line_durations = {}
+            self._levels_of_detail_timer.start()
             self._calculateLayerHeightsCache()
             self.calculateColorSchemeLimits()
             self.calculateMaxLayers()
@@ -864,6 +895,7 @@ class SimulationView(CuraView):
 
         elif event.type == Event.ViewDeactivateEvent:
             self._controller.getScene().getRoot().childrenChanged.disconnect(self._onSceneChanged)
+            self._controller.getScene().getRoot().meshDataChanged.disconnect(self._onMeshDataChanged)
             Application.getInstance().getPreferences().preferenceChanged.disconnect(self._onPreferencesChanged)
             self._slice_first_warning_message.hide()
             Application.getInstance().globalContainerStackChanged.disconnect(self._onGlobalStackChanged)
@@ -908,7 +940,7 @@ class SimulationView(CuraView):
 
         self.setBusy(True)
 
-        self._top_layers_job = _CreateTopLayersJob(self._controller.getScene(), self._current_layer_num, self._solid_layers)
+        self._top_layers_job = _CreateTopLayersJob(self._controller.getScene(), self._current_layer_num, self._solid_layers, self._top_layer_meshes)
         self._top_layers_job.finished.connect(self._updateCurrentLayerMesh)  # type: ignore  # mypy doesn't understand the whole private class thing that's going on here.
         self._top_layers_job.start()  # type: ignore
 
@@ -925,8 +957,33 @@ class SimulationView(CuraView):
 
         self._top_layers_job = None
 
+    def _startBuildLevelsOfDetail(self) -> None:
+        node = self._getLayerDataNode()
+        layer_data = node.callDecoration("getLayerData") if node is not None else None
+        if self._levels_of_detail_job:
+            if self._levels_of_detail_job.getLayerData() is layer_data:
+                return  # Already being built.
+            self._levels_of_detail_job.finished.disconnect(self._onLevelsOfDetailBuilt)
+            self._levels_of_detail_job.cancel()
+            self._levels_of_detail_job = None
+
+        if layer_data is None or layer_data.getLevelsOfDetail() or layer_data.getIndices() is None \
+                or layer_data.getIndices().size < self.LEVEL_OF_DETAIL_MINIMUM_ELEMENT_COUNT:
+            return
+
+        self._levels_of_detail_job = _BuildLevelsOfDetailJob(layer_data, self.LEVEL_OF_DETAIL_TOLERANCES)
+        self._levels_of_detail_job.finished.connect(self._onLevelsOfDetailBuilt)  # type: ignore
+        self._levels_of_detail_job.start()  # type: ignore
+
+    def _onLevelsOfDetailBuilt(self, job: "_BuildLevelsOfDetailJob") -> None:
+        self._levels_of_detail_job = None
+        if job.getResult():
+            self._controller.getScene().sceneChanged.emit(self._controller.getScene().getRoot())  # Redraw with them.
+
     def _updateWithPreferences(self) -> None:
         self._solid_layers = int(Application.getInstance().getPreferences().getValue("view/top_layer_count"))
+        # Keep the meshes of more layers than are shown, so that going back and forth through the layers reuses them.
+        self._top_layer_meshes.setCapacity(2 * self._solid_layers)
         self._only_show_top_layers = bool(Application.getInstance().getPreferences().getValue("view/only_show_top_layers"))
         self._compatibility_mode = self._evaluateCompatibilityMode()
 
@@ -976,13 +1033,65 @@ class SimulationView(CuraView):
     def _onDontAskMeAgain(self, checked: bool) -> None:
         CuraApplication.getInstance().getPreferences().setValue(self._no_layers_warning_preference, not checked)
 
+class _LayerMeshCache:
+    """The meshes of the layers that were shown last in compatibility mode.
+
+    When the layer slider moves by one layer, most of the layers that are shown stay the same. Only the meshes of the
+    layers that come into view need to be built then. The least recently used meshes are removed when the cache is full.
+    """
+
+    def __init__(self, capacity: int = 10) -> None:
+        self._capacity = capacity
+        self._layer_data = None  # type: Optional[LayerData] # The layer data that the meshes were built from.
+        self._meshes = collections.OrderedDict()  # type: collections.OrderedDict[int, MeshData]
+        self._lock = threading.Lock()  # The meshes are built in jobs, while the cache is cleared from the main thread.
+
+    def setCapacity(self, capacity: int) -> None:
+        with self._lock:
+            self._capacity = max(capacity, 1)
+            while len(self._meshes) > self._capacity:
+                self._meshes.popitem(last = False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._layer_data = None
+            self._meshes.clear()
+
+    def getMesh(self, layer_data: "LayerData", layer_number: int) -> "MeshData":
+        """Get the mesh of a layer, building it if it's not in the cache.
+
+        :param layer_data: The layer data to build the mesh from. If it's not the layer data that the cached meshes were
+            built from, the cache is cleared.
+        :param layer_number: The layer to get the mesh of.
+        """
+
+        with self._lock:
+            if layer_data is not self._layer_data:
+                self._layer_data = layer_data
+                self._meshes.clear()
+            mesh = self._meshes.get(layer_number)
+            if mesh is not None:
+                self._meshes.move_to_end(layer_number)
+                return mesh
+
+        mesh = layer_data.getLayer(layer_number).createMesh()
+
+        with self._lock:
+            if layer_data is self._layer_data:
+                self._meshes[layer_number] = mesh
+                while len(self._meshes) > self._capacity:
+                    self._meshes.popitem(last = False)
+        return mesh
+
+
 class _CreateTopLayersJob(Job):
-    def __init__(self, scene: "Scene", layer_number: int, solid_layers: int) -> None:
+    def __init__(self, scene: "Scene", layer_number: int, solid_layers: int, layer_meshes: _LayerMeshCache) -> None:
         super().__init__()
 
         self._scene = scene
         self._layer_number = layer_number
         self._solid_layers = solid_layers
+        self._layer_meshes = layer_meshes
         self._cancel = False
 
     def run(self) -> None:
@@ -995,14 +1104,17 @@ class _CreateTopLayersJob(Job):
         if self._cancel or not layer_data:
             return
 
-        layer_mesh = MeshBuilder()
+        vertices = []  # type: List[numpy.ndarray]
+        indices = []  # type: List[numpy.ndarray]
+        colors = []  # type: List[numpy.ndarray]
+        vertex_count = 0
         for i in range(self._solid_layers):
             layer_number = self._layer_number - i
             if layer_number < 0:
                 continue
 
             try:
-                layer = layer_data.getLayer(layer_number).createMesh()
+                layer = self._layer_meshes.getMesh(layer_data, layer_number)
             except Exception:
                 Logger.logException("w", "An exception occurred while creating layer mesh.")
                 return
@@ -1010,14 +1122,15 @@ class _CreateTopLayersJob(Job):
             if not layer or layer.getVertices() is None:
                 continue
 
-            layer_mesh.addIndices(layer_mesh.getVertexCount() + layer.getIndices())
-            layer_mesh.addVertices(layer.getVertices())
+            indices.append(vertex_count + layer.getIndices())
+            vertices.append(layer.getVertices())
+            vertex_count += layer.getVertexCount()
 
             # Scale layer color by a brightness factor based on the current layer number
             # This will result in a range of 0.5 - 1.0 to multiply colors by.
             brightness = numpy.ones((1, 4), dtype=numpy.float32) * (2.0 - (i / self._solid_layers)) / 2.0
             brightness[0, 3] = 1.0
-            layer_mesh.addColors(layer.getColors() * brightness)
+            colors.append(layer.getColors() * brightness)
 
             if self._cancel:
                 return
@@ -1027,6 +1140,13 @@ class _CreateTopLayersJob(Job):
         if self._cancel:
             return
 
+        # Combine the layers in one go, rather than growing the mesh for each layer.
+        layer_mesh = MeshBuilder()
+        if vertices:
+            layer_mesh.addIndices(numpy.concatenate(indices))
+            layer_mesh.addVertices(numpy.concatenate(vertices))
+            layer_mesh.addColors(numpy.concatenate(colors))
+
         Job.yieldThread()
         jump_mesh = layer_data.getLayer(self._layer_number).createJumps()
         if not jump_mesh or jump_mesh.getVertices() is None:
@@ -1037,3 +1157,42 @@ class _CreateTopLayersJob(Job):
     def cancel(self) -> None:
         self._cancel = True
         super().cancel()
+
+
+class _BuildLevelsOfDetailJob(Job):
+    """Builds simplified versions of layer data, for the layer view to draw many layers faster from far away."""
+
+    def __init__(self, layer_data: "LayerData", tolerances: Tuple[float, ...]) -> None:
+        super().__init__()
+
+        self._layer_data = layer_data
+        self._tolerances = tolerances
+        self._cancel = False
+
+    def getLayerData(self) -> "LayerData":
+        return self._layer_data
+
+    def run(self) -> None:
+        start_time = time.time()
+        levels_of_detail = []  # type: List[Tuple[float, LayerData]]
+        # Each level is simplified from the previous one, which is a lot faster than starting from all lines again.
+        level_of_detail = self._layer_data
+        for tolerance in self._tolerances:
+            try:
+                level_of_detail = level_of_detail.createLevelOfDetail(tolerance)
+            except Exception:
+                Logger.logException("w", "An exception occurred while simplifying the layer data.")
+                return
+            levels_of_detail.append((tolerance, level_of_detail))
+
+            if self._cancel:
+                return
+            Job.yieldThread()
+
+        self._layer_data.setLevelsOfDetail(levels_of_detail)
+        Logger.log("d", "Building %d levels of detail of the layer data took %s seconds", len(levels_of_detail), time.time() - start_time)
+        self.setResult(levels_of_detail)
+
+    def cancel(self) -> None:
+        self._cancel = True
+        super().cancel()
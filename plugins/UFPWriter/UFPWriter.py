@@ -1,13 +1,15 @@
 # Copyright (c) 2022 Ultimaker B.V.
 # Cura is released under the terms of the LGPLv3 or higher.
 import json
+import shutil
+import tempfile
 from dataclasses import asdict
 from typing import cast, List, Dict
 
 from Charon.VirtualFile import VirtualFile  # To open UFP files.
 from Charon.OpenMode import OpenMode  # To indicate that we want to write to UFP files.
 from Charon.filetypes.OpenPackagingConvention import OPCError
-from io import StringIO  # For converting g-code to bytes.
+from io import StringIO, TextIOWrapper  # For converting g-code to bytes.
 
 from PyQt6.QtCore import QBuffer
 
@@ -65,22 +67,27 @@ class UFPWriter(MeshWriter):
             self.setInformation(error_msg)
             Logger.error(error_msg)
             return False
-        gcode_textio = StringIO()  # We have to convert the g-code into bytes.
-        gcode_writer = cast(MeshWriter, PluginRegistry.getInstance().getPluginObject("GCodeWriter"))
-        success = gcode_writer.write(gcode_textio, None)
-        if not success:  # Writing the g-code failed. Then I can also not write the gzipped g-code.
-            self.setInformation(gcode_writer.getInformation())
-            return False
-        try:
-            gcode = archive.getStream("/3D/model.gcode")
-            gcode.write(gcode_textio.getvalue().encode("UTF-8"))
-            archive.addRelation(virtual_path = "/3D/model.gcode",
-                                relation_type = "http://schemas.ultimaker.org/package/2018/relationships/gcode")
-        except (EnvironmentError, RuntimeError) as e:
-            error_msg = catalog.i18nc("@info:error", "Can't write to UFP file:") + " " + str(e)
-            self.setInformation(error_msg)
-            Logger.error(error_msg)
-            return False
+        # The g-code is written to a temporary file first rather than to memory, since it can be large.
+        with tempfile.TemporaryFile() as gcode_file:
+            gcode_textio = TextIOWrapper(gcode_file, encoding = "UTF-8", newline = "")  # We have to convert the g-code into bytes.
+            gcode_writer = cast(MeshWriter, PluginRegistry.getInstance().getPluginObject("GCodeWriter"))
+            success = gcode_writer.write(gcode_textio, None)
+            if not success:  # Writing the g-code failed. Then I can also not write the gzipped g-code.
+                self.setInformation(gcode_writer.getInformation())
+                return False
+            gcode_textio.flush()
+            gcode_textio.detach()  # Leave closing the file to the with statement.
+            try:
+                gcode_file.seek(0)
+                gcode = archive.getStream("/3D/model.gcode")
+                shutil.copyfileobj(gcode_file, gcode)
+                archive.addRelation(virtual_path = "/3D/model.gcode",
+                                    relation_type = "http://schemas.ultimaker.org/package/2018/relationships/gcode")
+            except (EnvironmentError, RuntimeError) as e:
+                error_msg = catalog.i18nc("@info:error", "Can't write to UFP file:") + " " + str(e)
+                self.setInformation(error_msg)
+                Logger.error(error_msg)
+                return False
 
         # Write settings
         try:
@@ -108,6 +108,8 @@ UM.PreferencesPage
         UM.Preferences.resetPreference("view/navigation_style");
         UM.Preferences.resetPreference("view/zoom_to_mouse");
         zoomToMouseCheckbox.checked = boolCheck(UM.Preferences.getValue("view/zoom_to_mouse"))
+        UM.Preferences.resetPreference("layerview/process_layers_while_slicing");
+        processLayersWhileSlicingCheckbox.checked = boolCheck(UM.Preferences.getValue("layerview/process_layers_while_slicing"))
         //UM.Preferences.resetPreference("view/top_layer_count");
         //topLayerCountCheckbox.checked = boolCheck(UM.Preferences.getValue("view/top_layer_count"))
         UM.Preferences.resetPreference("general/restore_window_geometry")
@@ -579,6 +581,21 @@ UM.PreferencesPage
                 }
             }
 
+            UM.TooltipArea
+            {
+                width: childrenRect.width
+                height: childrenRect.height
+                text: catalog.i18nc("@info:tooltip", "Should the layers be shown in the preview while they are still being sliced?")
+
+                UM.CheckBox
+                {
+                    id: processLayersWhileSlicingCheckbox
+                    text: catalog.i18nc("@option:check", "Show layers while slicing")
+                    checked: boolCheck(UM.Preferences.getValue("layerview/process_layers_while_slicing"))
+                    onCheckedChanged: UM.Preferences.setValue("layerview/process_layers_while_slicing", checked)
+                }
+            }
+
             UM.TooltipArea
             {
                 width: childrenRect.width
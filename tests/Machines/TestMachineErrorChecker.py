@@ -0,0 +1,49 @@
+# Copyright (c) 2024 UltiMaker
+# Cura is released under the terms of the LGPLv3 or higher.
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from cura.Machines.MachineErrorChecker import MachineErrorChecker
+
+
+@pytest.fixture
+def machine_error_checker(application):
+    with patch("cura.CuraApplication.CuraApplication.getInstance", MagicMock(return_value = application)):
+        return MachineErrorChecker()
+
+
+def test_waitForResultWhileCheckInProgress(machine_error_checker):
+    stack = MagicMock()
+    stack.getAllKeys = MagicMock(return_value = {"layer_height", "infill_sparse_density"})
+    stack.getProperty = MagicMock(return_value = False)  # Disabled settings, so there's nothing to validate.
+    machine_error_checker._machine_manager.activeMachine = MagicMock(extruderList = [stack])
+    machine_error_checker._max_time_per_update = 0  # Check a single key per update.
+    assert machine_error_checker.waitForResult(0)  # Nothing was scheduled yet.
+
+    machine_error_checker.startErrorCheck()
+    assert not machine_error_checker.waitForResult(0)
+
+    machine_error_checker._rescheduleCheck()  # As if the timer went off.
+    assert not machine_error_checker.waitForResult(0)
+
+    machine_error_checker._checkStack()  # Checks the first key. The other one is left for the next update.
+    assert machine_error_checker._check_in_progress
+    assert not machine_error_checker.waitForResult(0)
+
+    while machine_error_checker.needToWaitForResult:
+        machine_error_checker._checkStack()
+    assert machine_error_checker.waitForResult(0)
+    assert not machine_error_checker.hasError
+
+
+def test_waitForResultWithoutExtruders(machine_error_checker):
+    machine_error_checker._machine_manager.activeMachine = MagicMock(extruderList = [])
+
+    machine_error_checker.startErrorCheck()
+    machine_error_checker._rescheduleCheck()  # As if the timer went off.
+    machine_error_checker._checkStack()
+
+    assert not machine_error_checker.needToWaitForResult
+    assert machine_error_checker.waitForResult(0)
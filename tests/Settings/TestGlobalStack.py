@@ -495,4 +495,21 @@ def test_setPropertyUser(key, property, value, global_stack):
     global_stack.setProperty(key, property, value)  # The actual test.
 
     # Make sure that the user container gets a setProperty call.
-    global_stack.userChanges.setProperty.assert_called_once_with(key, property, value, None, False)
\ No newline at end of file
+    global_stack.userChanges.setProperty.assert_called_once_with(key, property, value, None, False)
+
+def test_getAllValuesCached(global_stack):
+    """Tests whether getAllValues only evaluates the settings again after a setting changed."""
+
+    with unittest.mock.patch.object(global_stack, "getAllKeys", unittest.mock.MagicMock(return_value = {"layer_height", "infill_sparse_density"})):
+        with unittest.mock.patch.object(global_stack, "getProperty", unittest.mock.MagicMock(side_effect = lambda key, property_name, context = None: key + " value")) as get_property:
+            assert global_stack.getAllValues() == {"layer_height": "layer_height value", "infill_sparse_density": "infill_sparse_density value"}
+            get_property.reset_mock()
+
+            values = global_stack.getAllValues()
+            values["layer_height"] = "changed"  # Changing the result shouldn't change the cache.
+            assert global_stack.getAllValues()["layer_height"] == "layer_height value"
+            get_property.assert_not_called()
+
+            global_stack.propertyChanged.emit("layer_height", "value")
+            global_stack.getAllValues()
+            assert get_property.call_count == 2
@@ -424,3 +424,74 @@ class TestGetEdgeDisallowedSize:
         with patch("cura.Settings.ExtruderManager.ExtruderManager.getInstance"):
             with patch.dict(self.setting_property_dict, {"print_sequence": {"value": "one_at_a_time"}}):
                 assert build_volume.getEdgeDisallowedSize() == 0.1
+
+
+class TestUpdateNodeBoundaryCheck:
+    def createBuildVolume(self, build_volume: BuildVolume, root):
+        root.callDecoration = MagicMock(return_value = None)
+        build_volume._application.getController().getScene().getRoot = MagicMock(return_value = root)
+        build_volume._global_container_stack = MagicMock()
+        build_volume.getBoundingBox = MagicMock()
+        return build_volume
+
+    def createNode(self, parent):
+        node = MagicMock(name = "node")
+        node.getParent = MagicMock(return_value = parent)
+        node.callDecoration = MagicMock(return_value = None)
+        return node
+
+    def test_onlyChangedNodes(self, build_volume: BuildVolume):
+        root = MagicMock(name = "root")
+        first_node = self.createNode(root)
+        second_node = self.createNode(root)
+        build_volume = self.createBuildVolume(build_volume, root)
+
+        with patch("cura.BuildVolume.BreadthFirstIterator", side_effect = lambda node: [root, first_node, second_node] if node is root else [node]) as iterator:
+            build_volume.updateNodeBoundaryCheck()  # The first check checks everything.
+            iterator.assert_called_once_with(root)
+            iterator.reset_mock()
+
+            build_volume._markForBoundaryCheck(second_node)
+            build_volume.updateNodeBoundaryCheck()
+            iterator.assert_called_once_with(second_node)
+            iterator.reset_mock()
+
+            build_volume.updateNodeBoundaryCheck()  # Nothing changed any more.
+            iterator.assert_not_called()
+
+    def test_changedGroupChild(self, build_volume: BuildVolume):
+        root = MagicMock(name = "root")
+        group_node = self.createNode(root)
+        group_node.callDecoration = MagicMock(side_effect = lambda decoration: decoration == "isGroup")
+        child_node = self.createNode(group_node)
+        build_volume = self.createBuildVolume(build_volume, root)
+        build_volume._boundary_check_all_nodes = False
+
+        build_volume._markForBoundaryCheck(child_node)
+
+        assert build_volume._boundary_check_nodes == {group_node}  # The group decides for all of its children.
+
+    def test_changedRoot(self, build_volume: BuildVolume):
+        root = MagicMock(name = "root")
+        build_volume = self.createBuildVolume(build_volume, root)
+        build_volume._boundary_check_all_nodes = False
+
+        build_volume._markForBoundaryCheck(self.createNode(None))  # Removed nodes don't need to be checked.
+        assert not build_volume._boundary_check_all_nodes
+        assert build_volume._boundary_check_nodes == set()
+
+        build_volume._markForBoundaryCheck(root)
+        assert build_volume._boundary_check_all_nodes
+
+
+def test_getDisallowedAreasNear(build_volume: BuildVolume):
+    near_area = Polygon(numpy.array([[0, 0], [10, 0], [10, 10], [0, 10]], numpy.float32))
+    far_area = Polygon(numpy.array([[100, 100], [110, 100], [110, 110], [100, 110]], numpy.float32))
+    build_volume.setDisallowedAreas([near_area, far_area, Polygon()])
+
+    node = MagicMock()
+    node.callDecoration = MagicMock(return_value = Polygon(numpy.array([[5, 5], [20, 5], [20, 20], [5, 20]], numpy.float32)))
+    assert build_volume._getDisallowedAreasNear(node) == [near_area]
+
+    node.callDecoration = MagicMock(return_value = None)  # Without a printing area, the node gets all areas.
+    assert len(build_volume._getDisallowedAreasNear(node)) == 3
@@ -1,9 +1,15 @@
+import concurrent.futures
 import copy
+import math
 from unittest.mock import patch, MagicMock
 
 import pytest
 
+import numpy
+
 from UM.Math.Polygon import Polygon
+from UM.Math.Quaternion import Quaternion
+from UM.Math.Vector import Vector
 from UM.Mesh.MeshBuilder import MeshBuilder
 from UM.Scene.GroupDecorator import GroupDecorator
 from UM.Scene.SceneNode import SceneNode
@@ -27,14 +33,18 @@ class PrintingDecorator(SceneNodeDecorator):
         return False
 
 
-@pytest.fixture
-def convex_hull_decorator():
+def createConvexHullDecorator():
     with patch("cura.CuraApplication.CuraApplication.getInstance", MagicMock(return_value = mocked_application)):
         with patch("UM.Application.Application.getInstance", MagicMock(return_value = mocked_application)):
             with patch("cura.Settings.ExtruderManager.ExtruderManager.getInstance"):
                 return ConvexHullDecorator()
 
 
+@pytest.fixture
+def convex_hull_decorator():
+    return createConvexHullDecorator()
+
+
 def test_getSetNode(convex_hull_decorator):
     node = SceneNode()
     with patch("UM.Application.Application.getInstance", MagicMock(return_value=mocked_application)):
@@ -189,3 +199,105 @@ def test_compute2DConvexHullMeshDataGrouped(convex_hull_decorator):
             copied_decorator._getSettingProperty = MagicMock(return_value=0)
         node.addDecorator(copied_decorator)
     assert convex_hull_decorator._compute2DConvexHull() == Polygon([[-5.0, 5.0], [5.0, 5.0], [5.0, -5.0], [-5.0, -5.0]])
+
+
+def createCubeNode(decorator, mesh = None):
+    node = SceneNode()
+    if mesh is None:
+        mb = MeshBuilder()
+        mb.addCube(10, 10, 10)
+        mesh = mb.build()
+    node.setMeshData(mesh)
+
+    decorator._getSettingProperty = MagicMock(return_value = 0)
+    with patch("UM.Application.Application.getInstance", MagicMock(return_value = mocked_application)):
+        node.addDecorator(decorator)
+    mocked_stack = MagicMock()
+    mocked_stack.getProperty = MagicMock(return_value = 1)
+    decorator._global_stack = mocked_stack
+    return node
+
+
+def test_compute2DConvexHullMovedMeshData(convex_hull_decorator):
+    node = createCubeNode(convex_hull_decorator)
+    convex_hull_decorator._compute2DConvexHull()
+
+    with patch.object(ConvexHullDecorator, "_computeMeshConvexHull", wraps = ConvexHullDecorator._computeMeshConvexHull) as compute:
+        with patch("UM.Application.Application.getInstance", MagicMock(return_value = mocked_application)):
+            node.translate(Vector(10, 0, 20))
+        result = convex_hull_decorator._compute2DConvexHull()
+        compute.assert_not_called()  # Only moved, so the old hull can be reused.
+
+    numpy.testing.assert_allclose(result.getPoints().min(axis = 0), [5, 15], atol = 1e-4)
+    numpy.testing.assert_allclose(result.getPoints().max(axis = 0), [15, 25], atol = 1e-4)
+
+    with patch.object(ConvexHullDecorator, "_computeMeshConvexHull", wraps = ConvexHullDecorator._computeMeshConvexHull) as compute:
+        with patch.object(ConvexHullDecorator, "_getMeshHullVertices", wraps = ConvexHullDecorator._getMeshHullVertices) as get_hull_vertices:
+            with patch("UM.Application.Application.getInstance", MagicMock(return_value = mocked_application)):
+                node.rotate(Quaternion.fromAngleAxis(math.pi / 2, Vector.Unit_Y))
+            result = convex_hull_decorator._compute2DConvexHull()
+            compute.assert_called_once()  # Rotated, so the hull is computed again, from the cached 3D hull.
+            get_hull_vertices.assert_not_called()
+
+    numpy.testing.assert_allclose(result.getPoints().min(axis = 0), [5, 15], atol = 1e-4)
+    numpy.testing.assert_allclose(result.getPoints().max(axis = 0), [15, 25], atol = 1e-4)
+
+    with patch.object(ConvexHullDecorator, "_computeMeshConvexHull", wraps = ConvexHullDecorator._computeMeshConvexHull) as compute:
+        with patch("UM.Application.Application.getInstance", MagicMock(return_value = mocked_application)):
+            node.rotate(Quaternion.fromAngleAxis(math.pi / 4, Vector.Unit_X))
+        convex_hull_decorator._compute2DConvexHull()
+        compute.assert_called_once()  # Tilted, so the footprint changes shape.
+
+
+def test_compute2DConvexHullScaledMeshData(convex_hull_decorator):
+    node = createCubeNode(convex_hull_decorator)
+    with patch("UM.Application.Application.getInstance", MagicMock(return_value = mocked_application)):
+        node.rotate(Quaternion.fromAngleAxis(0.3, Vector.Unit_Y))
+    convex_hull_decorator._compute2DConvexHull()
+    for _ in range(3):  # The hull is rounded, which shouldn't add up over repeated changes.
+        with patch("UM.Application.Application.getInstance", MagicMock(return_value = mocked_application)):
+            node.scale(Vector(10, 10, 10))
+            node.rotate(Quaternion.fromAngleAxis(0.3, Vector.Unit_Y))
+        convex_hull_decorator._compute2DConvexHull()
+    with patch("UM.Application.Application.getInstance", MagicMock(return_value = mocked_application)):
+        node.translate(Vector(100, 0, 0))
+    result = convex_hull_decorator._compute2DConvexHull()
+
+    fresh_decorator = createConvexHullDecorator()
+    fresh_node = createCubeNode(fresh_decorator, mesh = node.getMeshData())
+    with patch("UM.Application.Application.getInstance", MagicMock(return_value = mocked_application)):
+        fresh_node.setTransformation(node.getLocalTransformation())
+    expected = fresh_decorator._compute2DConvexHull()
+
+    numpy.testing.assert_allclose(numpy.sort(result.getPoints(), axis = 0), numpy.sort(expected.getPoints(), axis = 0), atol = 1e-4)
+
+
+def test_computeConvexHulls(convex_hull_decorator):
+    first_node = createCubeNode(convex_hull_decorator)
+    second_node = createCubeNode(createConvexHullDecorator(), mesh = first_node.getMeshData())
+    with patch("UM.Application.Application.getInstance", MagicMock(return_value = mocked_application)):
+        second_node.translate(Vector(20, 0, 0))
+
+    with patch.object(ConvexHullDecorator, "_computeMeshConvexHull", wraps = ConvexHullDecorator._computeMeshConvexHull) as compute:
+        with concurrent.futures.ThreadPoolExecutor(max_workers = 2) as executor:
+            first_hull, second_hull = ConvexHullDecorator.computeConvexHulls([first_node, second_node], executor)
+        compute.assert_called_once()  # Both nodes share the same mesh.
+
+    numpy.testing.assert_allclose(first_hull.getPoints().min(axis = 0), [-5, -5], atol = 1e-4)
+    numpy.testing.assert_allclose(second_hull.getPoints().min(axis = 0), [15, -5], atol = 1e-4)
+
+
+def test_compute2DConvexHullTiltedMeshData(convex_hull_decorator):
+    node = createCubeNode(convex_hull_decorator)
+    convex_hull_decorator._compute2DConvexHull()
+
+    with patch.object(ConvexHullDecorator, "_getMeshHullVertices", wraps = ConvexHullDecorator._getMeshHullVertices) as get_hull_vertices:
+        with patch("UM.Application.Application.getInstance", MagicMock(return_value = mocked_application)):
+            node.rotate(Quaternion.fromAngleAxis(math.pi / 4, Vector.Unit_X))
+        result = convex_hull_decorator._compute2DConvexHull()
+        get_hull_vertices.assert_not_called()  # The 3D hull of the mesh stays the same.
+
+    # The cube is rotated 45 degrees, so its diagonal now ends up on the build plate.
+    half_diagonal = 5 * math.sqrt(2)
+    numpy.testing.assert_allclose(result.getPoints().min(axis = 0), [-5, -half_diagonal], atol = 0.1)
+    numpy.testing.assert_allclose(result.getPoints().max(axis = 0), [5, half_diagonal], atol = 0.1)
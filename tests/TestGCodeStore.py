@@ -0,0 +1,47 @@
+import io
+
+import pytest
+
+from cura.Scene.GCodeStore import GCodeStore
+
+gcode = [";FLAVOR:Marlin\n", ";LAYER:0\nG1 X10 Y10 E1\n", "", ";LAYER:1\nG1 X20 Y10 E2 ; Ünicode\n"]
+
+
+def test_listOperations():
+    store = GCodeStore(gcode)
+
+    assert len(store) == 4
+    assert store == gcode
+    assert store[1] == gcode[1]
+    assert store[-1] == gcode[-1]
+    assert store[1:3] == gcode[1:3]
+    assert "".join(store) == "".join(gcode)
+
+    store.append(";End\n")
+    store[0] += ";POSTPROCESSED\n"
+    del store[2]
+    store.insert(1, ";Inserted\n")
+    assert store == [gcode[0] + ";POSTPROCESSED\n", ";Inserted\n", gcode[1], gcode[3], ";End\n"]
+
+    with pytest.raises(IndexError):
+        store[5]
+
+
+def test_copy():
+    store = GCodeStore(gcode)
+    copy = store.copy()
+
+    store[0] = ";Changed\n"
+    store.append(";End\n")
+    assert copy == gcode  # Changes to the original don't change the copy, even though they share the file.
+    copy.append(";Other end\n")
+    assert store[-1] == ";End\n"
+
+
+def test_fromFile():
+    data = "".join(gcode).encode("utf-8")
+    store = GCodeStore.fromFile(io.BytesIO(data), [len(layer.encode("utf-8")) for layer in gcode])
+    assert store == gcode
+
+    with pytest.raises(ValueError):
+        GCodeStore.fromFile(io.BytesIO(data), [1, 2])
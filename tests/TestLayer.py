@@ -1,6 +1,10 @@
-from cura.Layer import Layer
 from unittest.mock import MagicMock
 
+import numpy
+
+from cura.Layer import Layer
+from cura.LayerPolygon import LayerPolygon
+
 
 def test_lineMeshVertexCount():
     layer = Layer(1)
@@ -28,12 +32,20 @@ def test_getAndSet():
     assert layer.height == 0.1
 
 
-def test_elementCount():
+def test_getLineTypeLimits():
     layer = Layer(1)
-    layer_polygon = MagicMock()
-    layer_polygon.lineMeshElementCount = MagicMock(return_value=9002)
-    layer_polygon.lineMeshVertexCount = MagicMock(return_value=9001)
-    layer_polygon.elementCount = 12
-    layer.polygons.append(layer_polygon)
-    assert layer.build(0, 0, [], [], [], [], [] ,[] , []) == (9001, 9002)
-    assert layer.elementCount == 12
+    layer.polygons.append(LayerPolygon(0, numpy.array([[1], [8], [1]], dtype = numpy.uint8), numpy.zeros((4, 3), dtype = numpy.float32),
+                                       numpy.array([[0.4], [0.1], [0.5]], dtype = numpy.float32), numpy.array([[0.2], [0], [0.3]], dtype = numpy.float32),
+                                       numpy.array([[50], [150], [30]], dtype = numpy.float32)))
+
+    limits = layer.getLineTypeLimits()
+    assert limits.shape == (LayerPolygon.getNumberOfTypes(), 2 * len(Layer.LINE_TYPE_LIMIT_PROPERTIES))
+    numpy.testing.assert_allclose(limits[1], [30, 50, 0.4, 0.5, 0.2, 0.3, 4, 4.5], rtol = 1e-6)
+    numpy.testing.assert_allclose(limits[8, :4], [150, 150, 0.1, 0.1])
+    assert limits[8, 4] == numpy.inf  # Lines without thickness aren't in the minimum thickness.
+    assert limits[6, 0] == numpy.inf and limits[6, 1] == -numpy.inf  # No infill in this layer.
+
+    layer.polygons.append(LayerPolygon(0, numpy.array([[6]], dtype = numpy.uint8), numpy.zeros((2, 3), dtype = numpy.float32),
+                                       numpy.array([[0.6]], dtype = numpy.float32), numpy.array([[0.2]], dtype = numpy.float32),
+                                       numpy.array([[20]], dtype = numpy.float32)))
+    assert layer.getLineTypeLimits()[6, 0] == 20  # Calculated again for the new polygon.
@@ -0,0 +1,33 @@
+import numpy
+import pytest
+
+from cura.LayerDataBuilder import LayerDataBuilder
+from cura.LayerPolygon import LayerPolygon
+
+material_color_map = numpy.array([[1, 0, 0, 1]], dtype = numpy.float32)
+
+pytestmark = pytest.mark.usefixtures("layer_color_map")
+
+
+def test_createLevelOfDetail(create_layer_polygon):
+    builder = LayerDataBuilder()
+    for layer_nr in range(2):
+        builder.addLayer(layer_nr)
+        # A nearly straight wall of many short lines that turns a corner, then a short and a long travel move.
+        wall = [[x / 10, 0.2 * layer_nr, 0.001 * (x % 2)] for x in range(101)] + [[10, 0.2 * layer_nr, 5]]
+        travel = [[10.01, 0.2 * layer_nr, 5], [20, 0.2 * layer_nr, 5]]
+        line_types = [LayerPolygon.Inset0Type] * 101 + [LayerPolygon.MoveUnretractedType] * 2
+        builder.getLayer(layer_nr).polygons.append(create_layer_polygon(line_types, points = wall + travel, feedrate = 30))
+    layer_data = builder.build(material_color_map)
+
+    result = layer_data.createLevelOfDetail(0.05)
+
+    assert list(result.getElementCounts()) == list(layer_data.getElementCounts())
+    assert sum(result.getElementCounts().values()) == len(result.getIndices())
+    lines = result.getVertices()[result.getIndices()].reshape((-1, 2, 3))
+    # In each layer, the wall becomes one line to the corner and one line up from it. The short travel is left out.
+    assert result.getElementCounts()[0] == 6
+    numpy.testing.assert_allclose(lines[0:3, :, 0], [[0, 10], [10, 10], [10, 20]])
+    numpy.testing.assert_allclose(lines[3:6, :, 1], 0.2)
+    assert result.getAttribute("line_types")["value"].shape == (len(result.getVertices()), )
+    assert len(result.getVertices()) < len(layer_data.getVertices())
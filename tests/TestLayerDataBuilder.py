@@ -0,0 +1,139 @@
+import numpy
+import pytest
+
+from cura.LayerDataBuilder import LayerDataBuilder
+
+material_color_map = numpy.array([[1, 0, 0, 1], [0, 1, 0, 1]], dtype = numpy.float32)
+
+pytestmark = pytest.mark.usefixtures("layer_color_map")
+
+
+def createBuilder(create_layer_polygon):
+    builder = LayerDataBuilder()
+    for layer_nr in [3, 1, 2]:
+        builder.addLayer(layer_nr)
+        builder.getLayer(layer_nr).polygons.append(create_layer_polygon([1, 1, 8, 2], extruder = 0, offset = layer_nr))
+        builder.getLayer(layer_nr).polygons.append(create_layer_polygon([6, 9, 6], extruder = 1, offset = 10 * layer_nr))
+    return builder
+
+
+def test_build(create_layer_polygon, layer_color_map):
+    builder = LayerDataBuilder()
+    builder.addLayer(2)
+    builder.getLayer(2).polygons.append(create_layer_polygon([2, 2], extruder = 1, offset = 10))
+    builder.addLayer(1)
+    builder.getLayer(1).polygons.append(create_layer_polygon([1, 8]))
+    builder.getLayer(1).polygons.append(create_layer_polygon([], offset = 5))  # Polygons without lines shouldn't break it.
+    result = builder.build(material_color_map)
+
+    # The layers are in order. A point gets a vertex for each line type it ends or starts, so the two lines of layer 2
+    # share their middle vertex while the two lines of layer 1 don't.
+    numpy.testing.assert_array_equal(result.getVertices(), [[0, 1, 2], [3, 4, 5], [3, 4, 5], [6, 7, 8], [10, 11, 12], [13, 14, 15], [16, 17, 18]])
+    numpy.testing.assert_array_equal(result.getIndices(), [0, 1, 2, 3, 4, 5, 5, 6])
+    numpy.testing.assert_array_equal(result.getColors(), layer_color_map[[1, 1, 8, 8, 2, 2, 2]])
+    numpy.testing.assert_array_equal(result.getAttribute("line_dimensions")["value"], numpy.tile(numpy.array([0.4, 0.2], dtype = numpy.float32), (7, 1)))
+    numpy.testing.assert_array_equal(result.getAttribute("feedrates")["value"], [10, 10, 11, 11, 10, 10, 11])
+    numpy.testing.assert_array_equal(result.getAttribute("extruders")["value"], [0, 0, 0, 0, 1, 1, 1])
+    numpy.testing.assert_array_equal(result.getAttribute("line_types")["value"], [1, 1, 8, 8, 2, 2, 2])
+    assert result.getElementCounts() == {1: 4, 2: 4}
+
+
+def test_materialColors(create_layer_polygon):
+    result = createBuilder(create_layer_polygon).build(material_color_map, line_type_brightness = 0.5)
+
+    line_types = result.getAttribute("line_types")["value"]
+    extruders = result.getAttribute("extruders")["value"]
+    material_colors = result.getAttribute("colors")["value"]
+    travels = numpy.isin(line_types, [8, 9])
+    numpy.testing.assert_array_equal(material_colors[travels], result.getColors()[travels])
+    numpy.testing.assert_array_equal(material_colors[~travels], material_color_map[extruders[~travels].astype(int)])
+
+
+def test_buildLayerMeshSameResult(create_layer_polygon):
+    expected = createBuilder(create_layer_polygon).build(material_color_map)
+
+    builder = createBuilder(create_layer_polygon)
+    builder.buildLayerMesh(1)
+    builder.buildLayerMesh(3)
+    result = builder.build(material_color_map)
+
+    numpy.testing.assert_array_equal(result.getVertices(), expected.getVertices())
+    numpy.testing.assert_array_equal(result.getIndices(), expected.getIndices())
+    numpy.testing.assert_array_equal(result.getColors(), expected.getColors())
+    for name in ["line_dimensions", "extruders", "colors", "line_types", "feedrates"]:
+        numpy.testing.assert_array_equal(result.getAttribute(name)["value"], expected.getAttribute(name)["value"])
+    assert result.getElementCounts() == expected.getElementCounts()
+
+
+def test_buildLayerMeshThenAddPolygon(create_layer_polygon):
+    expected_builder = createBuilder(create_layer_polygon)
+    expected_builder.getLayer(1).polygons.append(create_layer_polygon([1, 2], offset = 7))
+    expected = expected_builder.build(material_color_map)
+
+    builder = createBuilder(create_layer_polygon)
+    builder.buildLayerMesh(1)
+    builder.getLayer(1).polygons.append(create_layer_polygon([1, 2], offset = 7))  # The converted layer is out of date now.
+    result = builder.build(material_color_map)
+
+    numpy.testing.assert_array_equal(result.getVertices(), expected.getVertices())
+    numpy.testing.assert_array_equal(result.getIndices(), expected.getIndices())
+    assert result.getElementCounts() == expected.getElementCounts()
+    assert len(result.getIndices()) == sum(result.getElementCounts().values())
+
+
+def assertSameLayerData(result, expected):
+    numpy.testing.assert_array_equal(result.getVertices(), expected.getVertices())
+    numpy.testing.assert_array_equal(result.getIndices(), expected.getIndices())
+    numpy.testing.assert_array_equal(result.getColors(), expected.getColors())
+    for name in ["line_dimensions", "extruders", "colors", "line_types", "feedrates"]:
+        numpy.testing.assert_array_equal(result.getAttribute(name)["value"], expected.getAttribute(name)["value"])
+    assert result.getElementCounts() == expected.getElementCounts()
+
+
+def test_buildIncrementally(create_layer_polygon):
+    full_builder = createBuilder(create_layer_polygon)
+    builder = LayerDataBuilder()
+    for layer_nr in [1, 2, 3, 0]:  # Layer 0 comes in after the others, so everything is put together again.
+        builder.addLayer(layer_nr)
+        if layer_nr in full_builder.getLayers():
+            builder.getLayer(layer_nr).polygons.extend(full_builder.getLayer(layer_nr).polygons)
+            builder.buildLayerMesh(layer_nr)
+        assertSameLayerData(builder.buildIncrementally(material_color_map, 0.5), builder.build(material_color_map, 0.5))
+
+    previous = builder.buildIncrementally(material_color_map, 0.5)
+    previous_vertices = previous.getVertices().copy()
+    builder.getLayer(3).polygons.append(create_layer_polygon([1, 2], offset = 7))
+    builder.addLayer(4)
+    builder.getLayer(4).polygons.append(create_layer_polygon([2, 9, 1], offset = 3))
+    assertSameLayerData(builder.buildIncrementally(material_color_map, 0.5), builder.build(material_color_map, 0.5))
+    numpy.testing.assert_array_equal(previous.getVertices(), previous_vertices)  # Layer data that was handed out earlier doesn't change.
+
+
+def test_buildWithLayerNumbers(create_layer_polygon):
+    builder = createBuilder(create_layer_polygon)
+    all_layers = builder.build(material_color_map)
+    result = builder.build(material_color_map, layer_numbers = {2: 0, 3: 1})
+
+    assert sorted(result.getLayers().keys()) == [0, 1]
+    assert result.getElementCounts() == {0: all_layers.getElementCounts()[2], 1: all_layers.getElementCounts()[3]}
+    assert result.getLayer(0) is builder.getLayer(2)
+    assert len(result.getIndices()) == sum(result.getElementCounts().values())
+
+
+def test_merge(create_layer_polygon):
+    expected = createBuilder(create_layer_polygon).build(material_color_map)
+
+    full_builder = createBuilder(create_layer_polygon)
+    builder = LayerDataBuilder()
+    for layer_nr in [2, 3, 1]:
+        chunk = LayerDataBuilder()
+        chunk.addLayer(layer_nr)
+        chunk.getLayer(layer_nr).polygons.extend(full_builder.getLayer(layer_nr).polygons)
+        chunk.buildLayerMesh(layer_nr)
+        builder.merge(chunk)
+    result = builder.build(material_color_map)
+
+    assert sorted(builder.getLayers().keys()) == [1, 2, 3]
+    numpy.testing.assert_array_equal(result.getVertices(), expected.getVertices())
+    numpy.testing.assert_array_equal(result.getIndices(), expected.getIndices())
+    assert result.getElementCounts() == expected.getElementCounts()
@@ -0,0 +1,28 @@
+import numpy
+import pytest
+
+pytestmark = pytest.mark.usefixtures("layer_color_map")
+
+
+def test_noInstanceDict(create_layer_polygon):
+    polygon = create_layer_polygon([1, 1, 8], build_cache = False)
+    assert not hasattr(polygon, "__dict__")
+
+
+def test_getColors(create_layer_polygon, layer_color_map):
+    polygon = create_layer_polygon([1, 1, 8, 6], build_cache = False)
+    numpy.testing.assert_array_equal(polygon.getColors(), layer_color_map[polygon.types])
+
+
+def test_jumps(create_layer_polygon):
+    polygon = create_layer_polygon([1, 8, 9, 6], build_cache = False)
+    assert polygon.jumpCount == 2
+    assert polygon.meshLineCount == 2
+    numpy.testing.assert_array_equal(polygon.jumpMask.ravel(), [False, True, True, False])
+
+
+def test_buildCache(create_layer_polygon):
+    polygon = create_layer_polygon([1, 1, 8, 8, 2], build_cache = False)
+    polygon.buildCache()
+    assert polygon.lineMeshElementCount() == 5
+    assert polygon.lineMeshVertexCount() == 5 + 3  # One extra vertex at the start and at each change of line type.
@@ -0,0 +1,31 @@
+from cura.Scene.SpatialGrid import SpatialGrid
+
+
+def test_queryFindsOverlappingCells():
+    grid = SpatialGrid(10)
+    grid.add("a", 0, 0, 5, 5)
+    grid.add("b", 50, 50, 55, 55)
+    grid.add("c", -25, -5, 25, 5)  # Spans multiple cells.
+
+    assert grid.query(1, 1, 2, 2) == ["a", "c"]
+    assert grid.query(51, 51, 52, 52) == ["b"]
+    assert grid.query(-22, 0, -21, 1) == ["c"]
+    assert grid.query(100, 100, 110, 110) == []
+
+
+def test_queryInOrderOfAdding():
+    grid = SpatialGrid(10)
+    for item in ["c", "a", "b"]:
+        grid.add(item, 0, 0, 1, 1)
+    grid.add("a", 20, 20, 21, 21)  # Adding the same object again doesn't change its order.
+
+    assert grid.query(0, 0, 30, 30) == ["c", "a", "b"]
+    assert len(grid) == 3
+
+
+def test_negativeCoordinates():
+    grid = SpatialGrid(10)
+    grid.add("a", -15, -15, -11, -11)
+
+    assert grid.query(-12, -12, -12, -12) == ["a"]
+    assert grid.query(-9, -9, -1, -1) == []
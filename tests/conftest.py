@@ -4,12 +4,14 @@
 # The purpose of this class is to create fixtures or methods that can be shared among all tests.
 
 from unittest.mock import MagicMock, patch
+import numpy
 import pytest
 
 from UM.Application import Application
 from UM.Qt.QtApplication import QtApplication  # QtApplication import is required, even though it isn't used.
 
 from cura.CuraApplication import CuraApplication
+from cura.LayerPolygon import LayerPolygon
 from cura.Settings.ExtruderManager import ExtruderManager
 from cura.Settings.MachineManager import MachineManager
 from cura.UI.MachineActionManager import MachineActionManager
@@ -76,3 +78,32 @@ def machine_manager(application, extruder_manager, container_registry, global_st
         manager = MachineManager(application)
 
     return manager
+
+
+# Replaces the colours of the line types, which normally come from the theme, and returns the colours used instead.
+@pytest.fixture()
+def layer_color_map():
+    color_map = numpy.arange(LayerPolygon.getNumberOfTypes() * 4, dtype = numpy.float32).reshape((-1, 4)) / 60
+    with patch("cura.LayerPolygon.LayerPolygon.getColorMap", return_value = color_map):
+        yield color_map
+
+
+# Returns a function that creates layer polygons with the given line types. Unless the points are given, the lines
+# follow each other along a diagonal, shifted by the offset. Unless a feedrate is given, each line gets its own.
+@pytest.fixture()
+def create_layer_polygon():
+    def createLayerPolygon(line_types, extruder = 0, points = None, offset = 0.0, feedrate = None, build_cache = True) -> LayerPolygon:
+        line_count = len(line_types)
+        if points is None:
+            points = numpy.arange((line_count + 1) * 3, dtype = numpy.float32).reshape((-1, 3)) + offset
+        if feedrate is None:
+            feedrates = numpy.arange(line_count, dtype = numpy.float32).reshape((-1, 1)) + 10
+        else:
+            feedrates = numpy.full((line_count, 1), feedrate, dtype = numpy.float32)
+        polygon = LayerPolygon(extruder, numpy.array(line_types, dtype = numpy.uint8).reshape((-1, 1)), numpy.array(points, dtype = numpy.float32),
+                               numpy.full((line_count, 1), 0.4, dtype = numpy.float32), numpy.full((line_count, 1), 0.2, dtype = numpy.float32),
+                               feedrates)
+        if build_cache:
+            polygon.buildCache()
+        return polygon
+    return createLayerPolygon